@@ -0,0 +1,351 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 (Portfolio)
+# Description: Reproducible benchmark harness for the HashMap engines. For
+# every combination of engine, hash function, key distribution, size and
+# load factor it measures put, get, remove, resize and iteration: throughput,
+# per-operation latency percentiles and (optionally) peak memory while the
+# map is built. Each measurement is written as one JSON object per line so
+# results can be stored and compared between runs.
+#
+# Example:
+#   python benchmark.py --engines sc,oa --sizes 1000,10000 \
+#       --distributions uniform,zipf,anagram --output bench_output.txt
+
+import argparse
+import itertools
+import json
+import platform
+import random
+import string
+import sys
+import time
+import tracemalloc
+
+import hash_map_concurrent
+import hash_map_cuckoo
+import hash_map_oa
+import hash_map_oa_compact
+import hash_map_sc
+import hash_map_sc_compact
+import hash_map_swiss
+from hash_engine import HASH_FUNCTIONS
+
+
+# Engine name -> callable taking (capacity, hash function).
+ENGINES = {
+    'sc': hash_map_sc.HashMap,
+    'sc_incremental': hash_map_sc.IncrementalHashMap,
+    'sc_concurrent': hash_map_concurrent.ConcurrentHashMap,
+    'oa': hash_map_oa.HashMap,
+    'oa_incremental': hash_map_oa.IncrementalHashMap,
+    'oa_robin_hood': hash_map_oa.RobinHoodHashMap,
+    'sc_power_of_two': hash_map_sc.PowerOfTwoHashMap,
+    'oa_power_of_two': hash_map_oa.PowerOfTwoHashMap,
+    'sc_compact': hash_map_sc_compact.HashMap,
+    'oa_compact': hash_map_oa_compact.HashMap,
+    'swiss': hash_map_swiss.HashMap,
+    'cuckoo': hash_map_cuckoo.HashMap,
+}
+
+KEY_LENGTH = 12
+
+
+# ----------------------------- KEY SETS ----------------------------------- #
+
+def uniform_keys(size: int, rnd: random.Random) -> list:
+    """
+    This function returns 'size' distinct random lowercase keys.
+
+    Takes 'size' (int), 'rnd' (random.Random) as parameters.
+
+    Returns a list of str.
+    """
+
+    keys = set()
+    while len(keys) < size:
+        keys.add(''.join(rnd.choices(string.ascii_lowercase, k=KEY_LENGTH)))
+    keys = list(keys)
+    rnd.shuffle(keys)
+    return keys
+
+
+def anagram_keys(size: int, rnd: random.Random) -> list:
+    """
+    This function returns 'size' distinct permutations of one string. All of
+    them have the same hash_function_1 value, the adversarial case for it.
+
+    Takes 'size' (int), 'rnd' (random.Random) as parameters.
+
+    Returns a list of str.
+    """
+
+    base = string.ascii_lowercase[:KEY_LENGTH]
+    keys = [''.join(p) for p in itertools.islice(
+        itertools.permutations(base), size)]
+    rnd.shuffle(keys)
+    return keys
+
+
+def lookup_sequence(keys: list, distribution: str, count: int,
+                    rnd: random.Random) -> list:
+    """
+    This function returns 'count' keys to look up. 'uniform' and 'anagram'
+    pick keys uniformly, 'zipf' picks them with a Zipf (s = 1.1) skew so a
+    few keys are looked up most of the time.
+
+    Takes 'keys' (list), 'distribution' (str), 'count' (int),
+    'rnd' (random.Random) as parameters.
+
+    Returns a list of str.
+    """
+
+    if distribution != 'zipf':
+        return rnd.choices(keys, k=count)
+    weights = list(itertools.accumulate(
+        1 / rank ** 1.1 for rank in range(1, len(keys) + 1)))
+    return rnd.choices(keys, cum_weights=weights, k=count)
+
+
+def make_keys(distribution: str, size: int, rnd: random.Random) -> list:
+    """
+    This function returns the distinct keys inserted for a distribution.
+
+    Takes 'distribution' (str), 'size' (int), 'rnd' (random.Random) as
+    parameters.
+
+    Returns a list of str.
+    """
+
+    if distribution == 'anagram':
+        return anagram_keys(size, rnd)
+    return uniform_keys(size, rnd)
+
+
+# ---------------------------- MEASUREMENT --------------------------------- #
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """
+    This function returns the value at the given fraction of a sorted list,
+    using the nearest rank.
+
+    Takes 'sorted_values' (list), 'fraction' (float) as parameters.
+
+    Returns a float.
+    """
+
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def timed_calls(method, arguments: list, sample_every: int) -> dict:
+    """
+    This function calls 'method' once per argument tuple. Throughput comes
+    from the total wall time; latency is recorded for every
+    'sample_every'-th call so timing overhead stays small on large runs.
+
+    Takes 'method' (callable), 'arguments' (list of tuples),
+    'sample_every' (int) as parameters.
+
+    Returns a dictionary of measurements.
+    """
+
+    latencies = []
+    clock = time.perf_counter_ns
+    start = clock()
+    for i, args in enumerate(arguments):
+        if i % sample_every:
+            method(*args)
+        else:
+            before = clock()
+            method(*args)
+            latencies.append(clock() - before)
+    elapsed = (clock() - start) / 1e9
+
+    latencies.sort()
+    return {
+        'ops': len(arguments),
+        'seconds': elapsed,
+        'ops_per_sec': len(arguments) / elapsed if elapsed else None,
+        'p50_us': percentile(latencies, 0.50) / 1e3,
+        'p90_us': percentile(latencies, 0.90) / 1e3,
+        'p99_us': percentile(latencies, 0.99) / 1e3,
+        'max_us': (latencies[-1] if latencies else 0) / 1e3,
+    }
+
+
+def timed_once(method, *args) -> dict:
+    """
+    This function times a single call, for operations such as a resize.
+
+    Takes 'method' (callable) and its arguments as parameters.
+
+    Returns a dictionary of measurements.
+    """
+
+    start = time.perf_counter_ns()
+    method(*args)
+    elapsed = (time.perf_counter_ns() - start) / 1e9
+    return {'ops': 1, 'seconds': elapsed,
+            'ops_per_sec': 1 / elapsed if elapsed else None}
+
+
+def peak_build_memory(engine: str, function, capacity: int,
+                      keys: list) -> int:
+    """
+    This function builds a map with tracemalloc running and returns the
+    peak number of bytes allocated while doing so.
+
+    Takes 'engine' (str), 'function' (callable), 'capacity' (int),
+    'keys' (list) as parameters.
+
+    Returns an integer.
+    """
+
+    tracemalloc.start()
+    try:
+        m = ENGINES[engine](capacity, function)
+        for i, key in enumerate(keys):
+            m.put(key, i)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_case(engine: str, function_name: str, distribution: str, size: int,
+             load_factor: float, seed: int, sample_every: int,
+             memory: bool) -> list:
+    """
+    This function benchmarks one combination and returns its records. The
+    map starts with capacity size / load_factor, so the load factor is what
+    the table would reach without resizing.
+
+    Takes 'engine' (str), 'function_name' (str), 'distribution' (str),
+    'size' (int), 'load_factor' (float), 'seed' (int), 'sample_every' (int),
+    'memory' (bool) as parameters.
+
+    Returns a list of dictionaries.
+    """
+
+    rnd = random.Random(seed)
+    function = HASH_FUNCTIONS[function_name]
+    keys = make_keys(distribution, size, rnd)
+    lookups = lookup_sequence(keys, distribution, size, rnd)
+    misses = [key[::-1] + '#' for key in lookups]
+    capacity = max(1, int(size / load_factor))
+
+    m = ENGINES[engine](capacity, function)
+    results = {
+        'put': timed_calls(m.put, [(key, i) for i, key in enumerate(keys)],
+                           sample_every),
+        'get_hit': timed_calls(m.get, [(key,) for key in lookups],
+                               sample_every),
+        'get_miss': timed_calls(m.contains_key, [(key,) for key in misses],
+                                sample_every),
+        'iterate': timed_once(m.get_keys_and_values),
+        'resize': timed_once(m.resize_table, m.get_capacity() * 2),
+        'remove': timed_calls(m.remove, [(key,) for key in keys[::2]],
+                              sample_every),
+    }
+    if memory:
+        results['put']['peak_bytes'] = peak_build_memory(
+            engine, function, capacity, keys)
+
+    records = []
+    for operation, measurements in results.items():
+        record = {
+            'engine': engine,
+            'hash_function': function_name,
+            'distribution': distribution,
+            'size': size,
+            'load_factor': load_factor,
+            'seed': seed,
+            'operation': operation,
+        }
+        record.update(measurements)
+        records.append(record)
+    return records
+
+
+def run(engines: list, function_names: list, distributions: list,
+        sizes: list, load_factors: list, seed: int = 0, repeat: int = 1,
+        sample_every: int = 1, memory: bool = False, out=sys.stdout) -> None:
+    """
+    This function runs every combination and writes one JSON object per
+    measurement to 'out'. The first line describes the environment.
+
+    Takes the lists of engines, hash function names, distributions, sizes
+    and load factors, plus 'seed' (int), 'repeat' (int), 'sample_every'
+    (int), 'memory' (bool) and 'out' (file) as parameters.
+
+    Returns None.
+    """
+
+    out.write(json.dumps({
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }) + '\n')
+
+    for case in itertools.product(engines, function_names, distributions,
+                                  sizes, load_factors, range(repeat)):
+        engine, function_name, distribution, size, load_factor, run_index = case
+        for record in run_case(engine, function_name, distribution, size,
+                               load_factor, seed + run_index, sample_every,
+                               memory):
+            record['run'] = run_index
+            out.write(json.dumps(record) + '\n')
+        out.flush()
+
+
+def _csv(cast):
+    """
+    Helper that builds an argparse type for comma separated values.
+    """
+    return lambda text: [cast(item) for item in text.split(',') if item]
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark the HashMap engines, one JSON object per line.")
+    parser.add_argument('--engines', type=_csv(str), default=['sc', 'oa'],
+                        help='comma separated, from: ' + ','.join(ENGINES))
+    parser.add_argument('--hash-functions', type=_csv(str),
+                        default=['hash_function_1', 'hash_function_2'],
+                        help='comma separated, from: ' +
+                        ','.join(HASH_FUNCTIONS))
+    parser.add_argument('--distributions', type=_csv(str),
+                        default=['uniform', 'zipf', 'anagram'])
+    parser.add_argument('--sizes', type=_csv(int), default=[1000, 10000])
+    parser.add_argument('--load-factors', type=_csv(float), default=[0.5])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--sample-every', type=int, default=1,
+                        help='record latency for every Nth call only')
+    parser.add_argument('--memory', action='store_true',
+                        help='also measure peak memory of the put phase')
+    parser.add_argument('--output', help='file to write (default stdout)')
+    arguments = parser.parse_args()
+
+    for name in arguments.engines:
+        if name not in ENGINES:
+            parser.error(f"unknown engine {name!r}")
+    for name in arguments.hash_functions:
+        if name not in HASH_FUNCTIONS:
+            parser.error(f"unknown hash function {name!r}")
+    for name in arguments.distributions:
+        if name not in ('uniform', 'zipf', 'anagram'):
+            parser.error(f"unknown distribution {name!r}")
+
+    out = open(arguments.output, 'w') if arguments.output else sys.stdout
+    try:
+        run(arguments.engines, arguments.hash_functions,
+            arguments.distributions, arguments.sizes, arguments.load_factors,
+            arguments.seed, arguments.repeat, arguments.sample_every,
+            arguments.memory, out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
@@ -0,0 +1,278 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 (Portfolio)
+# Description: find_mode() for inputs that do not fit in a DynamicArray. The
+# values can come from any iterable or from a text file with one value per
+# line. They are read in fixed size chunks and counted with
+# HashMap.increment_many(), so each value is hashed once and only the
+# distinct values are kept in memory. The counting can also be split across
+# a process pool: every worker counts its own part of the input in its own
+# HashMap and the partial counts are merged at the end.
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from a6_include import DynamicArray
+from hash_map_sc import HashMap
+
+
+# Number of values counted per increment_many() call, and per task handed to
+# a worker process.
+CHUNK_SIZE = 65536
+
+
+def _chunks(values, chunk_size: int):
+    """
+    Helper that yields lists of at most 'chunk_size' values from an iterable.
+    """
+
+    iterator = iter(values)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def count_frequencies(values, chunk_size: int = CHUNK_SIZE,
+                      counts: HashMap = None) -> HashMap:
+    """
+    This function counts how many times each value occurs. The values are
+    consumed one chunk at a time, so the input itself is never held in
+    memory.
+
+    Takes 'values' (iterable of str), 'chunk_size' (int) and optionally
+    'counts' (HashMap) to add to as parameters.
+
+    Returns a HashMap of value -> frequency.
+    """
+
+    if counts is None:
+        counts = HashMap()
+    for chunk in _chunks(values, chunk_size):
+        counts.increment_many(chunk)
+    return counts
+
+
+def modes(counts: HashMap) -> (DynamicArray, int):
+    """
+    This function returns the values with the highest frequency in a map of
+    frequencies, in the same form as hash_map_sc.find_mode().
+
+    Takes 'counts' (HashMap) as a parameter.
+
+    Returns a tuple containing a dynamic array comprised of mode, then
+    frequency.
+    """
+
+    items = counts.get_keys_and_values()
+
+    # Find the highest frequency first, then collect every value that has it.
+    highest_freq_seen = 0
+    for i in range(items.length()):
+        if items[i][1] > highest_freq_seen:
+            highest_freq_seen = items[i][1]
+
+    new_da = DynamicArray()
+    for i in range(items.length()):
+        if items[i][1] == highest_freq_seen:
+            new_da.append(items[i][0])
+    return new_da, highest_freq_seen
+
+
+def find_mode_stream(values, chunk_size: int = CHUNK_SIZE) \
+        -> (DynamicArray, int):
+    """
+    This function returns the mode(s) and highest frequency of any iterable
+    of values, such as a generator or an open file, in a single process.
+
+    Takes 'values' (iterable of str), 'chunk_size' (int) as parameters.
+
+    Returns a tuple containing a dynamic array comprised of mode, then
+    frequency.
+    """
+
+    return modes(count_frequencies(values, chunk_size))
+
+
+def read_lines(file):
+    """
+    This function yields the lines of a text file without their line
+    endings, one value per line.
+
+    Takes 'file' (text file object) as a parameter.
+
+    Returns a generator of str.
+    """
+
+    for line in file:
+        yield line.rstrip('\r\n')
+
+
+# --------------------------- PARALLEL COUNTING ---------------------------- #
+
+def _partial_counts(counts: HashMap) -> list:
+    """
+    Helper that turns a worker's map into a plain list of (value, frequency)
+    pairs, which is much cheaper to send back to the parent than the map.
+    """
+
+    items = counts.get_keys_and_values()
+    return [items[i] for i in range(items.length())]
+
+
+def _merge(counts: HashMap, partial: list) -> None:
+    """
+    Helper that adds a worker's (value, frequency) pairs to the totals.
+    """
+
+    for key, frequency in partial:
+        counts.increment(key, frequency)
+
+
+def _count_chunk(chunk: list) -> list:
+    """
+    Helper run in a worker process that counts one chunk of values.
+    """
+
+    counts = HashMap()
+    counts.increment_many(chunk)
+    return _partial_counts(counts)
+
+
+def _count_byte_range(path: str, start: int, end: int, encoding: str,
+                      chunk_size: int) -> list:
+    """
+    Helper run in a worker process that counts the lines starting in the
+    byte range [start, end) of a file. 'start' is always the start of a line.
+    """
+
+    def lines():
+        position = start
+        with open(path, 'rb') as file:
+            file.seek(start)
+            for line in file:
+                if position >= end:
+                    return
+                position += len(line)
+                yield line.decode(encoding).rstrip('\r\n')
+
+    return _partial_counts(count_frequencies(lines(), chunk_size))
+
+
+def _byte_ranges(path: str, parts: int) -> list:
+    """
+    Helper that splits a file into at most 'parts' byte ranges of about the
+    same size, each one starting at the beginning of a line.
+    """
+
+    size = os.path.getsize(path)
+    boundaries = [0]
+    with open(path, 'rb') as file:
+        for i in range(1, parts):
+            # Move each boundary forward to just after the next line ending.
+            file.seek(max(size * i // parts - 1, boundaries[-1]))
+            file.readline()
+            position = file.tell()
+            if position >= size:
+                break
+            if position > boundaries[-1]:
+                boundaries.append(position)
+    boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def find_mode_file(path: str, workers: int = None, encoding: str = 'utf-8',
+                   chunk_size: int = CHUNK_SIZE) -> (DynamicArray, int):
+    """
+    This function returns the mode(s) and highest frequency of the lines of
+    a text file. The file is split into one byte range per worker process;
+    each worker reads and counts only its own range.
+
+    Takes 'path' (str), 'workers' (int, defaults to the number of CPUs),
+    'encoding' (str), 'chunk_size' (int) as parameters.
+
+    Returns a tuple containing a dynamic array comprised of mode, then
+    frequency.
+    """
+
+    workers = workers or os.cpu_count() or 1
+    ranges = _byte_ranges(path, workers)
+
+    counts = HashMap()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_count_byte_range, path, start, end,
+                                   encoding, chunk_size)
+                   for start, end in ranges]
+        for future in futures:
+            _merge(counts, future.result())
+    return modes(counts)
+
+
+def find_mode_parallel(values, workers: int = None,
+                       chunk_size: int = CHUNK_SIZE) -> (DynamicArray, int):
+    """
+    This function returns the mode(s) and highest frequency of any iterable
+    of values, counting chunks of it in a process pool. At most two chunks
+    per worker are in flight at a time, so the input is still streamed.
+
+    Takes 'values' (iterable of str), 'workers' (int, defaults to the number
+    of CPUs), 'chunk_size' (int) as parameters.
+
+    Returns a tuple containing a dynamic array comprised of mode, then
+    frequency.
+    """
+
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = 2 * workers
+
+    counts = HashMap()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = []
+        for chunk in _chunks(values, chunk_size):
+            if len(in_flight) == max_in_flight:
+                _merge(counts, in_flight.pop(0).result())
+            in_flight.append(executor.submit(_count_chunk, chunk))
+        for future in in_flight:
+            _merge(counts, future.result())
+    return modes(counts)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    import tempfile
+
+    print("\nfind_mode_stream example 1")
+    print("--------------------------")
+    test_cases = (
+        ["Arch", "Manjaro", "Manjaro", "Mint", "Mint", "Mint", "Ubuntu",
+         "Ubuntu", "Ubuntu", "Ubuntu"],
+        ["one", "two", "three", "four", "five"],
+        ["2", "4", "2", "6", "8", "4", "1", "3", "4", "5", "7", "3", "3", "2"]
+    )
+
+    for case in test_cases:
+        mode, frequency = find_mode_stream(iter(case), chunk_size=3)
+        print(f"Input: {case}\nMode: {mode}, Frequency: {frequency}\n")
+
+    print("\nfind_mode_parallel example 1")
+    print("----------------------------")
+    values = (str(i % 7 * i % 11) for i in range(10000))
+    mode, frequency = find_mode_parallel(values, workers=2, chunk_size=1000)
+    print(f"Mode: {mode}, Frequency: {frequency}")
+
+    print("\nfind_mode_file example 1")
+    print("------------------------")
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+        for i in range(10000):
+            f.write(f"event-{i % 7 * i % 11}\n")
+    try:
+        mode, frequency = find_mode_file(f.name, workers=3)
+        print(f"Mode: {mode}, Frequency: {frequency}")
+        with open(f.name) as file:
+            mode, frequency = find_mode_stream(read_lines(file))
+        print(f"Mode: {mode}, Frequency: {frequency}")
+    finally:
+        os.remove(f.name)
@@ -0,0 +1,415 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 (Portfolio)
+# Description: Frequency analysis built on the HashMap, for streams where
+# find_mode() is not enough. top_k() counts every distinct value exactly and
+# returns the k most frequent ones. For streams with too many distinct values
+# to count exactly, SpaceSaving keeps a fixed number of counters and finds
+# the heavy hitters with a known bound on the over-count, and
+# CountMinSketch estimates the frequency of any value in a fixed amount of
+# memory, with an error bound chosen when it is created.
+
+import heapq
+import math
+import secrets
+from array import array
+
+from a6_include import DynamicArray
+from find_mode_stream import CHUNK_SIZE, count_frequencies
+from hash_engine import hash_keys, mix_hash, seeded_hash_function
+from hash_functions import xxhash_64
+from hash_map_sc import HashMap
+
+
+def top_k(values, k: int, chunk_size: int = CHUNK_SIZE) -> DynamicArray:
+    """
+    This function counts every value exactly and returns the k most frequent
+    ones, most frequent first. Memory grows with the number of distinct
+    values.
+
+    Takes 'values' (iterable of str), 'k' (int), 'chunk_size' (int) as
+    parameters.
+
+    Returns a dynamic array of (value, frequency) tuples.
+    """
+
+    items = count_frequencies(values, chunk_size).get_keys_and_values()
+    pairs = (items[i] for i in range(items.length()))
+    return DynamicArray(heapq.nlargest(k, pairs, key=lambda pair: pair[1]))
+
+
+# ----------------------------- SPACE-SAVING ------------------------------- #
+
+class _Counter:
+    """
+    One Space-Saving counter: the value it currently tracks, its count, the
+    most the count may exceed the true frequency by, and its position in the
+    heap of counters.
+    """
+
+    def __init__(self, key: str, position: int) -> None:
+        self.key = key
+        self.count = 0
+        self.error = 0
+        self.position = position
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy hitters summary (Metwally, Agrawal and El Abbadi).
+    It keeps at most 'counters' values. A value that is not tracked when the
+    summary is full replaces the value with the smallest count and inherits
+    that count as its error. After N values, every count is an over-estimate
+    by at most N / counters, and every value occurring more than
+    N / counters times is tracked.
+    """
+
+    def __init__(self, counters: int) -> None:
+        """
+        Initialize a new summary with room for 'counters' values.
+        """
+        self._size = max(1, counters)
+        self._counters = HashMap(self._size, xxhash_64)
+        self._heap = []  # Min-heap of _Counter by count.
+        self._total = 0
+
+    @classmethod
+    def from_error(cls, epsilon: float) -> "SpaceSaving":
+        """
+        This method creates a summary whose counts over-estimate by at most
+        epsilon * N after N values.
+
+        Takes 'epsilon' (float) as a parameter.
+
+        Returns a SpaceSaving.
+        """
+        return cls(math.ceil(1 / epsilon))
+
+    def add(self, value: str, count: int = 1) -> None:
+        """
+        This method records 'count' more occurrences of the value.
+
+        Takes 'value' (str), 'count' (int) as parameters.
+
+        Returns None.
+        """
+
+        counter = self._counters.get(value)
+        if counter is None and len(self._heap) < self._size:
+            # A new counter goes at the end of the heap and moves up.
+            counter = _Counter(value, len(self._heap))
+            counter.count = count
+            self._heap.append(counter)
+            self._counters.put(value, counter)
+            self._sift_up(counter.position)
+        else:
+            if counter is None:
+                # Take over the counter with the smallest count.
+                counter = self._heap[0]
+                self._counters.remove(counter.key)
+                counter.key = value
+                counter.error = counter.count
+                self._counters.put(value, counter)
+            counter.count += count
+            self._sift_down(counter.position)
+
+        self._total += count
+
+    def add_many(self, values) -> None:
+        """
+        This method records one occurrence of each of the given values.
+
+        Takes 'values' (iterable of str) as a parameter.
+
+        Returns None.
+        """
+        for value in values:
+            self.add(value)
+
+    def _sift_up(self, position: int) -> None:
+        """
+        Helper that moves a new counter up the heap until its parent has a
+        smaller or equal count.
+        """
+
+        heap = self._heap
+        counter = heap[position]
+        while position > 0:
+            parent = (position - 1) // 2
+            if heap[parent].count <= counter.count:
+                break
+            heap[position] = heap[parent]
+            heap[position].position = position
+            position = parent
+        heap[position] = counter
+        counter.position = position
+
+    def _sift_down(self, position: int) -> None:
+        """
+        Helper that moves a counter whose count grew down the heap until both
+        of its children have larger or equal counts.
+        """
+
+        heap = self._heap
+        counter = heap[position]
+        while True:
+            child = 2 * position + 1
+            if child >= len(heap):
+                break
+            if child + 1 < len(heap) and \
+                    heap[child + 1].count < heap[child].count:
+                child += 1
+            if heap[child].count >= counter.count:
+                break
+            heap[position] = heap[child]
+            heap[position].position = position
+            position = child
+        heap[position] = counter
+        counter.position = position
+
+    def estimate(self, value: str) -> int:
+        """
+        This method returns an upper bound on the frequency of the value. For
+        a value that is not tracked this is the smallest count (0 while the
+        summary is not full).
+
+        Takes 'value' (str) as a parameter.
+
+        Returns an integer.
+        """
+
+        counter = self._counters.get(value)
+        if counter is not None:
+            return counter.count
+        if len(self._heap) < self._size:
+            return 0
+        return self._heap[0].count
+
+    def top(self, k: int) -> DynamicArray:
+        """
+        This method returns the k tracked values with the highest counts,
+        highest first. A value's true frequency lies between count - error
+        and count.
+
+        Takes 'k' (int) as a parameter.
+
+        Returns a dynamic array of (value, count, error) tuples.
+        """
+
+        counters = heapq.nlargest(k, self._heap, key=lambda c: c.count)
+        return DynamicArray([(c.key, c.count, c.error) for c in counters])
+
+    def get_total(self) -> int:
+        """
+        This method returns the number of occurrences recorded so far.
+
+        Takes no parameters.
+
+        Returns an integer.
+        """
+        return self._total
+
+    def get_error_bound(self) -> float:
+        """
+        This method returns the most any count can currently exceed the true
+        frequency by, total / counters.
+
+        Takes no parameters.
+
+        Returns a float.
+        """
+        return self._total / self._size
+
+
+def approximate_top_k(values, k: int, epsilon: float = 0.001) -> DynamicArray:
+    """
+    This function returns the k most frequent values of a stream using a
+    Space-Saving summary with ceil(1 / epsilon) counters, so memory does not
+    depend on the number of distinct values.
+
+    Takes 'values' (iterable of str), 'k' (int), 'epsilon' (float) as
+    parameters.
+
+    Returns a dynamic array of (value, count, error) tuples.
+    """
+
+    summary = SpaceSaving.from_error(epsilon)
+    summary.add_many(values)
+    return summary.top(k)
+
+
+# --------------------------- COUNT-MIN SKETCH ----------------------------- #
+
+class CountMinSketch:
+    """
+    Count-Min sketch (Cormode and Muthukrishnan): 'depth' rows of 'width'
+    counters, each row indexed by its own seeded 64-bit hash of the value.
+    The estimate is the smallest of the value's counters, so it never
+    under-counts. With width = ceil(e / epsilon) and
+    depth = ceil(ln(1 / delta)), it over-counts by more than epsilon * N
+    with probability at most delta.
+
+    The bound needs hashes that spread distinct values evenly over a row.
+    hash_function_1 and hash_function_2 take only a few thousand distinct
+    values on typical keys, so many values would share all their counters;
+    they are not suitable here.
+    """
+
+    def __init__(self, width: int, depth: int,
+                 function: callable = xxhash_64, seed: int = None) -> None:
+        """
+        Initialize a new sketch with 'depth' rows of 'width' counters. Each
+        row hashes with the seedable 'function' under a seed of its own,
+        derived from 'seed' (a random one if not given). Sketches can only
+        be merged if they were created with the same function and seed.
+        """
+        self._width = max(1, width)
+        self._depth = max(1, depth)
+        if seed is None:
+            seed = secrets.randbits(64)
+        self._seed = seed
+        self._hash_function = function
+        self._row_functions = [seeded_hash_function(function,
+                                                    mix_hash(seed + row))
+                               for row in range(self._depth)]
+        self._rows = [array('q', bytes(8 * self._width))
+                      for _ in range(self._depth)]
+        self._total = 0
+
+    @classmethod
+    def from_error(cls, epsilon: float, delta: float = 0.01,
+                   function: callable = xxhash_64,
+                   seed: int = None) -> "CountMinSketch":
+        """
+        This method creates a sketch whose estimates exceed the true
+        frequency by more than epsilon * N with probability at most delta.
+
+        Takes 'epsilon' (float), 'delta' (float) and optionally the hash
+        function and seed as parameters.
+
+        Returns a CountMinSketch.
+        """
+        return cls(math.ceil(math.e / epsilon),
+                   math.ceil(math.log(1 / delta)), function, seed)
+
+    def _value_indexes(self, value: str) -> list:
+        """
+        Helper that hashes the value and returns its index in every row.
+        """
+        return [function(value) % self._width
+                for function in self._row_functions]
+
+    def add(self, value: str, count: int = 1) -> None:
+        """
+        This method records 'count' more occurrences of the value.
+
+        Takes 'value' (str), 'count' (int) as parameters.
+
+        Returns None.
+        """
+        for row, index in zip(self._rows, self._value_indexes(value)):
+            row[index] += count
+        self._total += count
+
+    def add_many(self, values, chunk_size: int = CHUNK_SIZE) -> None:
+        """
+        This method records one occurrence of each of the given values,
+        hashing them in batches of 'chunk_size'.
+
+        Takes 'values' (iterable of str), 'chunk_size' (int) as parameters.
+
+        Returns None.
+        """
+
+        values = iter(values)
+        while True:
+            chunk = [value for _, value in zip(range(chunk_size), values)]
+            if not chunk:
+                return
+            for row, function in zip(self._rows, self._row_functions):
+                for hash_value in hash_keys(chunk, function):
+                    row[hash_value % self._width] += 1
+            self._total += len(chunk)
+
+    def estimate(self, value: str) -> int:
+        """
+        This method returns the estimated frequency of the value, which is
+        never lower than the true frequency.
+
+        Takes 'value' (str) as a parameter.
+
+        Returns an integer.
+        """
+        return min(row[index] for row, index in
+                   zip(self._rows, self._value_indexes(value)))
+
+    def merge(self, other: "CountMinSketch") -> None:
+        """
+        This method adds the counts of another sketch with the same width,
+        depth, hash function and seed, such as one built by another worker.
+
+        Takes 'other' (CountMinSketch) as a parameter.
+
+        Returns None.
+        """
+
+        if (self._width, self._depth, self._hash_function, self._seed) != \
+                (other._width, other._depth, other._hash_function,
+                 other._seed):
+            raise ValueError("sketches must have the same width, depth, "
+                             "hash function and seed")
+        for row, other_row in zip(self._rows, other._rows):
+            for i in range(self._width):
+                row[i] += other_row[i]
+        self._total += other._total
+
+    def get_total(self) -> int:
+        """
+        This method returns the number of occurrences recorded so far.
+
+        Takes no parameters.
+
+        Returns an integer.
+        """
+        return self._total
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    import random
+
+    rnd = random.Random(0)
+    stream = [f"user{min(int(rnd.paretovariate(1.2)), 5000)}"
+              for _ in range(50000)]
+
+    print("\ntop_k example 1")
+    print("---------------")
+    print(top_k(stream, 5))
+
+    print("\nSpaceSaving example 1")
+    print("---------------------")
+    summary = SpaceSaving.from_error(0.01)
+    summary.add_many(stream)
+    print(summary.top(5))
+    print(summary.get_total(), summary.get_error_bound(),
+          summary.estimate('user1'), summary.estimate('nobody'))
+
+    print("\nCountMinSketch example 1")
+    print("------------------------")
+    sketch = CountMinSketch.from_error(0.001, 0.01)
+    sketch.add_many(stream)
+    for value in ('user1', 'user2', 'user10', 'nobody'):
+        print(value, sketch.estimate(value), stream.count(value))
+
+    print("\nCountMinSketch example 2 - many distinct values")
+    print("-----------------------------------------------")
+    stream = [f"user{rnd.randrange(50000)}" for _ in range(100000)]
+    sketch = CountMinSketch.from_error(0.0001, 0.01)
+    sketch.add_many(stream)
+    counts = count_frequencies(stream).get_keys_and_values()
+    over = sum(sketch.estimate(value) - frequency > 0.0001 * len(stream)
+               for value, frequency in (counts[i]
+                                        for i in range(counts.length())))
+    print(counts.length(), over / counts.length())
+    assert over / counts.length() <= 0.01
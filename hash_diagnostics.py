@@ -0,0 +1,155 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 (Portfolio)
+# Description: Reports how evenly a hash function spreads a sample of keys
+# over the buckets of a table, to choose a hash function for a key set
+# before it causes long chains. For each function it reports the number of
+# distinct hash values, empty buckets, the longest chain, the average number
+# of keys compared by a successful lookup with separate chaining, and a
+# normalized chi-squared statistic, which is close to 1 when the keys are
+# spread as evenly as random placement would spread them and much larger
+# when they cluster.
+#
+# Example:
+#   python hash_diagnostics.py --keys keys.txt --capacity 10007 \
+#       --hash-functions hash_function_1,fnv1a_64,xxhash_64
+
+import argparse
+import heapq
+
+from hash_engine import (HASH_FUNCTIONS, hash_function_name, hash_keys,
+                         next_prime)
+
+
+def bucket_distribution(keys: list, function, capacity: int = None,
+                        hottest: int = 5) -> dict:
+    """
+    This function hashes the keys into 'capacity' buckets (by default the
+    prime capacity the maps would pick for the number of keys, a load
+    factor of about 1) and returns statistics about how they are spread.
+
+    Takes 'keys' (list of str), 'function' (callable or str), 'capacity'
+    (int), 'hottest' (int) as parameters.
+
+    Returns a dict with the hash function name, keys, capacity,
+    distinct_hashes, empty_buckets, longest_chain, average_probes (keys
+    compared by a successful lookup, on average), chi_squared (normalized,
+    1 for random placement) and hottest_buckets (a list of the 'hottest'
+    fullest (bucket, keys) pairs).
+    """
+
+    capacity = capacity or next_prime(len(keys))
+    hash_values = hash_keys(keys, function)
+
+    counts = [0] * capacity
+    for hash_value in hash_values:
+        counts[hash_value % capacity] += 1
+
+    size = len(keys)
+    expected = size / capacity
+
+    # A successful lookup of the i-th key of a chain compares i keys.
+    probes = sum(count * (count + 1) // 2 for count in counts)
+    chi_squared = 0.0
+    if size and capacity > 1:
+        chi_squared = sum((count - expected) ** 2 for count in counts) / \
+            expected / (capacity - 1)
+
+    return {
+        'hash_function': hash_function_name(function),
+        'keys': size,
+        'capacity': capacity,
+        'distinct_hashes': len(set(hash_values)),
+        'empty_buckets': counts.count(0),
+        'longest_chain': max(counts, default=0),
+        'average_probes': probes / size if size else 0.0,
+        'chi_squared': chi_squared,
+        'hottest_buckets': heapq.nlargest(hottest, enumerate(counts),
+                                          key=lambda pair: pair[1]),
+    }
+
+
+def compare(keys: list, functions: list = None,
+            capacity: int = None) -> list:
+    """
+    This function returns bucket_distribution() of the keys for each of the
+    given hash functions (every registered one by default), best spread
+    (lowest chi-squared) first.
+
+    Takes 'keys' (list of str), 'functions' (list of callables or str),
+    'capacity' (int) as parameters.
+
+    Returns a list of dicts.
+    """
+
+    functions = functions or list(HASH_FUNCTIONS)
+    reports = [bucket_distribution(keys, function, capacity)
+               for function in functions]
+    return sorted(reports, key=lambda report: report['chi_squared'])
+
+
+def format_report(reports: list) -> str:
+    """
+    This function formats the reports of compare() as a table, one row per
+    hash function.
+
+    Takes 'reports' (list of dicts) as a parameter.
+
+    Returns a str.
+    """
+
+    columns = ('hash_function', 'keys', 'capacity', 'distinct_hashes',
+               'empty_buckets', 'longest_chain', 'average_probes',
+               'chi_squared')
+    rows = [columns]
+    for report in reports:
+        rows.append(tuple(f"{report[column]:.2f}"
+                          if isinstance(report[column], float)
+                          else str(report[column]) for column in columns))
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    return '\n'.join('  '.join(cell.rjust(width) if i else cell.ljust(width)
+                               for i, (cell, width)
+                               in enumerate(zip(row, widths)))
+                     for row in rows)
+
+
+def _csv(text: str) -> list:
+    """
+    Helper that splits a comma separated argument.
+    """
+    return [item for item in text.split(',') if item]
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Report how evenly hash functions spread a key sample.")
+    parser.add_argument('--keys',
+                        help='file with one key per line (default: a sample '
+                             'of keys that share a long prefix)')
+    parser.add_argument('--capacity', type=int,
+                        help='number of buckets (default: a prime at least '
+                             'the number of keys)')
+    parser.add_argument('--hash-functions', type=_csv,
+                        default=list(HASH_FUNCTIONS),
+                        help='comma separated, from: ' +
+                        ','.join(HASH_FUNCTIONS))
+    parser.add_argument('--hottest', action='store_true',
+                        help='also list the fullest buckets')
+    arguments = parser.parse_args()
+
+    for name in arguments.hash_functions:
+        if name not in HASH_FUNCTIONS:
+            parser.error(f"unknown hash function {name!r}")
+
+    if arguments.keys:
+        with open(arguments.keys, encoding='utf-8') as file:
+            sample = [line.rstrip('\r\n') for line in file]
+    else:
+        sample = [f"tenant-0042/orders/2023/region-eu-west/{i:08d}"
+                  for i in range(20000)]
+
+    results = compare(sample, arguments.hash_functions, arguments.capacity)
+    print(format_report(results))
+    if arguments.hottest:
+        for result in results:
+            print(f"{result['hash_function']}: {result['hottest_buckets']}")
@@ -0,0 +1,520 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 (Portfolio)
+# Description: Batch and per-key fast paths for the sample hash functions
+# provided in a6_include.py. Every function here produces results that are
+# bit-identical to hash_function_1 / hash_function_2, so the fast paths can be
+# swapped in anywhere the original functions are used. When NumPy is
+# installed, whole sequences of keys are hashed at once over a UTF-32 code
+# point buffer; otherwise a pure Python bulk path is used.
+#
+# It also keeps the registry of hash functions by name. Anywhere a map takes
+# a hash function, the name of a registered one can be given instead, such
+# as HashMap(11, 'xxhash_64').
+
+import bisect
+import functools
+import hashlib
+import secrets
+from operator import mul
+
+from a6_include import hash_function_1, hash_function_2
+from hash_functions import fnv1a_64, siphash_24, xxhash_64
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, the pure Python path is used instead.
+    np = None
+
+
+# Longest key (in characters) that is hashed with the NumPy path. Above this,
+# hash_function_2 could overflow a signed 64-bit accumulator, so such keys
+# fall back to the per-key path which uses Python's unbounded integers.
+NUMPY_MAX_KEY_LENGTH = 2 ** 20
+
+
+def fast_hash_function_1(key: str) -> int:
+    """
+    This function returns the same value as hash_function_1 (the sum of the
+    code points of the key) without a Python level loop.
+
+    Takes 'key' (str) as a parameter.
+
+    Returns an integer.
+    """
+
+    return sum(map(ord, key))
+
+
+def fast_hash_function_2(key: str) -> int:
+    """
+    This function returns the same value as hash_function_2 (the sum of each
+    code point weighted by its 1-based position) without a Python level loop.
+
+    Takes 'key' (str) as a parameter.
+
+    Returns an integer.
+    """
+
+    return sum(map(mul, range(1, len(key) + 1), map(ord, key)))
+
+
+MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+
+def mix_hash(hash_value: int) -> int:
+    """
+    This function spreads the bits of a hash value over all 64 bits with the
+    MurmurHash3 finalizer. The provided hash functions produce small
+    integers, so engines that take an index and other information from
+    different bits of the hash mix it first.
+
+    Takes 'hash_value' (int) as a parameter.
+
+    Returns an integer in [0, 2 ** 64).
+    """
+
+    hash_value &= MASK_64
+    hash_value ^= hash_value >> 33
+    hash_value = (hash_value * 0xFF51AFD7ED558CCD) & MASK_64
+    hash_value ^= hash_value >> 33
+    hash_value = (hash_value * 0xC4CEB9FE1A85EC53) & MASK_64
+    hash_value ^= hash_value >> 33
+    return hash_value
+
+
+# Per-key fast paths for the hash functions that have one.
+_FAST_PATHS = {
+    hash_function_1: fast_hash_function_1,
+    hash_function_2: fast_hash_function_2,
+}
+
+
+# Hash functions by name. The maps accept these names in place of a
+# function, and files written by the maps record them, so a table can be
+# read back with the function it was written with.
+HASH_FUNCTIONS = {}
+
+
+def register_hash_function(name: str, function: callable) -> None:
+    """
+    This function makes a hash function available by name. The name must be
+    the function's __name__, which is what files written by the maps record.
+
+    Takes 'name' (str), 'function' (callable) as parameters.
+
+    Returns None.
+    """
+
+    if getattr(function, '__name__', None) != name:
+        raise ValueError(f"{function!r} must be registered as its __name__")
+    HASH_FUNCTIONS[name] = function
+
+    # A name resolves straight to the function's fast path.
+    _FAST_PATHS[name] = _FAST_PATHS.get(function, function)
+
+
+for _function in (hash_function_1, hash_function_2, fnv1a_64, xxhash_64,
+                  siphash_24):
+    register_hash_function(_function.__name__, _function)
+
+
+def hash_function_by_name(name: str) -> callable:
+    """
+    This function returns the hash function registered under the given
+    name.
+
+    Takes 'name' (str) as a parameter.
+
+    Returns a callable. Raises ValueError if the name is not known, or if it
+    names a seeded function, whose seed cannot be recovered from its name.
+    """
+
+    # 'hash_function_1+mix' names a mixed function, see
+    # mixed_hash_function().
+    if name.endswith('+mix'):
+        return mixed_hash_function(hash_function_by_name(name[:-4]))
+
+    # 'siphash_24@0123456789abcdef' names a seeded function, see
+    # seeded_hash_function().
+    base_name, _, key_id = name.partition('@')
+    if base_name not in HASH_FUNCTIONS:
+        raise ValueError(f"unknown hash function {name!r}")
+    if key_id:
+        raise ValueError(f"{name!r} is a seeded hash function and its seed "
+                         f"is not stored, pass the seeded function itself")
+    return HASH_FUNCTIONS[name]
+
+
+# Hash functions that take a seed as their second argument.
+SEEDABLE = (siphash_24, xxhash_64)
+
+
+def is_seedable(function) -> bool:
+    """
+    This function returns True if seeded_hash_function() accepts the given
+    hash function or registered name.
+
+    Takes 'function' (callable or str) as a parameter.
+
+    Returns bool.
+    """
+
+    if isinstance(function, str):
+        function = hash_function_by_name(function)
+    return getattr(function, 'func', function) in SEEDABLE
+
+
+def seeded_hash_function(function=siphash_24, seed: int = None) -> callable:
+    """
+    This function returns the given seedable hash function (siphash_24 or
+    xxhash_64, or a seeded version of one) bound to a seed, a random 128-bit
+    one if it is not given. siphash_24 uses all 128 bits as its key,
+    xxhash_64 only the low 64. Its name carries a key id, 16 hex digits of a
+    one-way digest of the seed, such as 'siphash_24@3f0c9a7d5e21b486', and
+    never the seed itself: the name is written into files, and anyone who
+    knew the seed could choose keys that collide. A file written with a
+    seeded function can only be read back by passing the same seeded
+    function, which the key id checks. Only siphash_24 keeps its values
+    unpredictable to someone who does not know the seed.
+
+    Takes 'function' (callable or str), 'seed' (int) as parameters.
+
+    Returns a callable.
+    """
+
+    if not is_seedable(function):
+        raise ValueError(f"{hash_function_name(function)} takes no seed")
+    if isinstance(function, str):
+        function = hash_function_by_name(function)
+    function = getattr(function, 'func', function)  # Unwrap a seeded one.
+
+    if seed is None:
+        seed = secrets.randbits(128)
+    seeded = functools.partial(function, seed=seed)
+    key_id = hashlib.blake2b(str(seed).encode(), digest_size=8,
+                             person=b'a6 key id').hexdigest()
+    seeded.__name__ = f"{function.__name__}@{key_id}"
+    return seeded
+
+
+# Mixed versions of hash functions, by the function they mix and the other
+# way around, so each function has a single mixed version.
+_MIXED = {}
+_MIXED_BASES = {}
+
+
+def mixed_hash_function(function) -> callable:
+    """
+    This function returns a hash function whose values are those of the
+    given one run through mix_hash(), so that the low bits of the value
+    depend on every bit of the original. Maps that index with the low bits
+    of the hash alone need this. siphash_24 and xxhash_64 (seeded or not)
+    already end with a full mixing step and are returned as they are, as is
+    a function that is already mixed. Its name is the original's with
+    '+mix' appended.
+
+    Takes 'function' (callable or str) as a parameter.
+
+    Returns a callable.
+    """
+
+    if isinstance(function, str):
+        function = hash_function_by_name(function)
+    if function in _MIXED_BASES or \
+            getattr(function, 'func', function) in SEEDABLE:
+        return function
+
+    if function not in _MIXED:
+        base_path = fast_path(function)
+
+        def mixed(key: str) -> int:
+            return mix_hash(base_path(key))
+
+        mixed.__name__ = hash_function_name(function) + '+mix'
+        _MIXED[function] = mixed
+        _MIXED_BASES[mixed] = function
+    return _MIXED[function]
+
+
+def hash_function_name(function) -> str:
+    """
+    This function returns the name recorded for a hash function given as a
+    function or as a registered name.
+
+    Takes 'function' (callable or str) as a parameter.
+
+    Returns a str.
+    """
+
+    if isinstance(function, str):
+        return hash_function_by_name(function).__name__
+    return function.__name__
+
+
+def fast_path(function) -> callable:
+    """
+    This function returns the per-key fast path for the given hash function
+    or registered name, or the function itself if no fast path is known for
+    it.
+
+    Takes 'function' (callable or str) as a parameter.
+
+    Returns a callable.
+    """
+
+    path = _FAST_PATHS.get(function)
+    if path is not None:
+        return path
+    if isinstance(function, str):
+        # Raises for unknown names. Seeded names are resolved only once.
+        path = hash_function_by_name(function)
+        _FAST_PATHS[function] = path
+        return path
+    return function
+
+
+def hash_key(the_map, key: str) -> int:
+    """
+    This function hashes the key with the map's hash function, using the
+    per-key fast path when one exists. The separate chaining, open
+    addressing and concurrent maps share it as their _hash() method.
+
+    Takes 'the_map' (HashMap), 'key' (str) as parameters.
+
+    Returns an integer.
+    """
+    return fast_path(the_map._hash_function)(key)
+
+
+def _same_value(value: object) -> object:
+    """
+    Helper that returns the value as it is.
+    """
+    return value
+
+
+# Upsert function that keeps the value as it is, so get_or_insert() of the
+# maps is an upsert with it.
+UNCHANGED = _same_value
+
+
+def _code_points(keys: list):
+    """
+    Helper that packs every key into one UTF-32 code point buffer. Returns
+    the buffer, the start offset of each key and the length of each key.
+    """
+
+    lengths = np.fromiter(map(len, keys), dtype=np.int64, count=len(keys))
+    encoded = ''.join(keys).encode('utf-32-le', 'surrogatepass')
+    buffer = np.frombuffer(encoded, dtype='<u4')
+    starts = np.zeros(len(keys), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=starts[1:])
+    return buffer.astype(np.int64), starts, lengths
+
+
+def _segment_sums(values, starts, lengths) -> list:
+    """
+    Helper that sums 'values' over each key's segment of the buffer. Empty
+    keys hash to 0, matching the original functions.
+    """
+
+    sums = np.zeros(len(lengths), dtype=np.int64)
+    non_empty = lengths > 0
+    if values.size:
+        sums[non_empty] = np.add.reduceat(values, starts[non_empty])
+    return sums.tolist()
+
+
+def _numpy_ready(keys: list) -> bool:
+    """
+    Helper that decides whether a batch of keys can use the NumPy path.
+    """
+
+    if np is None or not keys:
+        return False
+    return max(map(len, keys)) <= NUMPY_MAX_KEY_LENGTH
+
+
+def hash_keys_1(keys) -> list:
+    """
+    This function hashes a whole sequence of string keys with
+    hash_function_1 at once.
+
+    Takes 'keys' (iterable of str) as a parameter.
+
+    Returns a list of integers, one per key, in the same order.
+    """
+
+    keys = list(keys)
+    if not _numpy_ready(keys):
+        return list(map(fast_hash_function_1, keys))
+
+    buffer, starts, lengths = _code_points(keys)
+    return _segment_sums(buffer, starts, lengths)
+
+
+def hash_keys_2(keys) -> list:
+    """
+    This function hashes a whole sequence of string keys with
+    hash_function_2 at once.
+
+    Takes 'keys' (iterable of str) as a parameter.
+
+    Returns a list of integers, one per key, in the same order.
+    """
+
+    keys = list(keys)
+    if not _numpy_ready(keys):
+        return list(map(fast_hash_function_2, keys))
+
+    buffer, starts, lengths = _code_points(keys)
+
+    # 1-based position of every code point within its own key.
+    positions = np.arange(1, buffer.size + 1, dtype=np.int64)
+    positions -= np.repeat(starts, lengths)
+    return _segment_sums(buffer * positions, starts, lengths)
+
+
+# Batch paths for the hash functions that have one.
+_BATCH_PATHS = {
+    hash_function_1: hash_keys_1,
+    hash_function_2: hash_keys_2,
+    fast_hash_function_1: hash_keys_1,
+    fast_hash_function_2: hash_keys_2,
+    'hash_function_1': hash_keys_1,
+    'hash_function_2': hash_keys_2,
+}
+
+
+def hash_keys(keys, function: callable) -> list:
+    """
+    This function hashes a whole sequence of keys with the given hash
+    function, using the batch path when one exists for it.
+
+    Takes 'keys' (iterable), 'function' (callable or str) as parameters.
+
+    Returns a list of integers, one per key, in the same order.
+    """
+
+    batch = _BATCH_PATHS.get(function)
+    if batch is not None:
+        return batch(keys)
+    base = _MIXED_BASES.get(function)
+    if base is not None:
+        return list(map(mix_hash, hash_keys(keys, base)))
+    return list(map(fast_path(function), keys))
+
+
+# ----------------------------- PRIME TABLE -------------------------------- #
+
+# Every prime below PRIME_TABLE_LIMIT, found once by a sieve, so rounding a
+# capacity to a prime is a binary search instead of trial division.
+PRIME_TABLE_LIMIT = 2 ** 16
+
+
+def _sieve(limit: int) -> list:
+    """
+    Helper that returns every prime below 'limit' in increasing order.
+    """
+
+    is_composite = bytearray(limit)
+    primes = []
+    for number in range(2, limit):
+        if not is_composite[number]:
+            primes.append(number)
+            is_composite[number * number::number] = \
+                b'\x01' * len(range(number * number, limit, number))
+    return primes
+
+
+PRIME_TABLE = _sieve(PRIME_TABLE_LIMIT)
+
+# Bases for which the Miller-Rabin test has no false positive below 3.3e24.
+_MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+
+def is_prime(number: int) -> bool:
+    """
+    This function returns True if the number is prime. Numbers below
+    PRIME_TABLE_LIMIT are looked up in the prime table, larger ones get a
+    Miller-Rabin test, which takes a few modular exponentiations instead of
+    one division per odd number up to the square root.
+
+    Takes 'number' (int) as a parameter.
+
+    Returns bool.
+    """
+
+    if number < PRIME_TABLE_LIMIT:
+        index = bisect.bisect_left(PRIME_TABLE, number)
+        return index < len(PRIME_TABLE) and PRIME_TABLE[index] == number
+
+    for prime in _MILLER_RABIN_BASES:
+        if number % prime == 0:
+            return False
+
+    # Write number - 1 as odd * 2 ** twos.
+    odd, twos = number - 1, 0
+    while odd % 2 == 0:
+        odd //= 2
+        twos += 1
+
+    for base in _MILLER_RABIN_BASES:
+        value = pow(base, odd, number)
+        if value == 1 or value == number - 1:
+            continue
+        for _ in range(twos - 1):
+            value = value * value % number
+            if value == number - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def next_prime(number: int) -> int:
+    """
+    This function returns the smallest prime that is at least 'number',
+    the capacity the maps get from _is_prime() and _next_prime(). Like
+    them, it never returns 2: numbers up to 3 give 3.
+
+    Takes 'number' (int) as a parameter.
+
+    Returns an integer.
+    """
+
+    if number <= 3:
+        return 3
+    if number <= PRIME_TABLE[-1]:
+        return PRIME_TABLE[bisect.bisect_left(PRIME_TABLE, number)]
+    number |= 1
+    while not is_prime(number):
+        number += 2
+    return number
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nhash_keys example 1")
+    print("-------------------")
+    keys = ['', 'a', 'key1', 'listen', 'silent', 'str' * 40, 'ünïcødé']
+    print(hash_keys(keys, hash_function_1))
+    print(hash_keys(keys, hash_function_2))
+    print(all(h == hash_function_1(k)
+              for k, h in zip(keys, hash_keys(keys, hash_function_1))))
+    print(all(h == hash_function_2(k)
+              for k, h in zip(keys, hash_keys(keys, hash_function_2))))
+
+    print("\nnext_prime example 1")
+    print("--------------------")
+    print([next_prime(n) for n in (0, 2, 4, 100, 65536, 10 ** 12)])
+    print(is_prime(2 ** 61 - 1), is_prime(2 ** 61 + 1))
+
+    print("\nmixed_hash_function example 1")
+    print("-----------------------------")
+    mixed = mixed_hash_function(hash_function_1)
+    print(mixed.__name__, mixed('abc') & 15, hash_function_1('abc') & 15,
+          mixed_hash_function(mixed) is mixed,
+          mixed_hash_function('siphash_24') is siphash_24)
@@ -0,0 +1,220 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 (Portfolio)
+# Description: Stronger hash functions than the two provided in
+# a6_include.py. hash_function_1 gives every anagram the same value and
+# both provided functions return small integers, so keys that share long
+# prefixes pile up in a few buckets. The functions here hash the UTF-8
+# bytes of the key into all 64 bits:
+#   fnv1a_64    FNV-1a, one multiply per byte. Simple, good for short keys.
+#   xxhash_64   XXH64, which reads the key 8 bytes at a time. The fastest of
+#               the three on long keys.
+#   siphash_24  SipHash-2-4, a keyed function. Without the 128-bit seed its
+#               values cannot be predicted, so keys cannot be chosen to
+#               collide on purpose.
+#
+# All of them are registered in hash_engine by name, so the maps accept
+# 'fnv1a_64', 'xxhash_64' or 'siphash_24' in place of a function.
+
+import struct
+
+
+MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+FNV_OFFSET_BASIS = 0xCBF29CE484222325
+FNV_PRIME = 0x100000001B3
+
+XXH_PRIME_1 = 0x9E3779B185EBCA87
+XXH_PRIME_2 = 0xC2B2AE3D27D4EB4F
+XXH_PRIME_3 = 0x165667B19E3779F9
+XXH_PRIME_4 = 0x85EBCA77C2B2AE63
+XXH_PRIME_5 = 0x27D4EB2F165667C5
+
+
+def _key_bytes(key: str) -> bytes:
+    """
+    Helper that returns the bytes that are hashed for a key. Lone
+    surrogates are allowed, so every str can be hashed.
+    """
+    return key.encode('utf-8', 'surrogatepass')
+
+
+def _rotate(value: int, bits: int) -> int:
+    """
+    Helper that rotates a 64-bit value left by 'bits'.
+    """
+    return ((value << bits) | (value >> (64 - bits))) & MASK_64
+
+
+def fnv1a_64(key: str) -> int:
+    """
+    This function returns the 64-bit FNV-1a hash of the key: every byte is
+    XOR'ed into the hash, which is then multiplied by the FNV prime.
+
+    Takes 'key' (str) as a parameter.
+
+    Returns an integer in [0, 2 ** 64).
+    """
+
+    hash_value = FNV_OFFSET_BASIS
+    for byte in _key_bytes(key):
+        hash_value = ((hash_value ^ byte) * FNV_PRIME) & MASK_64
+    return hash_value
+
+
+def _xxh_round(accumulator: int, lane: int) -> int:
+    """
+    Helper that mixes one 8-byte lane into an XXH64 accumulator.
+    """
+    accumulator = (accumulator + lane * XXH_PRIME_2) & MASK_64
+    return (_rotate(accumulator, 31) * XXH_PRIME_1) & MASK_64
+
+
+def _xxh_merge(hash_value: int, accumulator: int) -> int:
+    """
+    Helper that folds one of the four XXH64 accumulators into the hash.
+    """
+    hash_value ^= _xxh_round(0, accumulator)
+    return (hash_value * XXH_PRIME_1 + XXH_PRIME_4) & MASK_64
+
+
+def xxhash_64(key: str, seed: int = 0) -> int:
+    """
+    This function returns the 64-bit XXH64 hash of the key. Keys of 32
+    bytes or more are consumed 32 bytes at a time by four independent
+    accumulators, the rest 8, 4 and 1 byte at a time.
+
+    Takes 'key' (str) and optionally 'seed' (int) as parameters.
+
+    Returns an integer in [0, 2 ** 64).
+    """
+
+    data = _key_bytes(key)
+    length = len(data)
+    seed &= MASK_64
+    position = 0
+
+    if length >= 32:
+        v1 = (seed + XXH_PRIME_1 + XXH_PRIME_2) & MASK_64
+        v2 = (seed + XXH_PRIME_2) & MASK_64
+        v3 = seed
+        v4 = (seed - XXH_PRIME_1) & MASK_64
+        stripes = length // 32
+        lanes = struct.unpack_from(f'<{4 * stripes}Q', data)
+        for i in range(0, 4 * stripes, 4):
+            v1 = _xxh_round(v1, lanes[i])
+            v2 = _xxh_round(v2, lanes[i + 1])
+            v3 = _xxh_round(v3, lanes[i + 2])
+            v4 = _xxh_round(v4, lanes[i + 3])
+        position = 32 * stripes
+        hash_value = (_rotate(v1, 1) + _rotate(v2, 7) + _rotate(v3, 12) +
+                      _rotate(v4, 18)) & MASK_64
+        for accumulator in (v1, v2, v3, v4):
+            hash_value = _xxh_merge(hash_value, accumulator)
+    else:
+        hash_value = (seed + XXH_PRIME_5) & MASK_64
+
+    hash_value = (hash_value + length) & MASK_64
+
+    while position + 8 <= length:
+        lane, = struct.unpack_from('<Q', data, position)
+        hash_value ^= _xxh_round(0, lane)
+        hash_value = (_rotate(hash_value, 27) * XXH_PRIME_1 +
+                      XXH_PRIME_4) & MASK_64
+        position += 8
+
+    if position + 4 <= length:
+        word, = struct.unpack_from('<I', data, position)
+        hash_value ^= (word * XXH_PRIME_1) & MASK_64
+        hash_value = (_rotate(hash_value, 23) * XXH_PRIME_2 +
+                      XXH_PRIME_3) & MASK_64
+        position += 4
+
+    while position < length:
+        hash_value ^= (data[position] * XXH_PRIME_5) & MASK_64
+        hash_value = (_rotate(hash_value, 11) * XXH_PRIME_1) & MASK_64
+        position += 1
+
+    # Final avalanche, so every input bit affects every output bit.
+    hash_value ^= hash_value >> 33
+    hash_value = (hash_value * XXH_PRIME_2) & MASK_64
+    hash_value ^= hash_value >> 29
+    hash_value = (hash_value * XXH_PRIME_3) & MASK_64
+    hash_value ^= hash_value >> 32
+    return hash_value
+
+
+def _sip_rounds(v0: int, v1: int, v2: int, v3: int, rounds: int) -> tuple:
+    """
+    Helper that applies 'rounds' SipRounds to the four state words.
+    """
+
+    for _ in range(rounds):
+        v0 = (v0 + v1) & MASK_64
+        v1 = _rotate(v1, 13) ^ v0
+        v0 = _rotate(v0, 32)
+        v2 = (v2 + v3) & MASK_64
+        v3 = _rotate(v3, 16) ^ v2
+        v0 = (v0 + v3) & MASK_64
+        v3 = _rotate(v3, 21) ^ v0
+        v2 = (v2 + v1) & MASK_64
+        v1 = _rotate(v1, 17) ^ v2
+        v2 = _rotate(v2, 32)
+    return v0, v1, v2, v3
+
+
+def siphash_24(key: str, seed: int = 0) -> int:
+    """
+    This function returns the SipHash-2-4 hash of the key under a 128-bit
+    seed (the low 64 bits are the first half of the SipHash key, the high
+    64 bits the second).
+
+    Takes 'key' (str) and optionally 'seed' (int) as parameters.
+
+    Returns an integer in [0, 2 ** 64).
+    """
+
+    data = _key_bytes(key)
+    k0 = seed & MASK_64
+    k1 = (seed >> 64) & MASK_64
+    v0 = k0 ^ 0x736F6D6570736575
+    v1 = k1 ^ 0x646F72616E646F6D
+    v2 = k0 ^ 0x6C7967656E657261
+    v3 = k1 ^ 0x7465646279746573
+
+    # Whole 8-byte words, then the rest of the bytes with the length (mod
+    # 256) in the top byte.
+    words = len(data) // 8
+    tail = data[8 * words:] + bytes(7 - len(data) % 8) + \
+        bytes((len(data) & 0xFF,))
+    for word in struct.unpack_from(f'<{words}Q', data) + \
+            struct.unpack('<Q', tail):
+        v3 ^= word
+        v0, v1, v2, v3 = _sip_rounds(v0, v1, v2, v3, 2)
+        v0 ^= word
+
+    v2 ^= 0xFF
+    v0, v1, v2, v3 = _sip_rounds(v0, v1, v2, v3, 4)
+    return v0 ^ v1 ^ v2 ^ v3
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nfnv1a_64 example 1")
+    print("------------------")
+    for key in ('', 'a', 'foobar'):
+        print(repr(key), hex(fnv1a_64(key)))
+
+    print("\nxxhash_64 example 1")
+    print("-------------------")
+    for key in ('', 'a', 'abc', 'x' * 100):
+        print(repr(key[:10]), hex(xxhash_64(key)))
+
+    print("\nsiphash_24 example 1")
+    print("--------------------")
+    seed = int.from_bytes(bytes(range(16)), 'little')
+    message = ''.join(map(chr, range(15)))
+    print(hex(siphash_24(message, seed)))
+    print(siphash_24('listen', seed) != siphash_24('silent', seed),
+          siphash_24('key', 1) != siphash_24('key', 2))
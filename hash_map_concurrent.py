@@ -0,0 +1,455 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 (Portfolio)
+# Description: A thread-safe HashMap built from separate chaining segments.
+# Keys are spread over a fixed number of segments by their hash, and each
+# segment is a separate chaining HashMap guarded by its own lock, so threads
+# writing to different segments never wait for each other. Every segment
+# resizes on its own, under its own lock, so a resize never pauses the whole
+# map.
+#
+# Reads take no lock. A segment's table is only ever replaced by a complete
+# one (resizes are built aside and then published with a single
+# assignment), nodes are added at the head of a bucket with a single
+# assignment, and removing a node leaves its 'next' link intact, so a
+# reader always walks a consistent chain. This relies on attribute
+# assignment being atomic, as it is in CPython.
+
+import threading
+
+from a6_include import (DynamicArray, LinkedList,
+                        hash_function_1, hash_function_2)
+from hash_engine import UNCHANGED, hash_key, hash_keys, mix_hash
+from hash_map_sc import HashMap
+
+
+# Default number of segments, and so the number of writers that can work at
+# the same time.
+CONCURRENCY = 16
+
+
+class _Segment(HashMap):
+    """
+    Separate chaining HashMap used as one segment of a ConcurrentHashMap.
+    Writers hold the segment's lock; readers do not, so the table is never
+    changed in a way that a reader could see half done.
+    """
+
+    # The ConcurrentHashMap hashes keys for its segments, so a segment must
+    # never re-seed itself.
+    _chain_limit = None
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        This method changes the capacity of the segment's table. The new
+        table is filled completely before it replaces the old one, and the
+        old one is not changed, so lock-free readers see either table whole.
+
+        Takes 'new_capacity' (int) as parameter.
+
+        Returns None.
+        """
+
+        if new_capacity < 1:
+            return
+        new_capacity = self._round_capacity(new_capacity)
+        while self._size > 0 and (self._size - 1) / new_capacity >= 1:
+            new_capacity = self._round_capacity(new_capacity * 2)
+
+        new_da = DynamicArray()
+        for _ in range(new_capacity):
+            new_da.append(LinkedList())
+
+        old_buckets = self._buckets
+        for i in range(old_buckets.length()):
+            for node in old_buckets[i]:
+                self._insert_hashed(new_da[self._index(node.hash,
+                                                       new_capacity)],
+                                    node.key, node.value, node.hash)
+        self._treeify_buckets(new_da)
+
+        # Publish the finished table.
+        self._buckets = new_da
+        self._capacity = new_capacity
+        self._shared = False
+        self._epoch = None
+        self._mod_count += 1
+
+    def _find_node(self, key: str, hash_value: int):
+        """
+        Helper that returns the node holding the key, or None. The table is
+        read once, so a resize published meanwhile cannot mix two tables.
+        """
+        buckets = self._buckets
+        return self._search(buckets[self._index(hash_value,
+                                                buckets.length())],
+                            key, hash_value)
+
+
+class ConcurrentHashMap:
+    """
+    Thread-safe HashMap with the same interface as hash_map_sc.HashMap. The
+    keys are split across 'concurrency' segments, each with its own lock
+    (lock striping). get() and contains_key() take no lock; every method
+    that changes the map locks only the segment of the key, and compound
+    operations such as increment() and upsert() are atomic.
+    """
+
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 concurrency: int = CONCURRENCY) -> None:
+        """
+        Initialize new ConcurrentHashMap with 'concurrency' segments that
+        share the given capacity.
+        """
+        self._hash_function = function
+        self._concurrency = max(1, concurrency)
+        segment_capacity = max(1, capacity // self._concurrency)
+        self._segments = [_Segment(segment_capacity, function)
+                          for _ in range(self._concurrency)]
+        self._locks = [threading.Lock() for _ in range(self._concurrency)]
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output, one line
+        per segment.
+        """
+        return '\n'.join(f'segment {i}:\n{segment}'
+                         for i, segment in enumerate(self._segments))
+
+    # Hashes a key with the fast path of the map's hash function.
+    _hash = hash_key
+
+    def _segment_index(self, hash_value: int) -> int:
+        """
+        Helper that returns the segment of a hash value. The hash is mixed
+        first so the segment does not follow the bucket inside the segment.
+        """
+        return (mix_hash(hash_value) >> 32) % self._concurrency
+
+    def get_size(self) -> int:
+        """
+        This method returns the number of key/value pairs in the hash map.
+        While other threads are writing, this is a recent value, not an
+        exact one.
+
+        Takes no parameters.
+
+        Returns an integer.
+        """
+        return sum(segment.get_size() for segment in self._segments)
+
+    def get_capacity(self) -> int:
+        """
+        This method returns the total number of buckets of all segments.
+
+        Takes no parameters.
+
+        Returns an integer.
+        """
+        return sum(segment.get_capacity() for segment in self._segments)
+
+    def table_load(self) -> float:
+        """
+        This method returns the current hash table load factor.
+
+        Takes no parameters.
+
+        Returns a float.
+        """
+        return self.get_size() / self.get_capacity()
+
+    def empty_buckets(self) -> int:
+        """
+        This method returns the number of empty buckets of all segments.
+
+        Takes no parameters.
+
+        Returns an integer.
+        """
+        return sum(segment.empty_buckets() for segment in self._segments)
+
+    def put(self, key: str, value: object) -> None:
+        """
+        This method updates the key/value pair in the hash map, locking only
+        the segment of the key. The segment resizes itself when its load
+        factor reaches 1.
+
+        Takes 'key' (str), 'value' (object) as parameters.
+
+        Returns None.
+        """
+
+        hash_value = self._hash(key)
+        index = self._segment_index(hash_value)
+        segment = self._segments[index]
+        with self._locks[index]:
+            segment._make_room()
+            segment._put_hashed(key, value, hash_value)
+
+    def get(self, key: str) -> object:
+        """
+        This method returns the value associated with the given key, or None
+        if the key is not in the hash map. It takes no lock.
+
+        Takes 'key' (str) as a parameter.
+
+        Returns an object.
+        """
+
+        hash_value = self._hash(key)
+        segment = self._segments[self._segment_index(hash_value)]
+        return segment._get_hashed(key, hash_value)
+
+    def contains_key(self, key: str) -> bool:
+        """
+        This method returns True if the given key is in the hash map,
+        otherwise returns False. It takes no lock.
+
+        Takes 'key' (str) as parameter.
+
+        Returns bool.
+        """
+
+        hash_value = self._hash(key)
+        segment = self._segments[self._segment_index(hash_value)]
+        return segment._find_node(key, hash_value) is not None
+
+    def remove(self, key: str) -> None:
+        """
+        This method removes the given key and its associated value from the
+        hash map. If the key is not in the hash map, this method does nothing.
+
+        Takes 'key' (str) as parameter.
+
+        Returns None.
+        """
+        self.pop(key)
+
+    def pop(self, key: str, default: object = None) -> object:
+        """
+        This method removes the given key from the hash map and returns its
+        value, or returns 'default' if the key is not in the hash map.
+
+        Takes 'key' (str), 'default' (object) as parameters.
+
+        Returns the removed value, or 'default'.
+        """
+
+        hash_value = self._hash(key)
+        index = self._segment_index(hash_value)
+        with self._locks[index]:
+            the_node = self._segments[index]._pop_node(key, hash_value)
+        if the_node is None:
+            return default
+        return the_node.value
+
+    def upsert(self, key: str, function, default: object = None) -> object:
+        """
+        This method atomically replaces the value of the given key with
+        function(value), or inserts the key with function(default) as its
+        value. The function is called while the segment is locked, so it
+        should be quick and must not use this map.
+
+        Takes 'key' (str), 'function' (callable), 'default' (object) as
+        parameters.
+
+        Returns the new value of the key.
+        """
+
+        hash_value = self._hash(key)
+        index = self._segment_index(hash_value)
+        segment = self._segments[index]
+        with self._locks[index]:
+            segment._make_room()
+            return segment._upsert_hashed(key, function, default, hash_value)
+
+    def increment(self, key: str, amount: object = 1) -> object:
+        """
+        This method atomically adds 'amount' to the value of the given key,
+        inserting the key with 'amount' as its value if it is not in the
+        hash map.
+
+        Takes 'key' (str), 'amount' (number) as parameters.
+
+        Returns the new value of the key.
+        """
+
+        hash_value = self._hash(key)
+        index = self._segment_index(hash_value)
+        segment = self._segments[index]
+        with self._locks[index]:
+            segment._make_room()
+            return segment._increment_hashed(key, amount, hash_value)
+
+    def get_or_insert(self, key: str, default: object = None) -> object:
+        """
+        This method returns the value of the given key, atomically inserting
+        it with 'default' as its value if it is not in the hash map.
+
+        Takes 'key' (str), 'default' (object) as parameters.
+
+        Returns the value of the key.
+        """
+
+        # Most calls find the key, which needs no lock.
+        hash_value = self._hash(key)
+        index = self._segment_index(hash_value)
+        segment = self._segments[index]
+        the_node = segment._find_node(key, hash_value)
+        if the_node is not None:
+            return the_node.value
+        with self._locks[index]:
+            segment._make_room()
+            return segment._upsert_hashed(key, UNCHANGED, default,
+                                          hash_value)
+
+    def put_many(self, pairs) -> None:
+        """
+        This method updates the hash map with every key/value pair in the
+        given iterable. All keys are hashed in one batch, outside any lock.
+
+        Takes 'pairs' (iterable of (key, value) tuples) as parameter.
+
+        Returns None.
+        """
+
+        pairs = list(pairs)
+        hash_values = hash_keys([pair[0] for pair in pairs],
+                                self._hash_function)
+        for (key, value), hash_value in zip(pairs, hash_values):
+            index = self._segment_index(hash_value)
+            segment = self._segments[index]
+            with self._locks[index]:
+                segment._make_room()
+                segment._put_hashed(key, value, hash_value)
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        This method returns the values associated with each of the given keys,
+        in the same order. Keys that are not in the hash map give None.
+
+        Takes 'keys' (iterable of str) as parameter.
+
+        Returns a dynamic array.
+        """
+
+        keys = list(keys)
+        new_da = DynamicArray()
+        for key, hash_value in zip(keys, hash_keys(keys, self._hash_function)):
+            segment = self._segments[self._segment_index(hash_value)]
+            new_da.append(segment._get_hashed(key, hash_value))
+        return new_da
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        This method changes the total capacity of the hash map. Segments are
+        resized one after another, each under its own lock, so the rest of
+        the map stays writable meanwhile.
+
+        Takes 'new_capacity' (int) as parameter.
+
+        Returns None.
+        """
+
+        if new_capacity < 1:
+            return
+        segment_capacity = max(1, new_capacity // self._concurrency)
+        for segment, lock in zip(self._segments, self._locks):
+            with lock:
+                segment.resize_table(segment_capacity)
+
+    def clear(self) -> None:
+        """
+        This method clears the contents of the hash map, one segment at a
+        time. Does not change the underlying hash table capacity.
+
+        Takes no parameters.
+
+        Returns None.
+        """
+        for segment, lock in zip(self._segments, self._locks):
+            with lock:
+                segment.clear()
+
+    def items(self):
+        """
+        This method yields a (key, value) tuple for each key in the hash map.
+        Each segment is iterated through a snapshot taken under its lock, so
+        writers are never blocked by the iteration and it never fails; keys
+        written meanwhile may or may not be included.
+
+        Takes no parameters.
+
+        Returns a generator of tuples.
+        """
+        for segment, lock in zip(self._segments, self._locks):
+            with lock:
+                snapshot = segment.snapshot()
+            yield from snapshot.items()
+
+    def keys(self):
+        """
+        This method yields each key in the hash map, in the same way as
+        items().
+
+        Takes no parameters.
+
+        Returns a generator of keys.
+        """
+        for key, _ in self.items():
+            yield key
+
+    def values(self):
+        """
+        This method yields each value in the hash map, in the same way as
+        items().
+
+        Takes no parameters.
+
+        Returns a generator of values.
+        """
+        for _, value in self.items():
+            yield value
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        This method returns a dynamic array where each index contains a tuple
+        of a key/value pair stored in the hash map.
+
+        Takes no parameters.
+
+        Returns a dynamic array.
+        """
+        return DynamicArray(list(self.items()))
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nConcurrentHashMap example 1")
+    print("---------------------------")
+    m = ConcurrentHashMap(53, hash_function_2, concurrency=4)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+    print(m.get_size(), m.get_capacity(), m.get('str42'), m.contains_key('x'))
+    m.remove('str42')
+    print(m.get_size(), m.get('str42'), m.pop('str43'), m.get_size())
+
+    print("\nConcurrentHashMap example 2 - threads")
+    print("-------------------------------------")
+    m = ConcurrentHashMap(11, hash_function_1)
+
+    def worker(number: int) -> None:
+        for i in range(2000):
+            m.increment('counter' + str(i % 50))
+            m.put('thread' + str(number) + '-' + str(i), i)
+            m.get('counter' + str(i % 50))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(m.get_size(), m.get('counter0'), m.get('thread7-1999'))
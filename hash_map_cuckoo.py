@@ -0,0 +1,488 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 (Portfolio)
+# Description: A HashMap that uses cuckoo hashing for collision resolution.
+# Every key has exactly two possible buckets, one in each of two tables,
+# chosen from two different hash functions (hash_function_1 and
+# hash_function_2 by default). Inserting into an occupied bucket evicts its
+# entry to that entry's other bucket, and so on. An entry that cannot be
+# placed after a bounded number of evictions goes to a small stash of at most
+# STASH_SIZE entries. When the stash would overflow, both hash functions are
+# replaced with freshly seeded siphash_24 functions and every key is hashed
+# again, so keys that collide under one pair of functions (found by chance or
+# crafted on purpose) are separated by the next. A lookup therefore inspects
+# at most two buckets plus the stash, whatever the contents of the table.
+#
+# Each bucket index is taken from a mix of both hash values. The provided
+# functions each give many keys the same small value (hash_function_1 maps
+# every anagram of a key to one value), so a table indexed by one of them
+# alone would leave most of its buckets unreachable. Mixed together, only
+# keys that share both hash values compete for the same two buckets.
+
+from a6_include import (DynamicArray, HashEntry,
+                        hash_function_1, hash_function_2)
+from hash_engine import (fast_path, hash_keys, mix_hash, next_prime,
+                         seeded_hash_function)
+from hash_functions import siphash_24
+
+
+# Largest fraction of all buckets that may be filled before the tables grow.
+# Two table cuckoo hashing starts failing just under a load of 0.5.
+MAX_LOAD = 0.45
+
+# Evictions tried before an entry is moved to the stash.
+MAX_KICKS = 32
+
+# Most entries the stash may hold. One more makes put() rehash every key with
+# new hash functions.
+STASH_SIZE = 4
+
+
+def _table_hashes(hash_value: int, hash_value_2: int) -> (int, int):
+    """
+    Helper that turns the two raw hash values of a key into the hashes used
+    to index the first and second table.
+    """
+    mixed, mixed_2 = mix_hash(hash_value), mix_hash(hash_value_2)
+    return mix_hash(mixed ^ (mixed_2 >> 1)), mix_hash(mixed_2 ^ (mixed >> 1))
+
+
+class HashMap:
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 function_2: callable = hash_function_2) -> None:
+        """
+        Initialize new HashMap that uses cuckoo hashing with two tables for
+        collision resolution
+        """
+
+        # each of the two tables gets a prime number of buckets
+        self._table_capacity = next_prime(max(1, (capacity + 1) // 2))
+        self._capacity = 2 * self._table_capacity
+        self._tables = ([None] * self._table_capacity,
+                        [None] * self._table_capacity)
+        self._stash = []
+
+        self._hash_function = function
+        self._hash_function_2 = function_2
+        self._size = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for number, table in enumerate(self._tables, 1):
+            for i in range(len(table)):
+                out += f"T{number} {i}: {table[i]}\n"
+        for hash_entry in self._stash:
+            out += f"stash: {hash_entry}\n"
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map (the buckets of both tables together)
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _hashes(self, key: str) -> (int, int):
+        """
+        Helper that returns the two table hashes of the key.
+        """
+        return _table_hashes(fast_path(self._hash_function)(key),
+                             fast_path(self._hash_function_2)(key))
+
+    def _slot(self, hash_entry: HashEntry, table: int) -> int:
+        """
+        Helper that returns the bucket of the entry in the given table (0 or
+        1), using the hashes stored in the entry.
+        """
+        if table == 0:
+            return hash_entry.hash % self._table_capacity
+        return hash_entry.hash_2 % self._table_capacity
+
+    def _find_entry(self, key: str, hash_value: int,
+                    hash_value_2: int) -> HashEntry:
+        """
+        Helper that returns the entry holding the key, or None if the key is
+        not in the hash map. Looks at two buckets and the stash only.
+        """
+
+        first, second = self._tables
+        hash_entry = first[hash_value % self._table_capacity]
+        if hash_entry is not None and hash_entry.key == key:
+            return hash_entry
+
+        hash_entry = second[hash_value_2 % self._table_capacity]
+        if hash_entry is not None and hash_entry.key == key:
+            return hash_entry
+
+        for hash_entry in self._stash:
+            if hash_entry.key == key:
+                return hash_entry
+        return None
+
+    def _insert(self, hash_entry: HashEntry) -> None:
+        """
+        Helper that places an entry whose key is not in the table. Each
+        eviction sends the evicted entry to its bucket in the other table.
+        After MAX_KICKS evictions the entry still being carried is stashed.
+        """
+
+        table = 0
+        for _ in range(MAX_KICKS):
+            slot = self._slot(hash_entry, table)
+            hash_entry, self._tables[table][slot] = \
+                self._tables[table][slot], hash_entry
+            if hash_entry is None:
+                return
+            table = 1 - table
+
+        self._stash.append(hash_entry)
+
+    def put(self, key: str, value: object) -> None:
+        """
+        This method updates the key/value pair in the hash map. If the given
+        key already exists in the hash map, its associated value is replaced
+        by the new value. If the given key is not in the hash map, a new
+        key/value pair is added.
+
+        Takes 'key' (str), 'value' (object) as parameters.
+
+        Returns None.
+        """
+
+        # Grow the tables to double their size once the load limit is hit.
+        if self.table_load() >= MAX_LOAD:
+            self.resize_table(self._capacity * 2)
+
+        self._put_hashed(key, value, *self._hashes(key))
+
+    def _put_hashed(self, key: str, value: object, hash_value: int,
+                    hash_value_2: int) -> None:
+        """
+        Helper that places the key/value pair using already computed table
+        hashes. When the stash overflows, every key is rehashed with new
+        hash functions, see _rehash().
+        """
+
+        hash_entry = self._find_entry(key, hash_value, hash_value_2)
+        if hash_entry is not None:
+            hash_entry.value = value
+            return
+
+        hash_entry = HashEntry(key, value)
+        hash_entry.hash = hash_value
+        hash_entry.hash_2 = hash_value_2
+        self._insert(hash_entry)
+        self._size += 1
+
+        if len(self._stash) > STASH_SIZE:
+            self._rehash()
+
+    def _rehash(self) -> None:
+        """
+        Helper that replaces both hash functions with siphash_24 under new
+        random seeds and places every entry again with its new hashes. This
+        is repeated, with tables of twice the size, until the stash holds no
+        more than STASH_SIZE entries.
+        """
+
+        table_capacity = self._table_capacity
+        while True:
+            entries = [hash_entry for table in self._tables
+                       for hash_entry in table if hash_entry is not None]
+            entries.extend(self._stash)
+
+            self._hash_function = seeded_hash_function(siphash_24)
+            self._hash_function_2 = seeded_hash_function(siphash_24)
+            self._table_capacity = table_capacity
+            self._capacity = 2 * table_capacity
+            self._tables = ([None] * table_capacity, [None] * table_capacity)
+            self._stash = []
+
+            hashes = self._hash_batch([hash_entry.key for hash_entry in
+                                       entries])
+            for hash_entry, hash_value, hash_value_2 in zip(entries,
+                                                            *hashes):
+                hash_entry.hash = hash_value
+                hash_entry.hash_2 = hash_value_2
+                self._insert(hash_entry)
+
+            if len(self._stash) <= STASH_SIZE:
+                return
+            table_capacity = next_prime(table_capacity * 2)
+
+    def table_load(self) -> float:
+        """
+        This method returns the current hash table load factor.
+
+        Takes no parameters.
+
+        Returns the current hash table load factor.
+        """
+        return self._size / self._capacity
+
+    def empty_buckets(self) -> int:
+        """
+        This method returns the number of empty buckets in both tables.
+
+        Takes no parameters.
+
+        Returns an integer.
+        """
+        return self._tables[0].count(None) + self._tables[1].count(None)
+
+    def get_stash_size(self) -> int:
+        """
+        This method returns the number of entries held in the stash.
+
+        Takes no parameters.
+
+        Returns an integer.
+        """
+        return len(self._stash)
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        This method changes the capacity of the internal hash tables (split
+        evenly between the two). All key/value pairs remain in the hash map
+        and are placed again with the hashes stored in their entries, so no
+        key is rehashed.
+
+        Takes 'new_capacity' (int) as parameter.
+
+        Returns None.
+        """
+
+        # Return if the capacity is less than the size.
+        if new_capacity < self._size:
+            return
+
+        # Keep doubling while the entries would be over the load limit.
+        table_capacity = next_prime(max(1, (new_capacity + 1) // 2))
+        while self._size > 2 * table_capacity * MAX_LOAD:
+            table_capacity = next_prime(table_capacity * 2)
+
+        entries = [hash_entry for table in self._tables
+                   for hash_entry in table if hash_entry is not None]
+        entries.extend(self._stash)
+
+        self._table_capacity = table_capacity
+        self._capacity = 2 * table_capacity
+        self._tables = ([None] * table_capacity, [None] * table_capacity)
+        self._stash = []
+
+        for hash_entry in entries:
+            self._insert(hash_entry)
+        if len(self._stash) > STASH_SIZE:
+            self._rehash()
+
+    def get(self, key: str) -> object:
+        """
+        This method returns the value associated with the given key. If the key
+        is not in the hash map, the method returns None.
+
+        Takes 'key' (str) as a parameter.
+
+        Returns an object (value of given key).
+        """
+        return self._get_hashed(key, *self._hashes(key))
+
+    def _get_hashed(self, key: str, hash_value: int,
+                    hash_value_2: int) -> object:
+        """
+        Helper that looks up the key using already computed table hashes.
+        """
+        hash_entry = self._find_entry(key, hash_value, hash_value_2)
+        if hash_entry is None:
+            return None
+        return hash_entry.value
+
+    def contains_key(self, key: str) -> bool:
+        """
+        This method returns True if the given key is in the hash map, otherwise
+        it returns False. An empty hash map does not contain any keys.
+
+        Takes 'key' (str) as parameter.
+
+        Returns bool.
+        """
+        return self._find_entry(key, *self._hashes(key)) is not None
+
+    def remove(self, key: str) -> None:
+        """
+        This method removes the given key and its associated value from the
+        hash map. If the key is not in the hash map, the method does nothing.
+
+        Takes 'key' (str) as parameter.
+
+        Returns None.
+        """
+        self._remove_hashed(key, *self._hashes(key))
+
+    def _remove_hashed(self, key: str, hash_value: int,
+                       hash_value_2: int) -> None:
+        """
+        Helper that removes the key using already computed table hashes. A
+        freed bucket is handed to a stashed entry that belongs there, if any.
+        """
+
+        for table, table_hash in enumerate((hash_value, hash_value_2)):
+            slot = table_hash % self._table_capacity
+            hash_entry = self._tables[table][slot]
+            if hash_entry is not None and hash_entry.key == key:
+                self._tables[table][slot] = None
+                self._size -= 1
+                self._unstash(table, slot)
+                return
+
+        for i, hash_entry in enumerate(self._stash):
+            if hash_entry.key == key:
+                self._stash.pop(i)
+                self._size -= 1
+                return
+
+    def _unstash(self, table: int, slot: int) -> None:
+        """
+        Helper that moves the first stashed entry whose bucket in the given
+        table is the freed slot back into the table.
+        """
+        for i, hash_entry in enumerate(self._stash):
+            if self._slot(hash_entry, table) == slot:
+                self._tables[table][slot] = self._stash.pop(i)
+                return
+
+    def clear(self) -> None:
+        """
+        This method clears the contents of the hash map. It does not change
+        the underlying table capacity.
+
+        Takes no parameters.
+
+        Returns None.
+        """
+        self._tables = ([None] * self._table_capacity,
+                        [None] * self._table_capacity)
+        self._stash = []
+        self._size = 0
+
+    def _hash_batch(self, keys: list) -> (list, list):
+        """
+        Helper that hashes a batch of keys with both hash functions and
+        returns the lists of first and second table hashes.
+        """
+        pairs = list(map(_table_hashes,
+                         hash_keys(keys, self._hash_function),
+                         hash_keys(keys, self._hash_function_2)))
+        return ([pair[0] for pair in pairs], [pair[1] for pair in pairs])
+
+    def put_many(self, pairs) -> None:
+        """
+        This method updates the hash map with every key/value pair in the
+        given iterable, as if put() was called for each one in order. The
+        tables are resized at most once up front, unless the stash
+        overflows, and all keys are hashed in one batch. Keys after a
+        rehash are hashed again with the new functions.
+
+        Takes 'pairs' (iterable of (key, value) tuples) as parameter.
+
+        Returns None.
+        """
+
+        pairs = list(pairs)
+        keys = [pair[0] for pair in pairs]
+
+        needed = self._size + len(pairs)
+        if needed / self._capacity >= MAX_LOAD:
+            self.resize_table(int(needed / MAX_LOAD) + 1)
+
+        done = 0
+        while done < len(pairs):
+            function = self._hash_function
+            for (key, value), hash_value, hash_value_2 in \
+                    zip(pairs[done:], *self._hash_batch(keys[done:])):
+                self._put_hashed(key, value, hash_value, hash_value_2)
+                done += 1
+                if self._hash_function is not function:
+                    break
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        This method returns the values associated with each of the given keys,
+        in the same order. Keys that are not in the hash map give None.
+
+        Takes 'keys' (iterable of str) as parameter.
+
+        Returns a dynamic array.
+        """
+
+        keys = list(keys)
+        return DynamicArray(list(map(self._get_hashed, keys,
+                                     *self._hash_batch(keys))))
+
+    def remove_many(self, keys) -> None:
+        """
+        This method removes each of the given keys and its associated value
+        from the hash map. Keys that are not in the hash map are ignored.
+
+        Takes 'keys' (iterable of str) as parameter.
+
+        Returns None.
+        """
+
+        keys = list(keys)
+        for key, hash_value, hash_value_2 in zip(keys,
+                                                 *self._hash_batch(keys)):
+            self._remove_hashed(key, hash_value, hash_value_2)
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        This method returns a dynamic array where each index contains a tuple
+        of a key/value pair stored in the hash map. The order of the keys in
+        the dynamic array does not matter.
+
+        Takes no parameters.
+
+        Returns dynamic array.
+        """
+
+        new_da = DynamicArray()
+        for table in self._tables:
+            for hash_entry in table:
+                if hash_entry is not None:
+                    new_da.append((hash_entry.key, hash_entry.value))
+        for hash_entry in self._stash:
+            new_da.append((hash_entry.key, hash_entry.value))
+        return new_da
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nput example 1")
+    print("-------------")
+    m = HashMap(53)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity(), m.get_stash_size())
+
+    print("\nanagram example 1")
+    print("-----------------")
+    m = HashMap(11)
+    for key in ('listen', 'silent', 'enlist', 'tinsel', 'inlets'):
+        m.put(key, m.get_size())
+    print(m.get_size(), m.get_capacity(), m.get_stash_size())
+    print(m.get('silent'), m.contains_key('tinsel'), m.contains_key('lisent'))
+    m.remove('enlist')
+    print(m.get_size(), m.get('enlist'), m.get('inlets'))
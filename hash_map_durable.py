@@ -0,0 +1,513 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 (Portfolio)
+# Description: A durability layer around the separate chaining and open
+# addressing HashMaps, so their contents survive the process dying. Every
+# mutation is appended to a write-ahead log before it is made in the map, and
+# the log is fsync'ed in groups (group commit), so writes do not each pay
+# the latency of an fsync. A mutation commits the group once 'group_size'
+# records are pending, or once 'commit_interval' seconds have passed since
+# the last fsync. The interval is only checked when a record is written:
+# there is no background flusher, so after a burst of writes the pending
+# records stay uncommitted until the next write, commit() or close().
+# Every 'checkpoint_every' records the whole map is written as a snapshot
+# (see hash_map_snapshot) and the log starts over. Opening the directory
+# again loads the last snapshot and replays the log written after it.
+#
+# Files in the directory:
+#   snapshot.a6snap  the last checkpoint, replaced atomically.
+#   wal.log          records, each a length and CRC-32 followed by a pickled
+#                    ('put', key, value), ('remove', key) or ('clear',)
+#                    tuple.
+#
+# Only puts, removes and clears are logged; increment() and the other read,
+# modify and write methods log the put of their result. Replaying these
+# records twice leaves the map as replaying them once, so a crash between
+# writing a snapshot and emptying the log loses nothing. A record that was
+# cut short by a crash fails its length or CRC check and ends the replay;
+# it is removed from the log when the map is opened.
+#
+# A crash loses at most the records that were not yet committed; call
+# commit() to make everything written so far durable.
+#
+# Values are stored with pickle, so only open directories that you trust.
+
+import os
+import pickle
+import struct
+import time
+import zlib
+
+import hash_map_sc as sc
+from a6_include import DynamicArray, hash_function_1
+from hash_map_snapshot import load_file, save_file
+
+
+SNAPSHOT_NAME = 'snapshot.a6snap'
+LOG_NAME = 'wal.log'
+
+# Length and CRC-32 of the pickled record that follows.
+RECORD_HEADER = struct.Struct('<II')
+
+
+class DurableHashMap:
+    """
+    HashMap whose mutations are written to a write-ahead log with group
+    commit and periodic snapshots, and which is restored from them when its
+    directory is opened again.
+    """
+
+    def __init__(self,
+                 directory: str,
+                 map_class: type = None,
+                 capacity: int = 11,
+                 function: callable = None,
+                 group_size: int = 256,
+                 commit_interval: float = 0.05,
+                 checkpoint_every: int = 100000) -> None:
+        """
+        Initialize a DurableHashMap stored in 'directory', creating it if
+        needed. A new map is a 'map_class' (hash_map_sc.HashMap by default)
+        with the given capacity and hash function (hash_function_1 by
+        default). An existing map keeps the class and hash function of its
+        snapshot; ones given explicitly must match them. The seed of a
+        seeded hash function is not stored, so unless that function is
+        given, such a map is loaded under a new seed.
+        """
+
+        os.makedirs(directory, exist_ok=True)
+        self._snapshot_path = os.path.join(directory, SNAPSHOT_NAME)
+        self._log_path = os.path.join(directory, LOG_NAME)
+        self._group_size = max(1, group_size)
+        self._commit_interval = commit_interval
+        self._checkpoint_every = max(1, checkpoint_every)
+
+        if os.path.exists(self._snapshot_path):
+            # A snapshot does not store the seed of a seeded hash function,
+            # which a map re-seeded against flooding has, so it is loaded
+            # under a new seed unless the function is given.
+            self._map = load_file(self._snapshot_path, function, reseed=True)
+            if map_class is not None and type(self._map) is not map_class:
+                raise ValueError(f"{directory} holds a "
+                                 f"{type(self._map).__name__}, not a "
+                                 f"{map_class.__name__}")
+        else:
+            # Record the class, capacity and hash function of a new map
+            # right away, so reopening it does not depend on the arguments.
+            map_class = map_class or sc.HashMap
+            self._map = map_class(capacity, function or hash_function_1)
+            save_file(self._map, self._snapshot_path)
+
+        # Replay the log, then drop a record a crash may have cut short.
+        valid_length, self._logged = self._replay()
+        with open(self._log_path, 'ab') as file:
+            file.truncate(valid_length)
+
+        self._log = open(self._log_path, 'ab')
+        self._pending = 0
+        self._last_commit = time.monotonic()
+
+    def __enter__(self) -> "DurableHashMap":
+        """
+        Lets the map be used in a 'with' block that closes it.
+        """
+        return self
+
+    def __exit__(self, *exception) -> None:
+        """
+        Commits and closes the log at the end of a 'with' block.
+        """
+        self.close()
+
+    def _replay(self) -> (int, int):
+        """
+        Helper that applies every complete record of the log to the map.
+        Returns the length of the log up to the end of the last complete
+        record, and the number of records applied.
+        """
+
+        if not os.path.exists(self._log_path):
+            return 0, 0
+
+        valid_length = count = 0
+        with open(self._log_path, 'rb') as file:
+            while True:
+                header = file.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    break
+                length, checksum = RECORD_HEADER.unpack(header)
+                data = file.read(length)
+                if len(data) < length or zlib.crc32(data) != checksum:
+                    break
+                self._apply(pickle.loads(data))
+                valid_length += RECORD_HEADER.size + length
+                count += 1
+        return valid_length, count
+
+    def _apply(self, record: tuple) -> None:
+        """
+        Helper that performs one logged mutation on the map.
+        """
+
+        operation = record[0]
+        if operation == 'put':
+            self._map.put(record[1], record[2])
+        elif operation == 'remove':
+            self._map.remove(record[1])
+        elif operation == 'clear':
+            self._map.clear()
+        else:
+            raise ValueError(f"unknown record {operation!r} in the log")
+
+    def _check_open(self) -> None:
+        """
+        Helper that raises ValueError if the map was closed, before a
+        mutation is made that could no longer be logged.
+        """
+        if self._log is None:
+            raise ValueError("DurableHashMap is closed")
+
+    def _append(self, record: tuple) -> None:
+        """
+        Helper that writes one record to the log. It is called before the
+        mutation is made in the map: a record that cannot be pickled raises
+        here, leaving both the map and the log unchanged.
+        """
+
+        data = pickle.dumps(record, pickle.HIGHEST_PROTOCOL)
+        self._log.write(RECORD_HEADER.pack(len(data), zlib.crc32(data)))
+        self._log.write(data)
+        self._pending += 1
+        self._logged += 1
+
+    def _group_commit(self) -> None:
+        """
+        Helper called once a logged mutation is made in the map. It
+        checkpoints once enough records are logged (the checkpoint includes
+        the mutation), and otherwise commits the group once it is full or
+        'commit_interval' has passed since the last commit.
+        """
+
+        if self._logged >= self._checkpoint_every:
+            self.checkpoint()
+        elif self._pending >= self._group_size or \
+                time.monotonic() - self._last_commit >= self._commit_interval:
+            self.commit()
+
+    def commit(self) -> None:
+        """
+        This method makes every mutation so far durable by flushing the log
+        and fsync'ing it.
+
+        Takes no parameters.
+
+        Returns None.
+        """
+
+        if self._log is None:
+            return
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        self._pending = 0
+        self._last_commit = time.monotonic()
+
+    def checkpoint(self) -> None:
+        """
+        This method writes the whole map as a snapshot and empties the log,
+        so opening the directory does not have to replay it.
+
+        Takes no parameters.
+
+        Returns None.
+        """
+
+        self.commit()
+        save_file(self._map, self._snapshot_path)
+
+        # Make the rename of the snapshot durable before the log is emptied,
+        # or a crash could bring back the old snapshot with an empty log.
+        directory = os.open(os.path.dirname(self._snapshot_path) or '.',
+                            os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+        # The snapshot holds every logged mutation, the log can start over.
+        self._log.close()
+        self._log = open(self._log_path, 'wb')
+        os.fsync(self._log.fileno())
+        self._logged = 0
+
+    def close(self) -> None:
+        """
+        This method commits the log and closes it. The map cannot be changed
+        afterwards. Calling it again does nothing.
+
+        Takes no parameters.
+
+        Returns None.
+        """
+
+        if self._log is None:
+            return
+        self.commit()
+        self._log.close()
+        self._log = None
+
+    def put(self, key: str, value: object) -> None:
+        """
+        This method updates the key/value pair in the hash map and logs it.
+        If the given key already exists, its value is replaced.
+
+        Takes 'key' (str), 'value' (object) as parameters.
+
+        Returns None.
+        """
+        self._check_open()
+        self._append(('put', key, value))
+        self._map.put(key, value)
+        self._group_commit()
+
+    def put_many(self, pairs) -> None:
+        """
+        This method puts every (key, value) pair, logging each one, and
+        inserts them into the map in one batch.
+
+        Takes 'pairs' (iterable of (str, object) tuples) as a parameter.
+
+        Returns None.
+        """
+
+        self._check_open()
+        pairs = list(pairs)
+        for key, value in pairs:
+            self._append(('put', key, value))
+        self._map.put_many(pairs)
+        self._group_commit()
+
+    def remove(self, key: str) -> None:
+        """
+        This method removes the given key and its value from the hash map
+        and logs it. Does nothing if the key is not in the map.
+
+        Takes 'key' (str) as a parameter.
+
+        Returns None.
+        """
+
+        self._check_open()
+        if self._map.contains_key(key):
+            self._append(('remove', key))
+            self._map.remove(key)
+            self._group_commit()
+
+    def pop(self, key: str, default: object = None) -> object:
+        """
+        This method removes the key and returns its value, or returns
+        'default' if the key is not in the map.
+
+        Takes 'key' (str), 'default' (object) as parameters.
+
+        Returns the removed value or 'default'.
+        """
+
+        self._check_open()
+        if not self._map.contains_key(key):
+            return default
+        self._append(('remove', key))
+        value = self._map.pop(key)
+        self._group_commit()
+        return value
+
+    def increment(self, key: str, amount: object = 1) -> object:
+        """
+        This method adds 'amount' to the value of the key, inserting it with
+        value 'amount' if it is absent, and logs the new value.
+
+        Takes 'key' (str), 'amount' (object) as parameters.
+
+        Returns the new value.
+        """
+
+        if self._map.contains_key(key):
+            value = self._map.get(key) + amount
+        else:
+            value = amount
+        self.put(key, value)
+        return value
+
+    def upsert(self, key: str, function, default: object = None) -> object:
+        """
+        This method stores function(current value) for the key, using
+        'default' as the current value if the key is absent, and logs the
+        new value.
+
+        Takes 'key' (str), 'function' (callable), 'default' (object) as
+        parameters.
+
+        Returns the new value.
+        """
+
+        if self._map.contains_key(key):
+            value = function(self._map.get(key))
+        else:
+            value = function(default)
+        self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        """
+        This method removes every key/value pair from the hash map and logs
+        it.
+
+        Takes no parameters.
+
+        Returns None.
+        """
+        self._check_open()
+        self._append(('clear',))
+        self._map.clear()
+        self._group_commit()
+
+    def get(self, key: str) -> object:
+        """
+        This method returns the value associated with the given key, or None
+        if the key is not in the hash map.
+
+        Takes 'key' (str) as a parameter.
+
+        Returns an object.
+        """
+        return self._map.get(key)
+
+    def contains_key(self, key: str) -> bool:
+        """
+        This method returns True if the given key is in the hash map.
+
+        Takes 'key' (str) as a parameter.
+
+        Returns bool.
+        """
+        return self._map.contains_key(key)
+
+    def get_size(self) -> int:
+        """
+        This method returns the number of key/value pairs in the hash map.
+
+        Takes no parameters.
+
+        Returns an integer.
+        """
+        return self._map.get_size()
+
+    def get_capacity(self) -> int:
+        """
+        This method returns the number of buckets of the hash map.
+
+        Takes no parameters.
+
+        Returns an integer.
+        """
+        return self._map.get_capacity()
+
+    def table_load(self) -> float:
+        """
+        This method returns the load factor of the hash map.
+
+        Takes no parameters.
+
+        Returns a float.
+        """
+        return self._map.table_load()
+
+    def keys(self):
+        """
+        This method yields every key in the hash map.
+
+        Takes no parameters.
+
+        Returns a generator of str.
+        """
+        return self._map.keys()
+
+    def values(self):
+        """
+        This method yields every value in the hash map.
+
+        Takes no parameters.
+
+        Returns a generator of objects.
+        """
+        return self._map.values()
+
+    def items(self):
+        """
+        This method yields every (key, value) pair in the hash map.
+
+        Takes no parameters.
+
+        Returns a generator of tuples.
+        """
+        return self._map.items()
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        This method returns a dynamic array of (key, value) tuples for every
+        pair in the hash map.
+
+        Takes no parameters.
+
+        Returns a DynamicArray.
+        """
+        return self._map.get_keys_and_values()
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    import tempfile
+
+    import hash_map_oa as oa
+    from a6_include import hash_function_2
+
+    print("\nDurableHashMap example 1")
+    print("------------------------")
+    with tempfile.TemporaryDirectory() as directory:
+        with DurableHashMap(directory) as m:
+            for i in range(100):
+                m.put('key' + str(i), i)
+            m.remove('key5')
+            m.increment('key7', 100)
+
+        # Reopening replays the log.
+        with DurableHashMap(directory) as m:
+            print(m.get_size(), m.get('key7'), m.contains_key('key5'))
+
+    print("\nDurableHashMap example 2")
+    print("------------------------")
+    with tempfile.TemporaryDirectory() as directory:
+        m = DurableHashMap(directory, oa.HashMap, 11, hash_function_2,
+                           checkpoint_every=50)
+        for i in range(120):
+            m.put('key' + str(i), [i])
+        m.commit()
+
+        # Simulate a crash that cut the last record short.
+        with open(os.path.join(directory, LOG_NAME), 'ab') as file:
+            file.write(b'\x40\x00\x00\x00junk')
+
+        m = DurableHashMap(directory)
+        print(type(m._map).__name__, m.get_size(), m.get('key119'),
+              os.path.getsize(os.path.join(directory, LOG_NAME)))
+        m.close()
+
+    print("\nDurableHashMap example 3")
+    print("------------------------")
+    with tempfile.TemporaryDirectory() as directory:
+        with DurableHashMap(directory) as m:
+            start = time.perf_counter()
+            for i in range(20000):
+                m.put('key' + str(i), i)
+            print(f"20000 logged puts in "
+                  f"{time.perf_counter() - start:.2f} seconds")
@@ -0,0 +1,662 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 (Portfolio)
+# Description: An open addressing HashMap stored in a memory-mapped file, so
+# a table built once can be reopened instantly instead of being rebuilt with
+# put() on every start. It uses the same quadratic probing, prime capacities,
+# load factor limit and tombstones as hash_map_oa.HashMap.
+#
+# File layout:
+#   header  HEADER_SIZE bytes: magic, capacity, size, tombstones, end of the
+#           heap and the name of the hash function.
+#   slots   capacity fixed width slots: full hash, offset of the key and of
+#           the value in the heap, their lengths, and a state byte (empty,
+#           live or tombstone).
+#   heap    key bytes (UTF-8) and value bytes (pickled), appended as they
+#           are written.
+#
+# A lookup only reads the slots on its probe sequence and the keys they
+# point to, so opening the file costs nothing and only the pages that are
+# touched are read from disk. Any number of processes can open the same file
+# read-only at once. There must be at most one writer, and readers should not
+# use a file while it is being written.
+#
+# Replaced values and removed keys leave their bytes in the heap until the
+# table is rebuilt by resize_table() or compact(). A rebuild writes a new
+# file next to the old one and then renames it over the old one, so a crash
+# never leaves a half rebuilt table, and readers that still have the old
+# file open keep seeing it.
+#
+# Values are stored with pickle, so only open files that you trust.
+
+import mmap
+import os
+import pickle
+import struct
+
+from a6_include import DynamicArray, hash_function_1, hash_function_2
+from hash_engine import (fast_path, hash_function_by_name,
+                         hash_function_name, hash_keys, next_prime)
+
+
+MAGIC = b'A6OAMAP1'
+
+# magic, capacity, size, tombstones, heap end, hash function name.
+HEADER = struct.Struct('<8sQQQQ64s')
+HEADER_SIZE = 128
+
+# hash, key offset, value offset, key length, value length, state.
+SLOT = struct.Struct('<QQQIIB7x')
+STATE_OFFSET = 32  # Position of the state byte within a slot.
+
+# Slot states kept in the state byte.
+EMPTY = 0
+LIVE = 1
+TOMBSTONE = 2
+
+# Stored hashes are reduced to 64 bits so they fit the slot.
+HASH_MASK = 0xFFFFFFFFFFFFFFFF
+
+
+class HashMap:
+    """
+    Open addressing HashMap whose table lives in a memory-mapped file
+    instead of a DynamicArray. Slots hold the full hash and the position of
+    the key and value in the heap at the end of the file, so a lookup reads
+    only the slots on its probe sequence. Every change is made in the
+    mapped file itself (flush() forces it to disk), and opening an existing
+    file reads nothing up front.
+    """
+
+    def __init__(self, path: str, capacity: int = 11, function=None,
+                 readonly: bool = False) -> None:
+        """
+        Open the table stored in the file at 'path', or create it with the
+        given capacity and hash function if the file does not exist. When
+        opening, the hash function defaults to the one named in the file;
+        the file does not store the seed of a seeded one, which must be
+        passed in.
+        """
+
+        self._path = path
+        self._readonly = readonly
+        self._file = None
+        self._map = None
+
+        if not os.path.exists(path):
+            if readonly:
+                raise FileNotFoundError(path)
+            function = function or hash_function_1
+            self._create(path, next_prime(capacity),
+                         hash_function_name(function))
+
+        self._open()
+
+        # The table must be read with the hash function it was written with.
+        if function is None:
+            function = hash_function_by_name(self._function_name)
+        elif hash_function_name(function) != self._function_name:
+            raise ValueError(f"{path} was written with "
+                             f"{self._function_name}, "
+                             f"not {hash_function_name(function)}")
+        self._hash_function = function
+
+        # Fraction of the capacity tombstones may take up before remove()
+        # compacts the table.
+        self._tombstone_threshold = 0.25
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide the same output as the
+        HashEntry based map
+        """
+        out = ''
+        for i in range(self._capacity):
+            state = self._slot(i)[5]
+            if state == EMPTY:
+                entry = 'None'
+            else:
+                entry = (f"K: {self._key_at(i)} V: {self._value_at(i)} "
+                         f"TS: {state == TOMBSTONE}")
+            out += str(i) + ': ' + entry + '\n'
+        return out
+
+    def __enter__(self) -> "HashMap":
+        """
+        Lets the map be used in a 'with' block that closes it.
+        """
+        return self
+
+    def __exit__(self, *exception) -> None:
+        """
+        Closes the file at the end of a 'with' block.
+        """
+        self.close()
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    @staticmethod
+    def _create(path: str, capacity: int, function_name: str) -> None:
+        """
+        Helper that writes an empty table file. The slots are left to the
+        file system as zero bytes, which is the EMPTY state.
+        """
+        if len(function_name.encode()) > 64:
+            raise ValueError(f"hash function name {function_name!r} "
+                             f"is too long")
+        heap_start = HEADER_SIZE + capacity * SLOT.size
+        with open(path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, capacity, 0, 0, heap_start,
+                                   function_name.encode()))
+            file.truncate(heap_start)
+
+    def _open(self) -> None:
+        """
+        Helper that maps the file into memory and reads its header.
+        """
+
+        self._file = open(self._path, 'rb' if self._readonly else 'r+b')
+        access = mmap.ACCESS_READ if self._readonly else mmap.ACCESS_WRITE
+        self._map = mmap.mmap(self._file.fileno(), 0, access=access)
+
+        (magic, self._capacity, self._size, self._tombstones, self._heap_end,
+         function_name) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{self._path} is not a hash map file")
+        self._function_name = function_name.rstrip(b'\0').decode()
+
+    def _write_header(self) -> None:
+        """
+        Helper that stores the size, tombstone count and heap end in the
+        header after a change.
+        """
+        HEADER.pack_into(self._map, 0, MAGIC, self._capacity, self._size,
+                         self._tombstones, self._heap_end,
+                         self._function_name.encode())
+
+    def _check_writable(self) -> None:
+        """
+        Helper that refuses changes to a map opened read-only.
+        """
+        if self._readonly:
+            raise PermissionError(f"{self._path} is open read-only")
+
+    def close(self) -> None:
+        """
+        This method writes any pending changes to the file and closes it.
+        Calling it again does nothing.
+
+        Takes no parameters.
+
+        Returns None.
+        """
+        if self._map is not None:
+            if not self._readonly:
+                self._map.flush()
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def flush(self) -> None:
+        """
+        This method writes any pending changes to the file.
+
+        Takes no parameters.
+
+        Returns None.
+        """
+        if not self._readonly:
+            self._map.flush()
+
+    def _hash(self, key: str) -> int:
+        """
+        Helper that hashes the key with the map's hash function, using the
+        per-key fast path from hash_engine when one exists.
+        """
+        return fast_path(self._hash_function)(key) & HASH_MASK
+
+    def _slot(self, index: int) -> tuple:
+        """
+        Helper that reads a slot: (hash, key offset, value offset, key
+        length, value length, state).
+        """
+        return SLOT.unpack_from(self._map, HEADER_SIZE + index * SLOT.size)
+
+    def _key_at(self, index: int) -> str:
+        """
+        Helper that reads the key of a slot.
+        """
+        _, key_offset, _, key_length, _, _ = self._slot(index)
+        return self._map[key_offset:key_offset + key_length].decode(
+            'utf-8', 'surrogatepass')
+
+    def _value_at(self, index: int) -> object:
+        """
+        Helper that reads the value of a slot.
+        """
+        _, _, value_offset, _, value_length, _ = self._slot(index)
+        return pickle.loads(self._map[value_offset:value_offset +
+                                      value_length])
+
+    def _probe(self, key_bytes: bytes, hash_value: int) -> (int, int):
+        """
+        Helper that walks the quadratic probe sequence of the key. Returns the
+        index of the live slot holding the key (None if the key is absent),
+        and the first index where the key could be placed, which is either the
+        first tombstone or the empty slot that ended the probe.
+        """
+
+        capacity = self._capacity
+        the_map = self._map
+        unpack_from = SLOT.unpack_from
+        slot_size = SLOT.size
+        index_value = hash_value % capacity
+        free_index = None
+
+        for j in range(capacity):
+            i = (index_value + j * j) % capacity  # Quadratic probing, wrap around.
+            (slot_hash, key_offset, _, key_length, _,
+             state) = unpack_from(the_map, HEADER_SIZE + i * slot_size)
+
+            # An empty slot ends the probe, the key is not in the map.
+            if state == EMPTY:
+                if free_index is None:
+                    free_index = i
+                return None, free_index
+
+            # Tombstones may be reused, but the key could still be further on.
+            if state == TOMBSTONE:
+                if free_index is None:
+                    free_index = i
+
+            # Only compare keys when the stored hashes match.
+            elif slot_hash == hash_value and key_length == len(key_bytes) \
+                    and the_map[key_offset:key_offset + key_length] == key_bytes:
+                return i, free_index
+
+        return None, free_index
+
+    def _append(self, data: bytes) -> int:
+        """
+        Helper that appends bytes to the heap, growing the file (at least
+        doubling it) when they do not fit. Returns their offset.
+        """
+
+        offset = self._heap_end
+        end = offset + len(data)
+        if end > len(self._map):
+            new_length = max(end, 2 * len(self._map))
+            self._map.flush()
+            self._map.close()
+            self._file.truncate(new_length)
+            self._map = mmap.mmap(self._file.fileno(), 0,
+                                  access=mmap.ACCESS_WRITE)
+        self._map[offset:end] = data
+        self._heap_end = end
+        return offset
+
+    def _place(self, index: int, key_bytes: bytes, value_bytes: bytes,
+               hash_value: int) -> None:
+        """
+        Helper that appends the key and value to the heap and writes a live
+        slot at the given index.
+        """
+        key_offset = self._append(key_bytes)
+        value_offset = self._append(value_bytes)
+        SLOT.pack_into(self._map, HEADER_SIZE + index * SLOT.size, hash_value,
+                       key_offset, value_offset, len(key_bytes),
+                       len(value_bytes), LIVE)
+
+    def table_load(self) -> float:
+        """
+        This method returns the current hash table load factor.
+
+        Takes no parameters.
+
+        Returns a float.
+        """
+        return self._size / self._capacity
+
+    def empty_buckets(self) -> int:
+        """
+        This method returns the number of empty buckets in the hash table.
+
+        Takes no parameters.
+
+        Returns an integer.
+        """
+        return sum(1 for i in range(self._capacity)
+                   if self._slot(i)[5] == EMPTY)
+
+    def put(self, key: str, value: object) -> None:
+        """
+        This method updates the key/value pair in the hash map. If the given
+        key already exists in the hash map, its associated value is replaced
+        by the new value. If the given key is not in the hash map, a new
+        key/value pair is added.
+
+        Takes 'key' (str), 'value' (object) as parameters.
+
+        Returns None.
+        """
+
+        self._check_writable()
+
+        # Resize to double its current capacity when called and if current
+        # load factor is >= 0.5.
+        if self.table_load() >= 0.5:
+            self.resize_table(self._capacity * 2)
+
+        self._put_hashed(key, value, self._hash(key))
+        self._write_header()
+
+    def _put_hashed(self, key: str, value: object, hash_value: int) -> None:
+        """
+        Helper that places the key/value pair using an already computed hash
+        value. Does not check the load factor or write the header.
+        """
+
+        key_bytes = key.encode('utf-8', 'surrogatepass')
+        value_bytes = pickle.dumps(value)
+        index_value, free_index = self._probe(key_bytes, hash_value)
+
+        # Update in place: the new value is appended, the slot points to it.
+        if index_value is not None:
+            offset = HEADER_SIZE + index_value * SLOT.size
+            slot = list(SLOT.unpack_from(self._map, offset))
+            slot[2] = self._append(value_bytes)
+            slot[4] = len(value_bytes)
+            SLOT.pack_into(self._map, offset, *slot)
+            return
+
+        # Insert into the first empty slot or tombstone, increment size.
+        if self._slot(free_index)[5] == TOMBSTONE:
+            self._tombstones -= 1
+        self._place(free_index, key_bytes, value_bytes, hash_value)
+        self._size += 1
+
+    def put_many(self, pairs) -> None:
+        """
+        This method updates the hash map with every key/value pair in the
+        given iterable, as if put() was called for each one in order. The
+        table is resized at most once, up front, and all keys are hashed in
+        one batch.
+
+        Takes 'pairs' (iterable of (key, value) tuples) as parameter.
+
+        Returns None.
+        """
+
+        self._check_writable()
+        pairs = list(pairs)
+        keys = [pair[0] for pair in pairs]
+
+        # Presize once so the load factor stays below 0.5 for the whole batch.
+        needed = self._size + len(pairs)
+        if needed / self._capacity >= 0.5:
+            self.resize_table(needed * 2)
+
+        hash_values = hash_keys(keys, self._hash_function)
+        for (key, value), hash_value in zip(pairs, hash_values):
+            self._put_hashed(key, value, hash_value & HASH_MASK)
+        self._write_header()
+
+    def get(self, key: str) -> object:
+        """
+        This method returns the value associated with the given key. If the
+        key is not in the hash map, the method returns None.
+
+        Takes 'key' (str) as a parameter.
+
+        Returns an object (value of given key).
+        """
+
+        index_value = self._probe(key.encode('utf-8', 'surrogatepass'),
+                                  self._hash(key))[0]
+        if index_value is None:
+            return None
+        return self._value_at(index_value)
+
+    def contains_key(self, key: str) -> bool:
+        """
+        This method returns True if the given key is in the hash map, otherwise
+        it returns False. Values are not read.
+
+        Takes 'key' (str) as parameter.
+
+        Returns bool.
+        """
+        return self._probe(key.encode('utf-8', 'surrogatepass'),
+                           self._hash(key))[0] is not None
+
+    def remove(self, key: str) -> None:
+        """
+        This method removes the given key and its associated value from the
+        hash map. If the key is not in the hash map, the method does nothing.
+
+        Takes 'key' (str) as parameter.
+
+        Returns None.
+        """
+
+        self._check_writable()
+        index_value = self._probe(key.encode('utf-8', 'surrogatepass'),
+                                  self._hash(key))[0]
+        if index_value is None:
+            return
+
+        # Set tombstone status, decrement size.
+        self._map[HEADER_SIZE + index_value * SLOT.size + STATE_OFFSET] = \
+            TOMBSTONE
+        self._size -= 1
+        self._tombstones += 1
+        self._write_header()
+
+        # Compact once tombstones take up too much of the table.
+        threshold = self._tombstone_threshold
+        if threshold is not None and \
+                self._tombstones / self._capacity >= threshold:
+            self.compact()
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        This method changes the capacity of the hash table. The live entries
+        are written to a new file, which then replaces the old one in a
+        single rename; tombstones and replaced values are dropped. Stored
+        hashes are reused, keys are not rehashed.
+
+        Takes 'new_capacity' (int) as parameter.
+
+        Returns None.
+        """
+
+        self._check_writable()
+
+        # Return if the capacity is less than the size.
+        if new_capacity < self._size:
+            return
+
+        new_capacity = next_prime(new_capacity)
+
+        # Keep doubling while the live entries would reach a load factor of
+        # 0.5, the same capacity put() would have grown the table to.
+        while self._size > 0 and (self._size - 1) / new_capacity >= 0.5:
+            new_capacity = next_prime(new_capacity * 2)
+
+        temporary_path = self._path + '.resize'
+        self._create(temporary_path, new_capacity, self._function_name)
+        resized = HashMap(temporary_path, function=self._hash_function)
+        try:
+            the_map = self._map
+            for i in range(self._capacity):
+                (slot_hash, key_offset, value_offset, key_length,
+                 value_length, state) = self._slot(i)
+                if state != LIVE:
+                    continue
+
+                # Place the entry in the first empty slot of its probe.
+                index_value = slot_hash % new_capacity
+                for j in range(new_capacity):
+                    free_index = (index_value + j * j) % new_capacity
+                    if resized._slot(free_index)[5] == EMPTY:
+                        break
+                resized._place(
+                    free_index,
+                    the_map[key_offset:key_offset + key_length],
+                    the_map[value_offset:value_offset + value_length],
+                    slot_hash)
+
+            resized._size = self._size
+            resized._write_header()
+        finally:
+            resized.close()
+
+        self.close()
+        os.replace(temporary_path, self._path)
+        self._open()
+
+    def compact(self) -> None:
+        """
+        This method rebuilds the hash table at its current capacity, dropping
+        every tombstone and the heap space of removed keys and replaced
+        values.
+
+        Takes no parameters.
+
+        Returns None.
+        """
+        self.resize_table(self._capacity)
+
+    def get_tombstone_count(self) -> int:
+        """
+        This method returns the number of tombstones in the hash table.
+
+        Takes no parameters.
+
+        Returns an integer.
+        """
+        return self._tombstones
+
+    def set_tombstone_threshold(self, threshold: float) -> None:
+        """
+        This method sets the fraction of the capacity that tombstones may take
+        up before remove() compacts the table. None turns automatic
+        compaction off.
+
+        Takes 'threshold' (float or None) as parameter.
+
+        Returns None.
+        """
+        self._tombstone_threshold = threshold
+
+    def clear(self) -> None:
+        """
+        This method clears the contents of the hash map. It does not change
+        the underlying table capacity.
+
+        Takes no parameters.
+
+        Returns None.
+        """
+
+        # Replace the file rather than truncating it, readers that have it
+        # open keep their view.
+        self._check_writable()
+        temporary_path = self._path + '.clear'
+        self._create(temporary_path, self._capacity, self._function_name)
+        self.close()
+        os.replace(temporary_path, self._path)
+        self._open()
+
+    def items(self):
+        """
+        This method yields a (key, value) tuple for each key in the hash map,
+        reading the file as it goes.
+
+        Takes no parameters.
+
+        Returns a generator of tuples.
+        """
+        for i in range(self._capacity):
+            if self._slot(i)[5] == LIVE:
+                yield self._key_at(i), self._value_at(i)
+
+    def keys(self):
+        """
+        This method yields each key in the hash map, without reading the
+        values.
+
+        Takes no parameters.
+
+        Returns a generator of keys.
+        """
+        for i in range(self._capacity):
+            if self._slot(i)[5] == LIVE:
+                yield self._key_at(i)
+
+    def values(self):
+        """
+        This method yields each value in the hash map.
+
+        Takes no parameters.
+
+        Returns a generator of values.
+        """
+        for _, value in self.items():
+            yield value
+
+    def get_keys_and_values(self):
+        """
+        This method returns a dynamic array where each index contains a tuple
+        of a key/value pair stored in the hash map.
+
+        Takes no parameters.
+
+        Returns dynamic array.
+        """
+        return DynamicArray(list(self.items()))
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    import tempfile
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'table.a6map')
+
+    print("\nmmap HashMap example 1")
+    print("----------------------")
+    with HashMap(path, 11, hash_function_2) as m:
+        for i in range(150):
+            m.put('str' + str(i), i * 100)
+        m.remove('str3')
+        print(m.get_size(), m.get_capacity(), m.get('str42'),
+              m.contains_key('str3'))
+
+    print("\nmmap HashMap example 2 - reopen read-only")
+    print("-----------------------------------------")
+    with HashMap(path, readonly=True) as m:
+        print(m.get_size(), m.get('str42'), m.get('str149'), m.get('str3'))
+        try:
+            m.put('str0', 0)
+        except PermissionError as error:
+            print(error)
+
+    os.remove(path)
+    os.rmdir(directory)
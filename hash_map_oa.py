@@ -7,14 +7,45 @@
 # is used to store the hash table and implements open addressing.
 # The implementation allows such that this hash map can have key-values
 # inserted, removed, grabbed, table resized, or other various needs.
-# Additionally, methods to iterate over the hash map and returning the next
-# item from the hash map are also defined.
+# Additionally, iterating over the hash map yields its live entries, from a
+# generator that skips empty buckets and tombstones. The older next(map),
+# which keeps its position on the map itself, still works but is deprecated.
 
-from a6_include import (DynamicArray, DynamicArrayException, HashEntry,
+import copy
+import warnings
+
+from a6_include import (DynamicArray, HashEntry,
                         hash_function_1, hash_function_2)
+from hash_engine import (UNCHANGED, hash_key, hash_keys, is_seedable,
+                         mixed_hash_function, next_prime,
+                         seeded_hash_function)
 
 
 class HashMap:
+    # Tombstones currently in the table, and the fraction of the capacity
+    # they may take up before remove() compacts the table. Kept as class
+    # level defaults because __init__ must not change.
+    _tombstones = 0
+    _tombstone_threshold = 0.25
+
+    # Number of structural changes so far, checked by running iterators, and
+    # whether the buckets are shared with a snapshot.
+    _mod_count = 0
+    _shared = False
+
+    # Mark of the entries the map may change in place, None while it shares
+    # none of its entries with a snapshot (see _own_entry()).
+    _epoch = None
+
+    # Longest probe sequence an insert may need before the map is re-seeded
+    # (see set_probe_limit()), and whether an insert has needed a longer
+    # one.
+    _probe_limit = 32
+    _flooded = False
+
+    # Position of the deprecated next(map), reset by iter(map).
+    _index = 0
+
     def __init__(self, capacity: int, function) -> None:
         """
         Initialize new HashMap that uses
@@ -90,6 +121,9 @@ class HashMap:
 
     # ------------------------------------------------------------------ #
 
+    # Hashes a key with the fast path of the map's hash function.
+    _hash = hash_key
+
     def put(self, key: str, value: object) -> None:
         """
         This method updates the key/value pair in the hash map. If the given
@@ -102,49 +136,118 @@ class HashMap:
         Returns None.
         """
 
+        self._make_room()
+        self._put_hashed(key, value, self._hash(key))
+
+    def _make_room(self) -> None:
+        """
+        Helper called before anything is inserted, which grows the table.
+        """
+        self._rehash_if_flooded()
+
         # Resize to double its current capacity when called and if current
         # load factor is >= 0.5.
         if self.table_load() >= 0.5:
             self.resize_table(self._capacity * 2)
 
+    def _probe(self, key: str, hash_value: int,
+               buckets: DynamicArray = None) -> (int, int):
+        """
+        Helper that walks the quadratic probe sequence of the key in the
+        given buckets (the map's own buckets by default). Returns the index of
+        the live entry holding the key (None if the key is absent), and the
+        first index where the key could be placed, which is either the first
+        tombstone or the empty bucket that ended the probe.
+        """
+
+        if buckets is None:
+            buckets = self._buckets
+
         # Grab the capacity of the bucket.
-        capacity_bucket = self._buckets.length()
+        capacity_bucket = buckets.length()
 
         # Determine the index.
-        hash_value = self._hash_function(key)
         index_value = hash_value % capacity_bucket
+        free_index = None
 
-        # Define the hash entry.
-        hash_entry = HashEntry(key, value)
+        for j in range(capacity_bucket):  # Where j starts at 0.
+            i = (index_value + j ** 2) % capacity_bucket  # Quadratic probing, wrap around.
+            the_bucket = buckets[i]
 
-        # Try inserting element into hash map, increment size (when None or
-        # tombstone is placed).
-        if self._buckets[index_value] is None or self._buckets[index_value].is_tombstone == True:
-            self._buckets.set_at_index(index_value, hash_entry)
-            self._size += 1 # Increment size.
+            # An empty bucket ends the probe, the key is not in the map.
+            if the_bucket is None:
+                if free_index is None:
+                    free_index = i
+                return None, free_index
 
-        # Or, update at index, do not increment size.
-        elif self._buckets[index_value].key == key:
-            self._buckets.set_at_index(index_value, hash_entry)
+            # Tombstones may be reused, but the key could still be further on.
+            if the_bucket.is_tombstone:
+                if free_index is None:
+                    free_index = i
 
-        # Otherwise, loop through and find next spot by quadratic probing
-        # to insert in locations.
-        else:
-            for j in range(1, self._buckets.length()): # Where j starts at 1.
-                i = (index_value + j ** 2) % self._capacity # Where 'i' represents index value w/quadratic probing, wrap around.
+            # Only compare keys when the stored hashes match.
+            elif the_bucket.hash == hash_value and the_bucket.key == key:
+                return i, free_index
 
-                # Try inserting element, increment size (when None or tombstone
-                # is placed).
-                if self._buckets[i] is None or self._buckets[i].is_tombstone == True:
-                    self._buckets.set_at_index(i, hash_entry)
-                    self._size += 1  # Increment size.
-                    return # Return since insertion is complete.
+        return None, free_index
 
-                # Update at index, do not increment size.
-                elif self._buckets[i].key == key:
-                    self._buckets.set_at_index(i, hash_entry)
-                    return # Return since insertion is complete.
+    def _put_hashed(self, key: str, value: object, hash_value: int) -> None:
+        """
+        Helper that places the key/value pair using an already computed hash
+        value. Does not check the load factor.
+        """
+        index_value, free_index = self._probe(key, hash_value)
+
+        # Update in place, do not increment size.
+        if index_value is not None:
+            self._own_entry(index_value).value = value
+            return
+
+        # Insert into the first empty bucket or tombstone, increment size.
+        self._fill(free_index, self._new_entry(key, value, hash_value))
+        self._size += 1
 
+    def _fill(self, index: int, hash_entry: HashEntry) -> None:
+        """
+        Helper that stores the entry in an empty bucket or over a tombstone,
+        keeping the tombstone count up to date.
+        """
+        self._unshare()
+        if self._buckets[index] is not None:
+            self._tombstones -= 1  # Reusing a tombstone.
+        self._buckets.set_at_index(index, hash_entry)
+        self._mod_count += 1
+
+        # A probe sequence this long at a load factor below 0.5 means the
+        # keys were chosen to collide, the next insert re-seeds the map.
+        if self._probe_limit is not None and \
+                self._probe_length(index, hash_entry.hash) > self._probe_limit:
+            self._flooded = True
+
+    def _probe_length(self, index: int, hash_value: int) -> int:
+        """
+        Helper that returns how many steps of the quadratic probe sequence of
+        the hash value lead to the index, counting at most one more than the
+        probe limit.
+        """
+
+        capacity_bucket = self._buckets.length()
+        index_value = hash_value % capacity_bucket
+        for j in range(self._probe_limit + 1):
+            if (index_value + j ** 2) % capacity_bucket == index:
+                return j
+        return self._probe_limit + 1
+
+    @staticmethod
+    def _new_entry(key: str, value: object, hash_value: int) -> HashEntry:
+        """
+        Helper that creates a HashEntry which also stores the full hash value
+        of its key, so probing can skip most key comparisons and
+        resize_table() never needs to rehash the key.
+        """
+        hash_entry = HashEntry(key, value)
+        hash_entry.hash = hash_value
+        return hash_entry
 
     def table_load(self) -> float:
         """
@@ -180,11 +283,20 @@ class HashMap:
                 empty_buckets += 1 # If bucket contains None, increment count.
         return empty_buckets
 
+    def _round_capacity(self, capacity: int) -> int:
+        """
+        Helper that rounds a capacity up to one the table can have: the next
+        prime, the same number _is_prime() and _next_prime() give, found in
+        the precomputed prime table.
+        """
+        return next_prime(capacity)
+
     def resize_table(self, new_capacity: int) -> None:
         """
         This method changes the capacity of the internal hash table. All
-        existing key/value pairs must remain in the new hash map, and all hash
-        table links must be rehashed.
+        existing key/value pairs must remain in the new hash map. Entries are
+        redistributed with the hash stored in each entry, keys are not
+        rehashed.
 
         Takes 'new_capacity' (int) as parameter.
 
@@ -196,11 +308,23 @@ class HashMap:
             return
 
         # If the new capacity is not Prime, set new capacity to next prime.
-        if not self._is_prime(new_capacity):
-            new_capacity = self._next_prime(new_capacity)
+        new_capacity = self._round_capacity(new_capacity)
+
+        # Keep doubling while the live entries would reach a load factor of
+        # 0.5, the same capacity put() would have grown the table to.
+        while self._size > 0 and (self._size - 1) / new_capacity >= 0.5:
+            new_capacity = self._round_capacity(new_capacity * 2)
 
-        # Set the capacity.
+        # Set the capacity, the new table has no tombstones.
         self._capacity = new_capacity
+        self._tombstones = 0
+        self._mod_count += 1
+
+        # Entries still shared with a snapshot are copied into the new
+        # table, so afterwards the map shares none of its entries.
+        epoch = self._epoch
+        self._shared = False
+        self._epoch = None
 
         # # Save old buckets, so we may loop over them.
         old_buckets = self._buckets
@@ -213,19 +337,34 @@ class HashMap:
         for _ in range(self._capacity):
             self._buckets.append(None)
 
-        # Reset size for new buckets.
-        self._size = 0
-
-        # Loop over the old buckets and copy contents over from old hash map
-        # to the new hash map.
+        # Loop over the old buckets and move each live entry (tombstones are
+        # dropped) into the new table. The size does not change.
         for i in range(old_buckets.length()):
             the_bucket = old_buckets.get_at_index(i)  # Grab bucket
+            if the_bucket is not None and not the_bucket.is_tombstone:
+                if epoch is not None and \
+                        getattr(the_bucket, 'epoch', None) is not epoch:
+                    the_bucket = self._new_entry(the_bucket.key,
+                                                 the_bucket.value,
+                                                 the_bucket.hash)
+                self._reinsert(the_bucket)
+
+    def _reinsert(self, hash_entry: HashEntry) -> None:
+        """
+        Helper that moves a live entry to the first empty bucket of its probe
+        sequence in a table without tombstones, using the hash stored in the
+        entry. Keys are unique, so no key comparison, rehash or load check is
+        needed.
+        """
 
-            # Put the keys and values into the hashmap if bucket has items.
-            if the_bucket is not None:
-                grab_key = the_bucket.key
-                grab_value = the_bucket.value
-                self.put(grab_key, grab_value)
+        capacity_bucket = self._buckets.length()
+        index_value = hash_entry.hash % capacity_bucket
+        j = 0
+        slot = index_value
+        while self._buckets[slot] is not None:
+            j += 1
+            slot = (index_value + j ** 2) % capacity_bucket
+        self._buckets.set_at_index(slot, hash_entry)
 
     def get(self, key: str) -> object:
         """
@@ -237,40 +376,29 @@ class HashMap:
         Returns an object (value of given key).
         """
 
-        # Grab the capacity of the bucket.
-        capacity_bucket = self._buckets.length()
+        return self._get_hashed(key, self._hash(key))
 
-        # Determine the index.
-        hash_value = self._hash_function(key)
-        index_value = hash_value % capacity_bucket
+    def _get_hashed(self, key: str, hash_value: int) -> object:
+        """
+        Helper that looks up the key using an already computed hash value.
+        """
 
-        # If location is None, return None (no value).
-        if self._buckets[index_value] is None:
+        # If the key is not found, return None (no value).
+        the_entry = self._find_entry(key, hash_value)
+        if the_entry is None:
             return None
+        return the_entry.value
 
-        # Check if key is located at initial index, return Value.
-        elif self._buckets[index_value].key == key:
-            # Return None if tombstone is placed there.
-            if self._buckets[index_value].is_tombstone == True:
-                return None
-            return self._buckets.get_at_index(index_value).value
-
-        # Otherwise, loop through and find key at other possible indices.
-        else:
-            for j in range(1, self._buckets.length()): # Where j starts at '1'.
-                i = (index_value + j ** 2) % self._capacity  # Where 'i' represents index value w/quadratic probing, wrap around.
-
-                # If location is None, return None (no value)
-                if self._buckets[i] is None:
-                    return None
-
-                # Check if key is located at possible indices, return value.
-                elif self._buckets[i].key == key:
-                    # Return None if tombstone is placed there.
-                    if self._buckets[i].is_tombstone == True:
-                        return None
-                    return self._buckets.get_at_index(i).value
+    def _find_entry(self, key: str, hash_value: int) -> HashEntry:
+        """
+        Helper that returns the live entry holding the key, or None if the key
+        is not in the hash map.
+        """
 
+        index_value = self._probe(key, hash_value)[0]
+        if index_value is None:
+            return None
+        return self._buckets[index_value]
 
     def contains_key(self, key: str) -> bool:
         """
@@ -282,95 +410,284 @@ class HashMap:
         Returns bool.
         """
 
-        # Grab the capacity of the bucket.
-        capacity_bucket = self._buckets.length()
+        return self._find_entry(key, self._hash(key)) is not None
 
-        # Determine the index.
-        hash_value = self._hash_function(key)
-        index_value = hash_value % capacity_bucket
+    def remove(self, key: str) -> None:
+        """
+        This method removes the given key and its associated value from the
+        hash map. If the key is not in the hash map, the method does nothing.
 
-        # If location is None, return False.
-        if self._buckets[index_value] is None:
-            return False
+        Takes 'key' (str) as parameter.
 
-        # Check if key is located at initial index, return True.
-        elif self._buckets[index_value].key == key:
-            # Return False if tombstone is placed there.
-            if self._buckets[index_value].is_tombstone == True:
-                return False
-            return True
+        Returns None.
+        """
 
-        # Otherwise, loop through and to find key at other possible indices.
-        else:
-            for j in range(1, self._buckets.length()): # Where 'j' starts at 1
-                i = (index_value + j ** 2) % self._capacity  # Where 'i' represents index value w/quadratic probing, wrap around.
+        self._remove_hashed(key, self._hash(key))
 
-                # If location is None, return False.
-                if self._buckets[i] is None:
-                    return False
+    def _remove_hashed(self, key: str, hash_value: int) -> None:
+        """
+        Helper that removes the key using an already computed hash value.
+        """
+        self._pop_entry(key, hash_value)
 
-                # Check if key is located at possible indices, return True.
-                elif self._buckets[i].key == key:
-                    # Return False if tombstone is placed there.
-                    if self._buckets[i].is_tombstone == True:
-                        return False
-                    return True
+    def _pop_entry(self, key: str, hash_value: int) -> HashEntry:
+        """
+        Helper that removes the key and returns the entry that held it, or
+        returns None if the key is not in the hash map.
+        """
 
+        # If the key is not found, do nothing.
+        index_value = self._probe(key, hash_value)[0]
+        if index_value is None:
+            return None
 
-    def remove(self, key: str) -> None:
+        # Set tombstone status, decrement size.
+        the_entry = self._own_entry(index_value)
+        the_entry.is_tombstone = True
+        self._size -= 1
+        self._tombstones += 1
+        self._mod_count += 1
+
+        # Compact once tombstones take up too much of the table, they would
+        # otherwise lengthen every probe sequence without triggering a resize.
+        threshold = self._tombstone_threshold
+        if threshold is not None and \
+                self._tombstones / self._capacity >= threshold:
+            self.compact()
+        return the_entry
+
+    def compact(self) -> None:
         """
-        This method removes the given key and its associated value from the
-        hash map. If the key is not in the hash map, the method does nothing.
+        This method rebuilds the hash table at its current capacity, dropping
+        every tombstone so probe sequences only go over live entries.
 
-        Takes 'key' (str) as parameter.
+        Takes no parameters.
 
         Returns None.
         """
+        self.resize_table(self._capacity)
 
-        # Grab the capacity of the bucket.
-        capacity_bucket = self._buckets.length()
+    def get_tombstone_count(self) -> int:
+        """
+        This method returns the number of tombstones in the hash table.
 
-        # Determine the index.
-        hash_value = self._hash_function(key)
-        index_value = hash_value % capacity_bucket
+        Takes no parameters.
 
-        # If location is None, return.
-        if self._buckets[index_value] is None:
-            return
+        Returns an integer.
+        """
+        return self._tombstones
+
+    def set_tombstone_threshold(self, threshold: float) -> None:
+        """
+        This method sets the fraction of the capacity that tombstones may take
+        up before remove() compacts the table. None turns automatic
+        compaction off.
+
+        Takes 'threshold' (float or None) as parameter.
+
+        Returns None.
+        """
+        self._tombstone_threshold = threshold
 
-        # Check if key is located at index, remove by setting tombstone.
-        elif self._buckets[index_value].key == key:
+    def reseed(self, seed: int = None, function=None) -> None:
+        """
+        This method switches the map to a seeded hash function and rehashes
+        every key with it, dropping all tombstones. Under a random seed
+        nobody can choose keys that collide on purpose. The function
+        defaults to the map's own when it takes a seed, and to siphash_24
+        otherwise.
+
+        Takes 'seed' (int, random by default), 'function' (siphash_24,
+        xxhash_64 or their name) as parameters.
+
+        Returns None.
+        """
+
+        if function is None:
+            function = self._hash_function
+            if not is_seedable(function):
+                function = 'siphash_24'
+        function = seeded_hash_function(function, seed)
+
+        # Collect everything before the buckets change.
+        entries = list(self._entries())
+        hash_values = hash_keys([entry.key for entry in entries], function)
+
+        self._hash_function = function
+        self._tombstones = 0
+        self._shared = False
+        self._epoch = None
+        self._mod_count += 1
+
+        self._buckets = DynamicArray()
+        for _ in range(self._capacity):
+            self._buckets.append(None)
 
-            # If the value there is already a tombstone, return (do nothing).
-            if self._buckets[index_value].is_tombstone == True:
+        # New entries, so a snapshot sharing the old ones is not affected.
+        for the_entry, hash_value in zip(entries, hash_values):
+            self._reinsert(self._new_entry(the_entry.key, the_entry.value,
+                                           hash_value))
+        self._flooded = False
+
+    def set_probe_limit(self, limit: int) -> None:
+        """
+        This method turns on protection against keys chosen to collide: once
+        an insert needs a probe sequence longer than 'limit' steps, the map
+        is re-seeded with siphash_24 under a random seed and every key is
+        rehashed. A limit of 32, the default, is practically never reached
+        by chance with a well spread hash function; hash_function_1 and
+        hash_function_2 reach it on ordinary keys and get re-seeded too.
+        None turns the check off.
+
+        Takes 'limit' (int) as a parameter.
+
+        Returns None.
+        """
+        self._probe_limit = limit
+
+    def _rehash_if_flooded(self) -> None:
+        """
+        Helper that re-seeds the map once an insert has needed a probe
+        sequence longer than the probe limit.
+        """
+        if self._flooded:
+            self.reseed(function='siphash_24')
+
+    def put_many(self, pairs) -> None:
+        """
+        This method updates the hash map with every key/value pair in the
+        given iterable, as if put() was called for each one in order. The
+        table is resized at most once, up front, and all keys are hashed in
+        one batch.
+
+        Takes 'pairs' (iterable of (key, value) tuples) as parameter.
+
+        Returns None.
+        """
+
+        pairs = list(pairs)
+        keys = [pair[0] for pair in pairs]
+
+        # Presize once so the load factor stays below 0.5 for the whole batch.
+        needed = self._size + len(pairs)
+        if needed / self._capacity >= 0.5:
+            self.resize_table(needed * 2)
+
+        hash_values = hash_keys(keys, self._hash_function)
+        for i, hash_value in enumerate(hash_values):
+            self._put_hashed(keys[i], pairs[i][1], hash_value)
+            if self._flooded:
+                # Re-seed, then hash the rest of the batch with the new seed.
+                self._rehash_if_flooded()
+                self.put_many(pairs[i + 1:])
                 return
 
-            #  Set tombstone status, decrement size.
-            self._buckets.get_at_index(index_value).is_tombstone = True
-            self._size -= 1
+    def get_many(self, keys) -> DynamicArray:
+        """
+        This method returns the values associated with each of the given keys,
+        in the same order. Keys that are not in the hash map give None.
+
+        Takes 'keys' (iterable of str) as parameter.
+
+        Returns a dynamic array.
+        """
+
+        keys = list(keys)
+        hash_values = hash_keys(keys, self._hash_function)
+        return DynamicArray(list(map(self._get_hashed, keys, hash_values)))
+
+    def remove_many(self, keys) -> None:
+        """
+        This method removes each of the given keys and its associated value
+        from the hash map. Keys that are not in the hash map are ignored.
+
+        Takes 'keys' (iterable of str) as parameter.
+
+        Returns None.
+        """
+
+        keys = list(keys)
+        hash_values = hash_keys(keys, self._hash_function)
+        for key, hash_value in zip(keys, hash_values):
+            self._remove_hashed(key, hash_value)
+
+    def upsert(self, key: str, function, default: object = None) -> object:
+        """
+        This method replaces the value of the given key with function(value).
+        If the key is not in the hash map, it is inserted with
+        function(default) as its value. The key is hashed once and its probe
+        sequence is walked once. If the function raises, the map is left
+        unchanged.
+
+        Takes 'key' (str), 'function' (callable), 'default' (object) as
+        parameters.
+
+        Returns the new value of the key.
+        """
 
-        # Otherwise, loop through and to find key at other possible indices.
-        else:
-            for j in range(1, self._buckets.length()): # Where 'j' starts at 1.
-                i = (index_value + j ** 2) % self._capacity  # Where 'i' represents index value w/quadratic probing, wrap around.
+        self._make_room()
+        return self._upsert_hashed(key, function, default, self._hash(key))
 
-                # If location is None, return.
-                if self._buckets[i] is None:
-                    return
+    def _upsert_hashed(self, key: str, function, default: object,
+                       hash_value: int) -> object:
+        """
+        Helper that upserts the key using an already computed hash value.
+        Does not check the load factor.
+        """
+        index_value, free_index = self._probe(key, hash_value)
+
+        # Update in place, do not increment size.
+        if index_value is not None:
+            the_entry = self._own_entry(index_value)
+            the_entry.value = function(the_entry.value)
+            return the_entry.value
+
+        # Insert into the first empty bucket or tombstone, increment size.
+        value = function(default)
+        self._fill(free_index, self._new_entry(key, value, hash_value))
+        self._size += 1
+        return value
 
-                # Check if key is located at possible indices, remove by
-                # setting tombstone.
-                elif self._buckets[i].key == key:
+    def increment(self, key: str, amount: object = 1) -> object:
+        """
+        This method adds 'amount' to the value of the given key, inserting
+        the key with 'amount' as its value if it is not in the hash map.
 
-                    # If the value there is already a tombstone, return (do nothing).
-                    if self._buckets[i].is_tombstone == True:
-                        return
+        Takes 'key' (str), 'amount' (number) as parameters.
 
-                    # Set tombstone status, decrement size.
-                    self._buckets.get_at_index(i).is_tombstone = True
-                    self._size -= 1
-                    return # Don't continue looping after setting tombstone.
+        Returns the new value of the key.
+        """
+
+        return self.upsert(key, lambda value: value + amount, 0)
 
+    def get_or_insert(self, key: str, default: object = None) -> object:
+        """
+        This method returns the value of the given key. If the key is not in
+        the hash map, it is inserted with 'default' as its value, which is
+        then returned (like dict.setdefault()).
+
+        Takes 'key' (str), 'default' (object) as parameters.
+
+        Returns the value of the key.
+        """
+
+        return self.upsert(key, UNCHANGED, default)
+
+    def pop(self, key: str, default: object = None) -> object:
+        """
+        This method removes the given key from the hash map and returns its
+        value. If the key is not in the hash map, nothing is removed and
+        'default' is returned.
+
+        Takes 'key' (str), 'default' (object) as parameters.
+
+        Returns the removed value, or 'default'.
+        """
+
+        the_entry = self._pop_entry(key, self._hash(key))
+        if the_entry is None:
+            return default
+        return the_entry.value
 
     def clear(self) -> None:
         """
@@ -382,10 +699,16 @@ class HashMap:
         Returns None.
         """
 
-        # Clear by setting new Hashmap and set prior buckets to new buckets.
-        new_hash = HashMap(self._capacity, self._hash_function)
-        self._buckets = new_hash._buckets
+        # Clear by replacing the buckets with empty ones, same capacity.
+        new_da = DynamicArray()
+        for _ in range(self._capacity):
+            new_da.append(None)
+        self._buckets = new_da
         self._size = 0 # Reset size.
+        self._tombstones = 0
+        self._shared = False
+        self._epoch = None
+        self._mod_count += 1
 
     def get_keys_and_values(self) -> DynamicArray:
         """
@@ -415,42 +738,748 @@ class HashMap:
 
         return new_da
 
+    def _entries(self):
+        """
+        Helper that yields every live entry in the table, skipping empty
+        buckets and tombstones. Raises RuntimeError if the map is
+        structurally changed (a key is added or removed, or the table is
+        rebuilt) while the iteration is running.
+        """
+        mod_count = self._mod_count
+        buckets = self._buckets
+        for i in range(buckets.length()):
+            the_bucket = buckets[i]
+            if the_bucket is not None and not the_bucket.is_tombstone:
+                yield the_bucket
+                if self._mod_count != mod_count:
+                    raise RuntimeError("hash map changed during iteration")
+
+    def _unshare(self) -> None:
+        """
+        Helper called before a bucket of the array is replaced. If the array
+        is shared with a snapshot, the map first switches to its own copy of
+        it. Only the references are copied, the entries stay shared.
+        """
+
+        if not self._shared:
+            return
+
+        buckets = self._buckets
+        self._buckets = DynamicArray([buckets[i]
+                                      for i in range(buckets.length())])
+        self._shared = False
+
+    def _own_entry(self, index: int,
+                   buckets: DynamicArray = None) -> HashEntry:
+        """
+        Helper called before the live entry at the index of the given buckets
+        (the map's own buckets by default) is changed in place. An entry
+        still shared with a snapshot is replaced by a copy of it first, so a
+        write copies only the entry it touches. Returns the entry to change.
+        """
+
+        if buckets is None:
+            buckets = self._buckets
+        the_entry = buckets[index]
+        if self._epoch is None or \
+                getattr(the_entry, 'epoch', None) is self._epoch:
+            return the_entry
+
+        if buckets is self._buckets:
+            self._unshare()
+            buckets = self._buckets
+        the_entry = self._new_entry(the_entry.key, the_entry.value,
+                                    the_entry.hash)
+        the_entry.epoch = self._epoch
+        buckets.set_at_index(index, the_entry)
+        return the_entry
+
+    def snapshot(self) -> "HashMap":
+        """
+        This method returns a copy of the hash map that shares its table
+        with the map instead of copying it. Whichever of the two is written
+        to copies only the entry it changes, the first time it changes it
+        (copy-on-write), so the snapshot keeps the contents the map had when
+        it was taken while writers carry on. Iterating over a snapshot is
+        never affected by writes to the map.
+
+        Takes no parameters.
+
+        Returns a HashMap.
+        """
+
+        # From now on neither map owns any entry, each marks the entries it
+        # copies with a new epoch of its own.
+        snapshot = copy.copy(self)
+        self._shared = snapshot._shared = True
+        self._epoch, snapshot._epoch = object(), object()
+        return snapshot
+
+    def keys(self):
+        """
+        This method yields each key in the hash map, one at a time, without
+        building an array of them.
+
+        Takes no parameters.
+
+        Returns a generator of keys.
+        """
+        for the_entry in self._entries():
+            yield the_entry.key
+
+    def values(self):
+        """
+        This method yields each value in the hash map, one at a time, without
+        building an array of them.
+
+        Takes no parameters.
+
+        Returns a generator of values.
+        """
+        for the_entry in self._entries():
+            yield the_entry.value
+
+    def items(self):
+        """
+        This method yields a (key, value) tuple for each key in the hash map,
+        one at a time, without building an array of them.
+
+        Takes no parameters.
+
+        Returns a generator of tuples.
+        """
+        for the_entry in self._entries():
+            yield the_entry.key, the_entry.value
+
     def __iter__(self):
         """
-        This method enables the hash map to iterate across itself.
+        This method enables the hash map to iterate across its live entries.
+        The position is kept in the returned generator rather than on the
+        map, so several iterations can run at the same time, and tombstones
+        are skipped.
+
+        Takes no parameters.
+
+        Returns a generator of HashEntry objects.
+        """
+        self._index = 0  # For the deprecated __next__().
+        return self._entries()
+
+    def __next__(self) -> HashEntry:
+        """
+        This method returns the next live entry of the hash map, keeping the
+        position on the map itself, so only one such iteration can run at a
+        time. It is deprecated: iterate over iter(map), keys(), values() or
+        items() instead.
+
+        Takes no parameters.
+
+        Returns a HashEntry.
+        """
+
+        warnings.warn("next() on a HashMap is deprecated, iterate over "
+                      "iter(map), keys(), values() or items() instead",
+                      DeprecationWarning, stacklevel=2)
+
+        # Skip empty buckets and tombstones, as iter(map) does.
+        while self._index < self._buckets.length():
+            the_bucket = self._buckets[self._index]
+            self._index += 1
+            if the_bucket is not None and not the_bucket.is_tombstone:
+                return the_bucket
+        raise StopIteration
+
+
+class RobinHoodHashMap(HashMap):
+    """
+    Open addressing HashMap that uses Robin Hood hashing instead of
+    quadratic probing. Probing is linear, and an entry being placed takes
+    the bucket of any entry that is closer to its home bucket than itself,
+    which keeps probe lengths close to each other. Because of that order, a
+    lookup can stop as soon as it meets an entry closer to home than the key
+    would be, so misses end early. Removal shifts the following entries back
+    by one bucket instead of leaving a tombstone.
+
+    Linear probing puts every key whose home bucket is taken into the same
+    run, and hash_function_1 and hash_function_2 give short keys small,
+    nearby values, which would merge into one run across the whole table.
+    The hash function is therefore wrapped by mixed_hash_function(), which
+    spreads the values over the whole table (siphash_24 and xxhash_64 are
+    used as they are).
+    """
+
+    def __init__(self, capacity: int, function) -> None:
+        """
+        Initialize new HashMap that uses Robin Hood hashing, with the hash
+        function mixed.
+        """
+        super().__init__(capacity, mixed_hash_function(function))
+
+    def _distance(self, index: int, hash_entry: HashEntry) -> int:
+        """
+        Helper that returns how far the entry at the given index is from its
+        home bucket.
+        """
+        capacity_bucket = self._buckets.length()
+        return (index - hash_entry.hash % capacity_bucket) % capacity_bucket
+
+    def _find_index(self, key: str, hash_value: int) -> int:
+        """
+        Helper that returns the index of the entry holding the key, or None if
+        the key is not in the hash map.
+        """
+
+        capacity_bucket = self._buckets.length()
+        index_value = hash_value % capacity_bucket
+
+        for distance in range(capacity_bucket):
+            i = (index_value + distance) % capacity_bucket
+            the_bucket = self._buckets[i]
+
+            # An empty bucket, or an entry closer to home than the key would
+            # be, means the key is not in the map.
+            if the_bucket is None or self._distance(i, the_bucket) < distance:
+                return None
+
+            if the_bucket.hash == hash_value and the_bucket.key == key:
+                return i
+
+        return None
+
+    def _find_entry(self, key: str, hash_value: int) -> HashEntry:
+        """
+        Helper that returns the entry holding the key, or None if the key is
+        not in the hash map.
+        """
+        index_value = self._find_index(key, hash_value)
+        if index_value is None:
+            return None
+        return self._buckets[index_value]
+
+    def _put_hashed(self, key: str, value: object, hash_value: int) -> None:
+        """
+        Helper that updates the key if it is present, and otherwise inserts
+        it with Robin Hood placement. Does not check the load factor.
+        """
+        index_value = self._find_index(key, hash_value)
+        if index_value is not None:
+            self._own_entry(index_value).value = value
+            return
+
+        self._reinsert(self._new_entry(key, value, hash_value))
+        self._size += 1
+
+    def _upsert_hashed(self, key: str, function, default: object,
+                       hash_value: int) -> object:
+        """
+        Helper that upserts the key with Robin Hood placement. Does not check
+        the load factor.
+        """
+        index_value = self._find_index(key, hash_value)
+        if index_value is not None:
+            the_entry = self._own_entry(index_value)
+            the_entry.value = function(the_entry.value)
+            return the_entry.value
+
+        value = function(default)
+        self._reinsert(self._new_entry(key, value, hash_value))
+        self._size += 1
+        return value
+
+    def _reinsert(self, hash_entry: HashEntry) -> None:
+        """
+        Helper that places an entry whose key is not in the table. Whenever
+        the entry being carried is further from home than the entry in the
+        bucket, the two swap and the displaced entry is carried on instead.
+        """
+
+        self._unshare()
+        capacity_bucket = self._buckets.length()
+        i = hash_entry.hash % capacity_bucket
+        distance = 0
+        self._mod_count += 1
+
+        while True:
+            the_bucket = self._buckets[i]
+            if the_bucket is None:
+                self._buckets.set_at_index(i, hash_entry)
+
+                # Entries with the same home bucket never swap, so keys
+                # chosen to collide push this distance past the limit.
+                if self._probe_limit is not None and \
+                        distance > self._probe_limit:
+                    self._flooded = True
+                return
+
+            bucket_distance = self._distance(i, the_bucket)
+            if bucket_distance < distance:
+                self._buckets.set_at_index(i, hash_entry)
+                hash_entry, distance = the_bucket, bucket_distance
+
+            i = (i + 1) % capacity_bucket
+            distance += 1
+
+    def _pop_entry(self, key: str, hash_value: int) -> HashEntry:
+        """
+        Helper that removes the key, then shifts every following entry that
+        is not in its home bucket back by one, so no tombstone is needed.
+        Returns the removed entry, or None if the key is not in the map.
+        """
+        self._unshare()
+
+        index_value = self._find_index(key, hash_value)
+        if index_value is None:
+            return None
+
+        the_entry = self._buckets[index_value]
+        capacity_bucket = self._buckets.length()
+        hole = index_value
+        i = (hole + 1) % capacity_bucket
+        while self._buckets[i] is not None and \
+                self._distance(i, self._buckets[i]) > 0:
+            self._buckets.set_at_index(hole, self._buckets[i])
+            hole = i
+            i = (i + 1) % capacity_bucket
+
+        self._buckets.set_at_index(hole, None)
+        self._size -= 1
+        self._mod_count += 1
+        return the_entry
+
+    def get_max_probe_length(self) -> int:
+        """
+        This method returns the largest distance between an entry and its
+        home bucket, which bounds the length of every lookup.
 
         Takes no parameters.
 
-        Returns self.
+        Returns an integer.
+        """
+
+        longest = 0
+        for i in range(self._buckets.length()):
+            the_bucket = self._buckets[i]
+            if the_bucket is not None:
+                longest = max(longest, self._distance(i, the_bucket))
+        return longest
+
+
+class PowerOfTwoHashMap(HashMap):
+    """
+    Open addressing HashMap whose capacity is always a power of two, so the
+    home bucket of a hash is its low bits, found with a mask instead of a
+    division, and no resize has to search for a prime. Quadratic probing
+    only reaches every bucket of a prime sized table, so the probe sequence
+    is triangular instead (home, +1, +3, +6, ...), which reaches every bucket
+    of a power of two sized table. The hash function is wrapped by
+    mixed_hash_function(), so the low bits depend on the whole hash.
+    """
+
+    def __init__(self, capacity: int, function) -> None:
+        """
+        Initialize new HashMap with a power of two capacity, the smallest one
+        at least 'capacity'.
+        """
+        super().__init__(1, mixed_hash_function(function))
+        self._capacity = self._round_capacity(capacity)
+        self._buckets = DynamicArray()
+        for _ in range(self._capacity):
+            self._buckets.append(None)
+
+    def _round_capacity(self, capacity: int) -> int:
+        """
+        Helper that rounds a capacity up to the next power of two.
+        """
+        return 1 << max(capacity - 1, 0).bit_length()
+
+    def _probe(self, key: str, hash_value: int,
+               buckets: DynamicArray = None) -> (int, int):
+        """
+        Helper that walks the triangular probe sequence of the key, the same
+        as HashMap._probe() otherwise.
         """
 
-        # Define and initialize index, used in __next()__.
-        self._index = 0
+        if buckets is None:
+            buckets = self._buckets
+
+        mask = buckets.length() - 1
+        i = hash_value & mask
+        free_index = None
+
+        for j in range(mask + 1):
+            the_bucket = buckets[i]
+
+            # An empty bucket ends the probe, the key is not in the map.
+            if the_bucket is None:
+                if free_index is None:
+                    free_index = i
+                return None, free_index
+
+            # Tombstones may be reused, but the key could still be further on.
+            if the_bucket.is_tombstone:
+                if free_index is None:
+                    free_index = i
+
+            # Only compare keys when the stored hashes match.
+            elif the_bucket.hash == hash_value and the_bucket.key == key:
+                return i, free_index
+
+            i = (i + j + 1) & mask  # Triangular probing, wrap around.
+
+        return None, free_index
 
-        return self
+    def _probe_length(self, index: int, hash_value: int) -> int:
+        """
+        Helper that returns how many steps of the triangular probe sequence
+        of the hash value lead to the index, counting at most one more than
+        the probe limit.
+        """
+
+        mask = self._buckets.length() - 1
+        i = hash_value & mask
+        for j in range(self._probe_limit + 1):
+            if i == index:
+                return j
+            i = (i + j + 1) & mask
+        return self._probe_limit + 1
+
+    def _reinsert(self, hash_entry: HashEntry) -> None:
+        """
+        Helper that moves a live entry to the first empty bucket of its
+        triangular probe sequence in a table without tombstones.
+        """
+
+        mask = self._buckets.length() - 1
+        i = hash_entry.hash & mask
+        j = 0
+        while self._buckets[i] is not None:
+            j += 1
+            i = (i + j) & mask
+        self._buckets.set_at_index(i, hash_entry)
+
+
+# Marks an old bucket whose entry was moved during an incremental resize. It
+# is a tombstone, so probe sequences in the old table keep going past it.
+_MIGRATED = HashEntry(None, None)
+_MIGRATED.is_tombstone = True
+
+
+class IncrementalHashMap(HashMap):
+    """
+    Open addressing HashMap that spreads each automatic resize over the
+    operations that follow it. When the load factor reaches 0.5, a new table
+    is allocated and the old one is kept; every later operation moves at most
+    'migrate_step' old buckets into the new table, and lookups consult both
+    tables until the migration is over.
+    """
+
+    def __init__(self, capacity: int, function, migrate_step: int = 4) -> None:
+        """
+        Initialize new HashMap that resizes incrementally, moving at most
+        'migrate_step' old buckets per operation.
+        """
+        super().__init__(capacity, function)
+        self._migrate_step = max(1, migrate_step)
+        self._old_buckets = None
+        self._migrate_index = 0
+        self._iterating = 0
 
-    def __next__(self):
+    def is_resizing(self) -> bool:
         """
-        This method will return the next item in the hash map, iterating over
-        the active items.
+        This method returns True while an incremental resize is in progress.
 
         Takes no parameters.
 
-        Returns value.
+        Returns bool.
+        """
+        return self._old_buckets is not None
+
+    def _start_resize(self, new_capacity: int) -> None:
+        """
+        Helper that allocates the new table and keeps the current one as the
+        old table to migrate from. Migrated slots of the old table are
+        overwritten, so the map needs its own array of it; entries shared
+        with a snapshot keep their epoch in either table.
+        """
+        self._unshare()
+
+        # Finish a migration that is still running, only two tables coexist.
+        self._migrate(None)
+
+        new_capacity = self._round_capacity(new_capacity)
+
+        self._old_buckets = self._buckets
+        self._migrate_index = 0
+        self._capacity = new_capacity
+        self._tombstones = 0
+        self._mod_count += 1
+        self._buckets = DynamicArray()
+        for _ in range(new_capacity):
+            self._buckets.append(None)
+
+    def _migrate(self, count) -> None:
+        """
+        Helper that moves up to 'count' old buckets (all of them if count is
+        None) into the new table, using the hash stored in each entry. Steps
+        wait while an iteration is running, so it never sees a entry twice.
         """
 
-        # Based on an exploration in our class.
+        old_buckets = self._old_buckets
+        if old_buckets is None or \
+                (count is not None and self._iterating > 0):
+            return
+
+        if count is None:
+            count = old_buckets.length()
+
+        while count > 0 and self._migrate_index < old_buckets.length():
+            the_bucket = old_buckets[self._migrate_index]
+            if the_bucket is not None and not the_bucket.is_tombstone:
+                free_index = self._probe(the_bucket.key, the_bucket.hash)[1]
+                self._fill(free_index, the_bucket)
+                old_buckets[self._migrate_index] = _MIGRATED
+            self._migrate_index += 1
+            count -= 1
+
+        # Drop the old table once every bucket has been moved.
+        if self._migrate_index == old_buckets.length():
+            self._old_buckets = None
+
+    def _old_entry(self, key: str, hash_value: int) -> HashEntry:
+        """
+        Helper that returns the live entry holding the key in the old table,
+        or None when there is no old table or the key is not in it.
+        """
+        if self._old_buckets is None:
+            return None
+        index_value = self._probe(key, hash_value, self._old_buckets)[0]
+        if index_value is None:
+            return None
+        return self._old_buckets[index_value]
+
+    def _own_old_entry(self, key: str, hash_value: int) -> HashEntry:
+        """
+        Helper that returns the live entry holding the key in the old table,
+        copied first if it is still shared with a snapshot (see _own_entry()),
+        or None when there is no old table or the key is not in it.
+        """
+        if self._old_buckets is None:
+            return None
+        index_value = self._probe(key, hash_value, self._old_buckets)[0]
+        if index_value is None:
+            return None
+        return self._own_entry(index_value, self._old_buckets)
+
+    def _make_room(self) -> None:
+        """
+        Helper called before anything is inserted. When the load factor
+        reaches 0.5, the table is doubled incrementally instead of being
+        rebuilt inside this call.
+        """
+        self._rehash_if_flooded()
+        self._migrate(self._migrate_step)
+        if self.table_load() >= 0.5:
+            self._start_resize(self._capacity * 2)
+
+    def _put_hashed(self, key: str, value: object, hash_value: int) -> None:
+        """
+        Helper that updates the key in the old table if it still lives
+        there, and otherwise places it in the new table.
+        """
+        the_entry = self._own_old_entry(key, hash_value)
+        if the_entry is not None:
+            the_entry.value = value
+            return
+        super()._put_hashed(key, value, hash_value)
+
+    def _upsert_hashed(self, key: str, function, default: object,
+                       hash_value: int) -> object:
+        """
+        Helper that upserts the key in the old table if it still lives
+        there, and otherwise in the new table.
+        """
+        the_entry = self._own_old_entry(key, hash_value)
+        if the_entry is not None:
+            the_entry.value = function(the_entry.value)
+            return the_entry.value
+        return super()._upsert_hashed(key, function, default, hash_value)
+
+    def _pop_entry(self, key: str, hash_value: int) -> HashEntry:
+        """
+        Helper that removes the key from the old table if it still lives
+        there, and otherwise from the new table. Tombstones left in the old
+        table are not counted, they are dropped once the migration ends.
+        """
+        the_entry = self._own_old_entry(key, hash_value)
+        if the_entry is not None:
+            the_entry.is_tombstone = True
+            self._size -= 1
+            self._mod_count += 1
+            return the_entry
+        return super()._pop_entry(key, hash_value)
+
+    def _find_entry(self, key: str, hash_value: int) -> HashEntry:
+        """
+        Helper that returns the live entry holding the key from either table,
+        or None if the key is not in the hash map.
+        """
+        the_entry = super()._find_entry(key, hash_value)
+        if the_entry is None:
+            the_entry = self._old_entry(key, hash_value)
+        return the_entry
+
+    def get(self, key: str) -> object:
+        """
+        This method returns the value associated with the given key, or None
+        if the key is not in the hash map. Both tables are consulted while a
+        resize is in progress.
+
+        Takes 'key' (str) as a parameter.
+
+        Returns an object (value of given key).
+        """
+        self._migrate(self._migrate_step)
+        return super().get(key)
+
+    def contains_key(self, key: str) -> bool:
+        """
+        This method returns True if the given key is in the hash map, otherwise
+        it returns False. Both tables are consulted while a resize is in
+        progress.
+
+        Takes 'key' (str) as parameter.
+
+        Returns bool.
+        """
+        self._migrate(self._migrate_step)
+        return super().contains_key(key)
+
+    def remove(self, key: str) -> None:
+        """
+        This method removes the given key and its associated value from
+        whichever table holds it. If the key is not in the hash map, the
+        method does nothing.
+
+        Takes 'key' (str) as parameter.
+
+        Returns None.
+        """
+        self._migrate(self._migrate_step)
+        super().remove(key)
+
+    def pop(self, key: str, default: object = None) -> object:
+        """
+        This method removes the given key from whichever table holds it and
+        returns its value. If the key is not in the hash map, 'default' is
+        returned.
+
+        Takes 'key' (str), 'default' (object) as parameters.
+
+        Returns the removed value, or 'default'.
+        """
+        self._migrate(self._migrate_step)
+        return super().pop(key, default)
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        This method changes the capacity of the internal hash table right
+        away. A resize that is in progress is finished first.
+
+        Takes 'new_capacity' (int) as parameter.
+
+        Returns None.
+        """
+        self._migrate(None)
+        super().resize_table(new_capacity)
+
+    def clear(self) -> None:
+        """
+        This method clears the contents of the hash map, dropping an old
+        table that is still being migrated. It does not change the underlying
+        table capacity.
+
+        Takes no parameters.
+
+        Returns None.
+        """
+        self._old_buckets = None
+        self._migrate_index = 0
+        super().clear()
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        This method returns a dynamic array where each index contains a tuple
+        of a key/value pair stored in either table.
+
+        Takes no parameters.
+
+        Returns dynamic array.
+        """
+
+        new_da = super().get_keys_and_values()
+        if self._old_buckets is not None:
+            for i in range(self._migrate_index, self._old_buckets.length()):
+                the_bucket = self._old_buckets[i]
+                if the_bucket is not None and not the_bucket.is_tombstone:
+                    new_da.append((the_bucket.key, the_bucket.value))
+        return new_da
+
+    def _entries(self):
+        """
+        Helper that yields the live entries of the old buckets that are not
+        migrated yet, then every live entry of the new table, without
+        finishing the resize. Migration steps wait until the iteration is
+        over (or the iterator is dropped), so reads made meanwhile do not
+        move entries. Raises RuntimeError if the map is structurally changed
+        while the iteration is running.
+        """
+        self._iterating += 1
         try:
-            # Iterate over the active items.
-            while self._buckets[self._index] is None:
-                self._index = self._index + 1 # Increment when None.
-            value = self._buckets[self._index] # Define value.
-        except DynamicArrayException:
-            raise StopIteration
+            mod_count = self._mod_count
+            tables = ((self._old_buckets, self._migrate_index),
+                      (self._buckets, 0))
+            for buckets, first in tables:
+                if buckets is None:
+                    continue
+                for i in range(first, buckets.length()):
+                    the_bucket = buckets[i]
+                    if the_bucket is not None and \
+                            not the_bucket.is_tombstone:
+                        yield the_bucket
+                        if self._mod_count != mod_count:
+                            raise RuntimeError(
+                                "hash map changed during iteration")
+        finally:
+            self._iterating -= 1
+
+    def reseed(self, seed: int = None, function=None) -> None:
+        """
+        This method re-seeds the hash map the same as HashMap.reseed(). A
+        resize that is in progress is finished first, the rebuilt table
+        replaces both tables.
 
-        self._index = self._index + 1
+        Takes 'seed' (int, random by default), 'function' (siphash_24,
+        xxhash_64 or their name) as parameters.
 
-        return value
+        Returns None.
+        """
+        self._migrate(None)
+        super().reseed(seed, function)
+
+    def snapshot(self) -> "IncrementalHashMap":
+        """
+        This method returns a copy-on-write copy of the hash map, the same as
+        HashMap.snapshot(). A resize that is in progress is finished first,
+        so the two maps only ever share one table.
+
+        Takes no parameters.
+
+        Returns an IncrementalHashMap.
+        """
+        self._migrate(None)
+        snapshot = super().snapshot()
+        snapshot._iterating = 0  # Iterations of this map are not its own.
+        return snapshot
 
 
 # ------------------- BASIC TESTING ---------------------------------------- #
@@ -661,3 +1690,116 @@ if __name__ == "__main__":
     # print(m)
     # for item in m:
     #     print('K:', item.key, 'V:', item.value)
+
+    print("\nput_many(), get_many(), remove_many() example 1")
+    print("-----------------------------------------------")
+    m = HashMap(11, hash_function_2)
+    m.put_many((str(i), i * 10) for i in range(100))
+    print(m.get_size(), m.get_capacity())
+    print(m.get_many(['1', '50', '99', '100']))
+    m.remove_many(str(i) for i in range(0, 100, 2))
+    print(m.get_size(), m.get_many(['1', '50', '99', '100']))
+
+    print("\nIncrementalHashMap example 1")
+    print("----------------------------")
+    m = IncrementalHashMap(11, hash_function_1, migrate_step=2)
+    for i in range(40):
+        m.put('key' + str(i), i)
+        if i % 10 == 9:
+            print(m.is_resizing(), m.get_size(), m.get_capacity(), m.get('key0'))
+
+    print("\ncompact() example 1")
+    print("-------------------")
+    m = HashMap(53, hash_function_1)
+    m.set_tombstone_threshold(None)
+    for i in range(20):
+        m.put('key' + str(i), i)
+    for i in range(15):
+        m.remove('key' + str(i))
+    print(m.get_size(), m.get_tombstone_count(), m.empty_buckets())
+    m.compact()
+    print(m.get_size(), m.get_tombstone_count(), m.empty_buckets())
+
+    print("\nkeys(), values(), items() example 1")
+    print("----------------------------------")
+    m = IncrementalHashMap(11, hash_function_1, migrate_step=1)
+    for i in range(8):
+        m.put(str(i), i * 10)
+    m.remove('3')
+    print(m.is_resizing(), sorted(m.keys()), sum(m.values()))
+    print(sorted(m.items())[:3], len(list(m)))
+
+    print("\nRobinHoodHashMap example 1")
+    print("--------------------------")
+    m = RobinHoodHashMap(11, hash_function_1)
+    for i in range(20):
+        m.put('key' + str(i), i)
+    m.remove('key3')
+    print(m.get_size(), m.get_capacity(), m.get_max_probe_length())
+    print(m.get('key4'), m.contains_key('key3'), m.get_tombstone_count())
+
+    print("\nRobinHoodHashMap example 2")
+    print("--------------------------")
+    # Short keys give hash_function_1 values in a narrow range. Mixed, they
+    # spread over the whole table instead of forming one long run, so the
+    # longest probe stays short (only keys with equal hashes share a run).
+    import random
+    import string
+    rnd = random.Random(1)
+    keys = {''.join(rnd.choices(string.ascii_lowercase, k=12))
+            for _ in range(2000)}
+    for function in (hash_function_1, hash_function_2):
+        m = RobinHoodHashMap(4001, function)
+        for key in keys:
+            m.put(key, 1)
+        assert m.get_max_probe_length() < 128, m.get_max_probe_length()
+        print(m._hash_function.__name__, m.get_max_probe_length())
+
+    print("\nupsert(), increment(), get_or_insert(), pop() example 1")
+    print("-------------------------------------------------------")
+    m = HashMap(11, hash_function_1)
+    for word in "the cat and the dog and the bird".split():
+        m.increment(word)
+    print(m.get('the'), m.get('and'), m.get('cat'))
+    print(m.upsert('cat', lambda count: count * 10), m.upsert('fox', len, 'abc'))
+    print(m.get_or_insert('dog', 0), m.get_or_insert('owl', []))
+    print(m.pop('the'), m.pop('the', 'gone'), m.get_size())
+
+    print("\nsnapshot() example 1")
+    print("--------------------")
+    m = HashMap(11, hash_function_1)
+    for i in range(5):
+        m.put(str(i), i)
+    snapshot = m.snapshot()
+    for key in snapshot.keys():
+        m.remove(key)
+        m.put(key + '!', 0)
+    print(sorted(snapshot.items()), sorted(m.keys()))
+    try:
+        for key in m.keys():
+            m.remove(key)
+    except RuntimeError as error:
+        print(error)
+
+    print("\nset_probe_limit(), reseed() example 1")
+    print("-------------------------------------")
+    import itertools
+    # Every permutation of the same letters has the same hash_function_1
+    # value, so without the probe limit they would all share one probe
+    # sequence.
+    m = HashMap(11, hash_function_1)
+    for i, word in enumerate(itertools.permutations('abcdefg')):
+        m.put(''.join(word), i)
+    print(m.get_size(), m.get('gfedcba'), m._hash_function.__name__[:10])
+    m.reseed(1)
+    print(m._hash_function.__name__, m.get('gfedcba'))
+
+    print("\nPowerOfTwoHashMap example 1")
+    print("---------------------------")
+    m = PowerOfTwoHashMap(20, hash_function_1)
+    print(m.get_capacity(), m._hash_function.__name__)
+    for i in range(100):
+        m.put('str' + str(i), i)
+    print(m.get_size(), m.get_capacity(), m.get('str42'), m.table_load())
+    m.resize_table(300)
+    print(m.get_capacity(), m.get('str42'), m.contains_key('str100'))
@@ -0,0 +1,469 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 (Portfolio)
+# Description: An open addressing HashMap with the same interface and the
+# same quadratic probing as hash_map_oa.HashMap, but with a compact storage
+# layout. Instead of one HashEntry object per bucket, the table is made of
+# parallel flat arrays: the stored hash of each slot, its key, its value and
+# one state byte (empty, live or tombstone). No per-entry objects are
+# allocated, and stored hashes let probing skip key comparisons and let
+# resize_table() redistribute slots without rehashing any key.
+
+from array import array
+
+from a6_include import DynamicArray, hash_function_1, hash_function_2
+from hash_engine import fast_path, hash_keys, next_prime
+
+
+# Slot states kept in the state byte array.
+EMPTY = 0
+LIVE = 1
+TOMBSTONE = 2
+
+# Stored hashes are reduced to 64 bits so they fit the hash array.
+HASH_MASK = 0xFFFFFFFFFFFFFFFF
+
+
+class HashMap:
+    def __init__(self, capacity: int, function) -> None:
+        """
+        Initialize new HashMap that uses quadratic probing for collision
+        resolution, stored in parallel flat arrays
+        """
+
+        # capacity must be a prime number
+        self._capacity = next_prime(capacity)
+        self._allocate(self._capacity)
+
+        self._hash_function = function
+        self._size = 0
+
+        # Tombstones currently in the table, and the fraction of the capacity
+        # they may take up before remove() compacts the table.
+        self._tombstones = 0
+        self._tombstone_threshold = 0.25
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide the same output as the
+        HashEntry based map
+        """
+        out = ''
+        for i in range(self._capacity):
+            state = self._states[i]
+            if state == EMPTY:
+                entry = 'None'
+            else:
+                entry = (f"K: {self._keys[i]} V: {self._values[i]} "
+                         f"TS: {state == TOMBSTONE}")
+            out += str(i) + ': ' + entry + '\n'
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Helper that creates empty parallel arrays with the given capacity.
+        """
+        self._hashes = array('Q', bytes(8 * capacity))
+        self._keys = [None] * capacity
+        self._values = [None] * capacity
+        self._states = bytearray(capacity)
+
+    def _hash(self, key: str) -> int:
+        """
+        Helper that hashes the key with the map's hash function, using the
+        per-key fast path from hash_engine when one exists.
+        """
+        return fast_path(self._hash_function)(key) & HASH_MASK
+
+    def _probe(self, key: str, hash_value: int) -> (int, int):
+        """
+        Helper that walks the quadratic probe sequence of the key. Returns the
+        index of the live slot holding the key (None if the key is absent),
+        and the first index where the key could be placed, which is either the
+        first tombstone or the empty slot that ended the probe.
+        """
+
+        capacity = self._capacity
+        states, hashes, keys = self._states, self._hashes, self._keys
+        index_value = hash_value % capacity
+        free_index = None
+
+        for j in range(capacity):
+            i = (index_value + j * j) % capacity  # Quadratic probing, wrap around.
+            state = states[i]
+
+            # An empty slot ends the probe, the key is not in the map.
+            if state == EMPTY:
+                if free_index is None:
+                    free_index = i
+                return None, free_index
+
+            # Tombstones may be reused, but the key could still be further on.
+            if state == TOMBSTONE:
+                if free_index is None:
+                    free_index = i
+
+            # Only compare keys when the stored hashes match.
+            elif hashes[i] == hash_value and keys[i] == key:
+                return i, free_index
+
+        return None, free_index
+
+    def _place(self, index: int, key: str, value: object,
+               hash_value: int) -> None:
+        """
+        Helper that writes a live slot at the given index.
+        """
+        self._hashes[index] = hash_value
+        self._keys[index] = key
+        self._values[index] = value
+        self._states[index] = LIVE
+
+    def put(self, key: str, value: object) -> None:
+        """
+        This method updates the key/value pair in the hash map. If the given
+        key already exists in the hash map, its associated value is replaced
+        by the new value in place. If the given key is not in the hash map, a
+        new key/value pair is added.
+
+        Takes 'key' (str), 'value' (object) as parameters.
+
+        Returns None.
+        """
+
+        # Resize to double its current capacity when called and if current
+        # load factor is >= 0.5.
+        if self.table_load() >= 0.5:
+            self.resize_table(self._capacity * 2)
+
+        self._put_hashed(key, value, self._hash(key))
+
+    def _put_hashed(self, key: str, value: object, hash_value: int) -> None:
+        """
+        Helper that places the key/value pair using an already computed hash
+        value. Does not check the load factor.
+        """
+
+        index_value, free_index = self._probe(key, hash_value)
+
+        # Update in place, do not increment size.
+        if index_value is not None:
+            self._values[index_value] = value
+            return
+
+        # Insert into the first empty slot or tombstone, increment size.
+        if self._states[free_index] == TOMBSTONE:
+            self._tombstones -= 1
+        self._place(free_index, key, value, hash_value)
+        self._size += 1
+
+    def table_load(self) -> float:
+        """
+        This method returns the current hash table load factor.
+
+        Takes no parameters.
+
+        Returns the current hash table load factor.
+        """
+        return self._size / self._capacity
+
+    def empty_buckets(self) -> int:
+        """
+        This method returns the number of empty slots in the hash table.
+
+        Takes no parameters.
+
+        Returns an integer.
+        """
+        return self._states.count(EMPTY)
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        This method changes the capacity of the internal hash table. All live
+        key/value pairs remain in the new hash map and are redistributed with
+        their stored hashes, so no key is rehashed. Tombstones are dropped.
+
+        Takes 'new_capacity' (int) as parameter.
+
+        Returns None.
+        """
+
+        # Return if the capacity is less than the size.
+        if new_capacity < self._size:
+            return
+
+        # Round the new capacity up to the next prime, from the prime table.
+        new_capacity = next_prime(new_capacity)
+
+        # Keep doubling while the live entries would reach a load factor of
+        # 0.5, the same capacity put() would have grown the table to.
+        while self._size > 0 and (self._size - 1) / new_capacity >= 0.5:
+            new_capacity = next_prime(new_capacity * 2)
+
+        # Save the old arrays, so we may loop over them.
+        old_hashes, old_keys = self._hashes, self._keys
+        old_values, old_states = self._values, self._states
+
+        self._capacity = new_capacity
+        self._tombstones = 0
+        self._allocate(new_capacity)
+
+        # Every live key is unique, so each one goes to the first empty slot
+        # of its probe sequence.
+        states = self._states
+        for i in range(len(old_states)):
+            if old_states[i] != LIVE:
+                continue
+            hash_value = old_hashes[i]
+            index_value = hash_value % new_capacity
+            j = 0
+            slot = index_value
+            while states[slot] != EMPTY:
+                j += 1
+                slot = (index_value + j * j) % new_capacity
+            self._place(slot, old_keys[i], old_values[i], hash_value)
+
+    def get(self, key: str) -> object:
+        """
+        This method returns the value associated with the given key. If the key
+        is not in the hash map, the method returns None.
+
+        Takes 'key' (str) as a parameter.
+
+        Returns an object (value of given key).
+        """
+        return self._get_hashed(key, self._hash(key))
+
+    def _get_hashed(self, key: str, hash_value: int) -> object:
+        """
+        Helper that looks up the key using an already computed hash value.
+        """
+        index_value = self._probe(key, hash_value)[0]
+        if index_value is None:
+            return None
+        return self._values[index_value]
+
+    def contains_key(self, key: str) -> bool:
+        """
+        This method returns True if the given key is in the hash map, otherwise
+        it returns False. An empty hash map does not contain any keys.
+
+        Takes 'key' (str) as parameter.
+
+        Returns bool.
+        """
+        return self._probe(key, self._hash(key))[0] is not None
+
+    def remove(self, key: str) -> None:
+        """
+        This method removes the given key and its associated value from the
+        hash map. If the key is not in the hash map, the method does nothing.
+
+        Takes 'key' (str) as parameter.
+
+        Returns None.
+        """
+        self._remove_hashed(key, self._hash(key))
+
+    def _remove_hashed(self, key: str, hash_value: int) -> None:
+        """
+        Helper that removes the key using an already computed hash value.
+        The slot becomes a tombstone and its value is released. Its key is
+        kept, so __str__() shows the tombstone the same as the HashEntry
+        based map does.
+        """
+
+        index_value = self._probe(key, hash_value)[0]
+        if index_value is None:
+            return
+
+        self._states[index_value] = TOMBSTONE
+        self._values[index_value] = None
+        self._size -= 1
+        self._tombstones += 1
+
+        # Compact once tombstones take up too much of the table.
+        threshold = self._tombstone_threshold
+        if threshold is not None and \
+                self._tombstones / self._capacity >= threshold:
+            self.compact()
+
+    def compact(self) -> None:
+        """
+        This method rebuilds the hash table at its current capacity, dropping
+        every tombstone so probe sequences only go over live slots.
+
+        Takes no parameters.
+
+        Returns None.
+        """
+        self.resize_table(self._capacity)
+
+    def get_tombstone_count(self) -> int:
+        """
+        This method returns the number of tombstones in the hash table.
+
+        Takes no parameters.
+
+        Returns an integer.
+        """
+        return self._tombstones
+
+    def set_tombstone_threshold(self, threshold: float) -> None:
+        """
+        This method sets the fraction of the capacity that tombstones may take
+        up before remove() compacts the table. None turns automatic
+        compaction off.
+
+        Takes 'threshold' (float or None) as parameter.
+
+        Returns None.
+        """
+        self._tombstone_threshold = threshold
+
+    def clear(self) -> None:
+        """
+        This method clears the contents of the hash map. It does not change
+        the underlying table capacity.
+
+        Takes no parameters.
+
+        Returns None.
+        """
+        self._allocate(self._capacity)
+        self._size = 0
+        self._tombstones = 0
+
+    def put_many(self, pairs) -> None:
+        """
+        This method updates the hash map with every key/value pair in the
+        given iterable, as if put() was called for each one in order. The
+        table is resized at most once, up front, and all keys are hashed in
+        one batch.
+
+        Takes 'pairs' (iterable of (key, value) tuples) as parameter.
+
+        Returns None.
+        """
+
+        pairs = list(pairs)
+        keys = [pair[0] for pair in pairs]
+
+        # Presize once so the load factor stays below 0.5 for the whole batch.
+        needed = self._size + len(pairs)
+        if needed / self._capacity >= 0.5:
+            self.resize_table(needed * 2)
+
+        hash_values = hash_keys(keys, self._hash_function)
+        for (key, value), hash_value in zip(pairs, hash_values):
+            self._put_hashed(key, value, hash_value & HASH_MASK)
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        This method returns the values associated with each of the given keys,
+        in the same order. Keys that are not in the hash map give None.
+
+        Takes 'keys' (iterable of str) as parameter.
+
+        Returns a dynamic array.
+        """
+
+        keys = list(keys)
+        hash_values = [hash_value & HASH_MASK for hash_value
+                       in hash_keys(keys, self._hash_function)]
+        return DynamicArray(list(map(self._get_hashed, keys, hash_values)))
+
+    def remove_many(self, keys) -> None:
+        """
+        This method removes each of the given keys and its associated value
+        from the hash map. Keys that are not in the hash map are ignored.
+
+        Takes 'keys' (iterable of str) as parameter.
+
+        Returns None.
+        """
+
+        keys = list(keys)
+        hash_values = hash_keys(keys, self._hash_function)
+        for key, hash_value in zip(keys, hash_values):
+            self._remove_hashed(key, hash_value & HASH_MASK)
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        This method returns a dynamic array where each index contains a tuple
+        of a key/value pair stored in the hash map. The order of the keys in
+        the dynamic array does not matter.
+
+        Takes no parameters.
+
+        Returns dynamic array.
+        """
+
+        states, keys, values = self._states, self._keys, self._values
+        return DynamicArray([(keys[i], values[i])
+                             for i in range(self._capacity)
+                             if states[i] == LIVE])
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nPDF - put example 1")
+    print("-------------------")
+    m = HashMap(53, hash_function_1)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+
+    print("\nPDF - put example 2")
+    print("-------------------")
+    m = HashMap(41, hash_function_2)
+    for i in range(50):
+        m.put('str' + str(i // 3), i * 100)
+        if i % 10 == 9:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+
+    print("\nPDF - contains_key example 2")
+    print("----------------------------")
+    m = HashMap(79, hash_function_2)
+    keys = [i for i in range(1, 1000, 20)]
+    for key in keys:
+        m.put(str(key), key * 42)
+    print(m.get_size(), m.get_capacity())
+    result = True
+    for key in keys:
+        # all inserted keys must be present
+        result &= m.contains_key(str(key))
+        # NOT inserted keys must be absent
+        result &= not m.contains_key(str(key + 1))
+    print(result)
+
+    print("\nPDF - get_keys_and_values example 1")
+    print("------------------------")
+    m = HashMap(11, hash_function_2)
+    for i in range(1, 6):
+        m.put(str(i), str(i * 10))
+    print(m.get_keys_and_values())
+
+    m.resize_table(2)
+    print(m.get_keys_and_values())
+
+    m.put('20', '200')
+    m.remove('1')
+    m.resize_table(12)
+    print(m.get_keys_and_values())
@@ -10,11 +10,132 @@
 # Additionally, a function outside the class is designed to find the mode and
 # frequency of items in a dynamic array.
 
-from a6_include import (DynamicArray, LinkedList,
+import bisect
+import copy
+
+from a6_include import (DynamicArray, LinkedList, SLNode,
                         hash_function_1, hash_function_2)
+from hash_engine import (UNCHANGED, hash_key, hash_keys, is_seedable,
+                         mixed_hash_function, next_prime,
+                         seeded_hash_function)
+
+
+# A chain that grows past TREEIFY_THRESHOLD nodes becomes a SortedBucket, and
+# a SortedBucket that shrinks to UNTREEIFY_THRESHOLD nodes becomes a chain
+# again. The gap keeps a bucket from switching back and forth.
+TREEIFY_THRESHOLD = 8
+UNTREEIFY_THRESHOLD = 6
+
+
+class SortedBucket:
+    """
+    Bucket for a chain that has grown past TREEIFY_THRESHOLD nodes, which only
+    happens when many keys collide. It has the interface of LinkedList
+    (insert, remove, contains, length, iterator) but keeps its nodes in an
+    array sorted by stored hash, then key, so given the hash of a key,
+    contains() and remove() are a binary search that mostly compares
+    integers instead of a walk down the chain. Without the hash they fall
+    back to a walk over the array. Every change builds new arrays and swaps
+    them in with one assignment, so a reader that takes no lock never sees
+    half a change.
+    """
+
+    def __init__(self, nodes=()) -> None:
+        """
+        Initialize the bucket with the given nodes, which keep their stored
+        hash values.
+        """
+        nodes = sorted(nodes, key=lambda node: (node.hash, node.key))
+        self._arrays = ([(node.hash, node.key) for node in nodes], nodes)
+
+    def __str__(self) -> str:
+        """
+        Override string method to print the bucket like a LinkedList.
+        """
+        return 'SLL [' + ' -> '.join(map(str, self._arrays[1])) + ']'
+
+    def __iter__(self):
+        """
+        Return an iterator over the nodes, in (hash, key) order.
+        """
+        return iter(self._arrays[1])
+
+    def _find_index(self, key: str, hash_value: int = None) -> int:
+        """
+        Helper that returns the index of the node with matching key, or None
+        if no match.
+        """
+        sort_keys, nodes = self._arrays
+        if hash_value is None:
+            for index, node in enumerate(nodes):
+                if node.key == key:
+                    return index
+            return None
+        index = bisect.bisect_left(sort_keys, (hash_value, key))
+        if index < len(sort_keys) and sort_keys[index] == (hash_value, key):
+            return index
+        return None
+
+    def insert(self, key: str, value: object, hash_value: int) -> None:
+        """
+        Insert a new node for a key that is not in the bucket, storing its
+        hash value.
+        """
+        sort_keys, nodes = self._arrays
+        node = SLNode(key, value)
+        node.hash = hash_value
+        index = bisect.bisect_left(sort_keys, (hash_value, key))
+        sort_keys, nodes = sort_keys.copy(), nodes.copy()
+        sort_keys.insert(index, (hash_value, key))
+        nodes.insert(index, node)
+        self._arrays = (sort_keys, nodes)
+
+    def remove(self, key: str, hash_value: int = None) -> bool:
+        """
+        Remove the node with matching key.
+        Return True if removal was successful, False otherwise.
+        """
+        index = self._find_index(key, hash_value)
+        if index is None:
+            return False
+        sort_keys, nodes = self._arrays
+        sort_keys, nodes = sort_keys.copy(), nodes.copy()
+        del sort_keys[index], nodes[index]
+        self._arrays = (sort_keys, nodes)
+        return True
+
+    def contains(self, key: str, hash_value: int = None) -> SLNode:
+        """
+        Return node with matching key, or None if no match.
+        """
+        index = self._find_index(key, hash_value)
+        if index is None:
+            return None
+        return self._arrays[1][index]
+
+    def length(self) -> int:
+        """
+        Return the number of nodes in the bucket.
+        """
+        return len(self._arrays[1])
 
 
 class HashMap:
+    # Number of structural changes so far, checked by running iterators, and
+    # whether the buckets are shared with a snapshot. Kept as class level
+    # defaults because __init__ must not change.
+    _mod_count = 0
+    _shared = False
+
+    # Mark of the buckets the map may change in place, None while it shares
+    # none of its buckets with a snapshot (see _own_bucket()).
+    _epoch = None
+
+    # Longest chain an insert may create before the map is re-seeded (see
+    # set_chain_limit()), and whether an insert has made a longer one.
+    _chain_limit = 16
+    _flooded = False
+
     def __init__(self,
                  capacity: int = 11,
                  function: callable = hash_function_1) -> None:
@@ -92,6 +213,9 @@ class HashMap:
 
     # ------------------------------------------------------------------ #
 
+    # Hashes a key with the fast path of the map's hash function.
+    _hash = hash_key
+
     def put(self, key: str, value: object) -> None:
         """
         This method updates the key/value pair in the hash map. If the given
@@ -104,26 +228,103 @@ class HashMap:
         Returns None.
         """
 
+        self._make_room()
+        self._put_hashed(key, value, self._hash(key))
+
+    def _make_room(self) -> None:
+        """
+        Helper called before anything is inserted, which grows the table.
+        """
+        self._rehash_if_flooded()
+
         # Resize to double its current capacity when called and if current
         # load factor is >= 1.
         if self.table_load() >= 1:
             self.resize_table(self._capacity * 2)
 
-        # Grab the capacity of the bucket.
-        capacity_bucket = self._buckets.length()
+    def _put_hashed(self, key: str, value: object, hash_value: int) -> None:
+        """
+        Helper that places the key/value pair using an already computed hash
+        value. Does not check the load factor.
+        """
+        self._own_bucket(hash_value)
 
         # Determine the index for where the key value pair will go.
-        hash_value = self._hash_function(key)
-        index_value = hash_value % capacity_bucket
+        index_value = self._index(hash_value, self._buckets.length())
 
         # Check if index position in bucket contains key in Node.
-        the_node = self._buckets[index_value].contains(key)
+        the_node = self._search(self._buckets[index_value], key, hash_value)
         if the_node is not None: # If node exists, replace w/ new value.
             the_node.value = value
         else:
             # Insert the key value pair into the bucket, increment size.
-            self._buckets[index_value].insert(key, value)
-            self._size += 1
+            self._insert_new(key, value, hash_value)
+
+    def _insert_new(self, key: str, value: object, hash_value: int) -> None:
+        """
+        Helper that adds a key that is known not to be in the hash map to its
+        bucket, without searching the bucket first, and increments the size.
+        """
+        index_value = self._index(hash_value, self._buckets.length())
+        the_bucket = self._buckets[index_value]
+        self._insert_hashed(the_bucket, key, value, hash_value)
+        self._size += 1
+        self._mod_count += 1
+
+        # A chain this long is searched with a binary search from now on.
+        if the_bucket.length() > TREEIFY_THRESHOLD and \
+                type(the_bucket) is LinkedList:
+            self._buckets[index_value] = SortedBucket(the_bucket)
+
+        # A chain this long at a load factor below 1 means the keys were
+        # chosen to collide, the next insert re-seeds the map.
+        if self._chain_limit is not None and \
+                the_bucket.length() > self._chain_limit:
+            self._flooded = True
+
+    @staticmethod
+    def _insert_hashed(bucket: LinkedList, key: str, value: object,
+                       hash_value: int) -> None:
+        """
+        Helper that inserts the key/value pair at the front of the bucket (in
+        key order for a SortedBucket) and stores the full hash value in the
+        new node, so resize_table() never needs to rehash the key.
+        """
+        if type(bucket) is SortedBucket:
+            bucket.insert(key, value, hash_value)
+            return
+        bucket.insert(key, value)
+        next(iter(bucket)).hash = hash_value  # The new node is the head.
+
+    def _index(self, hash_value: int, capacity: int) -> int:
+        """
+        Helper that returns the bucket the hash value selects in a table of
+        'capacity' buckets. Every bucket index is computed here, so a
+        subclass can choose buckets differently by overriding it.
+        """
+        return hash_value % capacity
+
+    @staticmethod
+    def _search(bucket: LinkedList, key: str, hash_value: int):
+        """
+        Helper that returns the node holding the key in the bucket, or None,
+        with a binary search on the hash when the bucket is a SortedBucket.
+        """
+        if type(bucket) is SortedBucket:
+            return bucket.contains(key, hash_value)
+        return bucket.contains(key)
+
+    @staticmethod
+    def _treeify_buckets(buckets: DynamicArray) -> None:
+        """
+        Helper that turns every chain longer than TREEIFY_THRESHOLD into a
+        SortedBucket, after the buckets were filled without _insert_new().
+        """
+        for i in range(buckets.length()):
+            the_bucket = buckets[i]
+            if the_bucket.length() > TREEIFY_THRESHOLD and \
+                    type(the_bucket) is LinkedList:
+                buckets[i] = SortedBucket(the_bucket)
 
 
     def empty_buckets(self) -> int:
@@ -172,16 +373,30 @@ class HashMap:
         Returns None.
         """
 
-        # Clear by setting new Hashmap and set prior buckets to new buckets.
-        new_hash = HashMap(self._capacity, self._hash_function)
-        self._buckets = new_hash._buckets
+        # Clear by replacing the buckets with empty ones, same capacity.
+        new_da = DynamicArray()
+        for _ in range(self._capacity):
+            new_da.append(LinkedList())
+        self._buckets = new_da
         self._size = 0 # Reset size.
+        self._shared = False
+        self._epoch = None
+        self._mod_count += 1
+
+    def _round_capacity(self, capacity: int) -> int:
+        """
+        Helper that rounds a capacity up to one the table can have: the next
+        prime, the same number _is_prime() and _next_prime() give, found in
+        the precomputed prime table.
+        """
+        return next_prime(capacity)
 
     def resize_table(self, new_capacity: int) -> None:
         """
         This method changes the capacity of the internal hash table. ALl
-        existing key/value pairs must remain in the new hash map, and all
-        hash table links must be rehashed.
+        existing key/value pairs must remain in the new hash map. Entries are
+        redistributed with the hash stored in each node, keys are not
+        rehashed.
 
         Takes 'new_capacity' as parameter (int).
 
@@ -193,14 +408,23 @@ class HashMap:
             return
 
         # If the new capacity is not Prime, set new capacity to next prime.
-        if not self._is_prime(new_capacity):
-            new_capacity = self._next_prime(new_capacity)
+        new_capacity = self._round_capacity(new_capacity)
+
+        # Keep doubling while the entries would reach a load factor of 1,
+        # the same capacity put() would have grown the table to.
+        while self._size > 0 and (self._size - 1) / new_capacity >= 1:
+            new_capacity = self._round_capacity(new_capacity * 2)
 
         # Set capacity.
         self._capacity = new_capacity
 
-        # # Save old buckets.
+        # # Save old buckets. They are only read, so a snapshot sharing them
+        # is not affected, and neither the new buckets nor their nodes are
+        # shared.
         old_buckets = self._buckets
+        self._shared = False
+        self._epoch = None
+        self._mod_count += 1
 
         # Create new dynamic array and set buckets to it.
         new_da = DynamicArray()
@@ -210,30 +434,77 @@ class HashMap:
         for _ in range(self._capacity):
             self._buckets.append(LinkedList())
 
-        # Reset size for new buckets.
-        self._size = 0
-
-        # Copy contents over from old buckets to new hash map.
+        # Move every node over to its new bucket using the hash stored in
+        # the node, so no key is rehashed and the size does not change.
         for i in range(old_buckets.length()):
-            the_bucket = old_buckets.get_at_index(i) # Grab bucket
-            if the_bucket.length() != 0: # If bucket is not empty.
+            for node in old_buckets.get_at_index(i):
+                index_value = self._index(node.hash, new_capacity)
+                new_bucket = self._buckets[index_value]
+                self._insert_hashed(new_bucket, node.key, node.value, node.hash)
+        self._treeify_buckets(self._buckets)
 
-                # Define iterator for linked list to use on bucket, then
-                # define pointer for the current node using iterator.
-                linked_list_iterator = iter(the_bucket)
-                current_node = next(linked_list_iterator)
+    def reseed(self, seed: int = None, function=None) -> None:
+        """
+        This method switches the map to a seeded hash function and rehashes
+        every key with it. Under a random seed nobody can choose keys that
+        collide on purpose. The function defaults to the map's own when it
+        takes a seed, and to siphash_24 otherwise.
 
-                # Loop through each item in the bucket to gather key, rehash.
-                while current_node is not None:
+        Takes 'seed' (int, random by default), 'function' (siphash_24,
+        xxhash_64 or their name) as parameters.
 
-                    # Grab the key, value since Node, to be used for 'put()'.
-                    grab_key = current_node.key
-                    grab_value = current_node.value
-                    current_node = current_node.next # Set next node.
+        Returns None.
+        """
+
+        if function is None:
+            function = self._hash_function
+            if not is_seedable(function):
+                function = 'siphash_24'
+        function = seeded_hash_function(function, seed)
+
+        # Collect everything before the buckets change.
+        items = [(node.key, node.value) for node in self._nodes()]
+        hash_values = hash_keys([key for key, _ in items], function)
+
+        self._hash_function = function
+        self._shared = False
+        self._epoch = None
+        self._mod_count += 1
+        self._flooded = False
 
-                    # Rehash the key by using 'put()'.
-                    self.put(grab_key, grab_value)
+        new_da = DynamicArray()
+        for _ in range(self._capacity):
+            new_da.append(LinkedList())
+        for (key, value), hash_value in zip(items, hash_values):
+            self._insert_hashed(new_da[self._index(hash_value,
+                                                   self._capacity)],
+                                key, value, hash_value)
+        self._treeify_buckets(new_da)
+        self._buckets = new_da
+
+    def set_chain_limit(self, limit: int) -> None:
+        """
+        This method turns on protection against keys chosen to collide: once
+        an insert makes a chain longer than 'limit' nodes, the map is
+        re-seeded with siphash_24 under a random seed and every key is
+        rehashed. A limit of 16, the default, is practically never reached
+        by chance with a well spread hash function; hash_function_1 and
+        hash_function_2 reach it on ordinary keys and get re-seeded too.
+        None turns the check off.
+
+        Takes 'limit' (int) as a parameter.
 
+        Returns None.
+        """
+        self._chain_limit = limit
+
+    def _rehash_if_flooded(self) -> None:
+        """
+        Helper that re-seeds the map once an insert has made a chain longer
+        than the chain limit.
+        """
+        if self._flooded:
+            self.reseed(function='siphash_24')
 
     def get(self, key: str):
         """
@@ -245,20 +516,29 @@ class HashMap:
         Returns an object.
         """
 
-        # Grab the capacity of the bucket.
-        capacity_bucket = self._buckets.length()
+        return self._get_hashed(key, self._hash(key))
 
-        # Determine the index for where the key value pair will go.
-        hash_value = self._hash_function(key)
-        index_value = hash_value % capacity_bucket
-
-        # Check if index position in bucket contains key in Node.
-        the_node = self._buckets[index_value].contains(key)
+    def _get_hashed(self, key: str, hash_value: int) -> object:
+        """
+        Helper that looks up the key using an already computed hash value.
+        """
 
         # If the key is in a bucket, return node's value, None otherwise.
-        if the_node is not None and the_node.key == key:
+        the_node = self._find_node(key, hash_value)
+        if the_node is not None:
             return the_node.value
 
+    def _find_node(self, key: str, hash_value: int):
+        """
+        Helper that returns the node holding the key, or None if the key is
+        not in the hash map.
+        """
+
+        # Determine the index for where the key value pair will go.
+        index_value = self._index(hash_value, self._buckets.length())
+
+        # Check if index position in bucket contains key in Node.
+        return self._search(self._buckets[index_value], key, hash_value)
 
     def contains_key(self, key: str) -> bool:
         """
@@ -270,23 +550,8 @@ class HashMap:
         Returns bool.
         """
 
-        # Grab the capacity of the bucket.
-        capacity_bucket = self._buckets.length()
-
-        # Determine the index for where the key value pair will go.
-        hash_value = self._hash_function(key)
-        index_value = hash_value % capacity_bucket
-
-        # Check if index position in bucket contains key in Node.
-        the_node = self._buckets[index_value].contains(key)
-
         # If some bucket contains the key passed in, return True.
-        if the_node is not None and the_node.key == key:
-            return True
-
-        # Return False if the key is not found.
-        return False
-
+        return self._find_node(key, self._hash(key)) is not None
 
     def remove(self, key: str) -> None:
         """
@@ -298,23 +563,343 @@ class HashMap:
         Returns None.
         """
 
-        # Grab the capacity of the bucket.
-        capacity_bucket = self._buckets.length()
+        self._remove_hashed(key, self._hash(key))
+
+    def _remove_hashed(self, key: str, hash_value: int) -> None:
+        """
+        Helper that removes the key using an already computed hash value.
+        """
+        self._pop_node(key, hash_value)
+
+    def _pop_node(self, key: str, hash_value: int):
+        """
+        Helper that unlinks the node holding the key and returns it, or
+        returns None if the key is not in the hash map.
+        """
+        self._own_bucket(hash_value)
 
         # Determine the index for where the key value pair will go.
-        hash_value = self._hash_function(key)
-        index_value = hash_value % capacity_bucket
+        index_value = self._index(hash_value, self._buckets.length())
 
         # If the key is not in the bucket.
-        if not self._buckets[index_value].contains(key):
-            return
+        the_bucket = self._buckets[index_value]
+        the_node = self._search(the_bucket, key, hash_value)
+        if the_node is None:
+            return None
 
         # Find node at the index value is and remove the node/ key-value pair.
-        self._buckets[index_value].remove(key)
+        if type(the_bucket) is not SortedBucket:
+            the_bucket.remove(key)
+
+        # Few enough nodes are left to go back to a plain chain.
+        elif the_bucket.remove(key, hash_value) and \
+                the_bucket.length() <= UNTREEIFY_THRESHOLD:
+            new_bucket = LinkedList()
+            for node in reversed(list(the_bucket)):
+                self._insert_hashed(new_bucket, node.key, node.value,
+                                    node.hash)
+            self._buckets[index_value] = new_bucket
 
         # Decrement size.
         self._size -= 1
+        self._mod_count += 1
+        return the_node
+
+    def put_many(self, pairs) -> None:
+        """
+        This method updates the hash map with every key/value pair in the
+        given iterable, as if put() was called for each one in order. The
+        table is resized at most once, up front, and all keys are hashed in
+        one batch.
+
+        Takes 'pairs' (iterable of (key, value) tuples) as parameter.
+
+        Returns None.
+        """
+
+        pairs = list(pairs)
+        keys = [pair[0] for pair in pairs]
+
+        # Presize once so that no insert in the batch needs a resize.
+        needed = self._size + len(pairs)
+        if needed > self._capacity:
+            self.resize_table(needed)
+
+        hash_values = hash_keys(keys, self._hash_function)
+        for i, hash_value in enumerate(hash_values):
+            self._put_hashed(keys[i], pairs[i][1], hash_value)
+            if self._flooded:
+                # Re-seed, then hash the rest of the batch with the new seed.
+                self._rehash_if_flooded()
+                self.put_many(pairs[i + 1:])
+                return
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        This method returns the values associated with each of the given keys,
+        in the same order. Keys that are not in the hash map give None.
+
+        Takes 'keys' (iterable of str) as parameter.
+
+        Returns a dynamic array.
+        """
+
+        keys = list(keys)
+        hash_values = hash_keys(keys, self._hash_function)
+        return DynamicArray(list(map(self._get_hashed, keys, hash_values)))
+
+    def remove_many(self, keys) -> None:
+        """
+        This method removes each of the given keys and its associated value
+        from the hash map. Keys that are not in the hash map are ignored.
+
+        Takes 'keys' (iterable of str) as parameter.
+
+        Returns None.
+        """
+
+        keys = list(keys)
+        hash_values = hash_keys(keys, self._hash_function)
+        for key, hash_value in zip(keys, hash_values):
+            self._remove_hashed(key, hash_value)
+
+
+    def increment(self, key: str, amount: object = 1) -> object:
+        """
+        This method adds 'amount' to the value of the given key, inserting
+        the key with 'amount' as its value if it is not in the hash map. The
+        key is hashed once and its bucket is searched once.
+
+        Takes 'key' (str), 'amount' (number) as parameters.
+
+        Returns the new value of the key.
+        """
+
+        self._make_room()
+        return self._increment_hashed(key, amount, self._hash(key))
+
+    def _increment_hashed(self, key: str, amount: object,
+                          hash_value: int) -> object:
+        """
+        Helper that increments the key using an already computed hash value.
+        Does not check the load factor.
+        """
+        self._own_bucket(hash_value)
+
+        the_node = self._find_node(key, hash_value)
+        if the_node is None:
+            self._insert_new(key, amount, hash_value)
+            return amount
+        the_node.value += amount
+        return the_node.value
+
+    def increment_many(self, keys, amount: object = 1) -> None:
+        """
+        This method adds 'amount' to the value of each of the given keys, as
+        if increment() was called for each one in order. All keys are hashed
+        in one batch, and the table grows through the usual load factor check
+        as new keys arrive.
+
+        Takes 'keys' (iterable of str), 'amount' (number) as parameters.
+
+        Returns None.
+        """
+
+        keys = list(keys)
+
+        # Not presized: counting batches mostly repeat keys that are already
+        # in the map, so room for every key of every batch would be wasted.
+        self._rehash_if_flooded()
+        hash_values = hash_keys(keys, self._hash_function)
+        for i, hash_value in enumerate(hash_values):
+            self._make_room()
+            self._increment_hashed(keys[i], amount, hash_value)
+            if self._flooded:
+                # Re-seed, then hash the rest of the batch with the new seed.
+                self._rehash_if_flooded()
+                self.increment_many(keys[i + 1:], amount)
+                return
+
+    def upsert(self, key: str, function, default: object = None) -> object:
+        """
+        This method replaces the value of the given key with function(value).
+        If the key is not in the hash map, it is inserted with
+        function(default) as its value. The key is hashed once and its bucket
+        is searched once. If the function raises, the map is left unchanged.
+
+        Takes 'key' (str), 'function' (callable), 'default' (object) as
+        parameters.
+
+        Returns the new value of the key.
+        """
+
+        self._make_room()
+        return self._upsert_hashed(key, function, default, self._hash(key))
+
+    def _upsert_hashed(self, key: str, function, default: object,
+                       hash_value: int) -> object:
+        """
+        Helper that upserts the key using an already computed hash value.
+        Does not check the load factor.
+        """
+        self._own_bucket(hash_value)
+
+        the_node = self._find_node(key, hash_value)
+        if the_node is None:
+            value = function(default)
+            self._insert_new(key, value, hash_value)
+            return value
+        the_node.value = function(the_node.value)
+        return the_node.value
+
+    def get_or_insert(self, key: str, default: object = None) -> object:
+        """
+        This method returns the value of the given key. If the key is not in
+        the hash map, it is inserted with 'default' as its value, which is
+        then returned (like dict.setdefault()).
+
+        Takes 'key' (str), 'default' (object) as parameters.
+
+        Returns the value of the key.
+        """
+
+        self._make_room()
+        return self._upsert_hashed(key, UNCHANGED, default, self._hash(key))
+
+    def pop(self, key: str, default: object = None) -> object:
+        """
+        This method removes the given key from the hash map and returns its
+        value. If the key is not in the hash map, nothing is removed and
+        'default' is returned.
+
+        Takes 'key' (str), 'default' (object) as parameters.
+
+        Returns the removed value, or 'default'.
+        """
+
+        the_node = self._pop_node(key, self._hash(key))
+        if the_node is None:
+            return default
+        return the_node.value
+
+    def _nodes(self):
+        """
+        Helper that yields every node in every bucket of the table. Raises
+        RuntimeError if the map is structurally changed (a key is added or
+        removed, or the table is rebuilt) while the iteration is running.
+        """
+        mod_count = self._mod_count
+        buckets = self._buckets
+        for i in range(buckets.length()):
+            for node in buckets[i]:
+                yield node
+                if self._mod_count != mod_count:
+                    raise RuntimeError("hash map changed during iteration")
+
+    def _unshare(self) -> None:
+        """
+        Helper called before a bucket of the array is replaced. If the array
+        is shared with a snapshot, the map first switches to its own copy of
+        it. Only the references are copied, the buckets stay shared.
+        """
+
+        if not self._shared:
+            return
+
+        buckets = self._buckets
+        self._buckets = DynamicArray([buckets[i]
+                                      for i in range(buckets.length())])
+        self._shared = False
+
+    def _own_bucket(self, hash_value: int) -> None:
+        """
+        Helper called before the bucket of the hash value is changed in
+        place. A bucket still shared with a snapshot is replaced by a copy of
+        it first, so a write copies only the bucket it touches.
+        """
+
+        if self._epoch is None:
+            return
+
+        index_value = self._index(hash_value, self._buckets.length())
+        the_bucket = self._buckets[index_value]
+        if getattr(the_bucket, 'epoch', None) is not self._epoch:
+            self._unshare()
+            self._buckets[index_value] = self._copy_bucket(the_bucket,
+                                                           self._epoch)
+
+    def _copy_bucket(self, bucket: LinkedList, epoch: object) -> LinkedList:
+        """
+        Helper that returns a copy of the bucket with copies of its nodes,
+        marked as owned by the given epoch.
+        """
+
+        # Nodes are inserted at the head, so copy them in reverse to keep the
+        # order of the bucket.
+        new_bucket = LinkedList()
+        for node in reversed(list(bucket)):
+            self._insert_hashed(new_bucket, node.key, node.value, node.hash)
+        if type(bucket) is SortedBucket:
+            new_bucket = SortedBucket(new_bucket)
+        new_bucket.epoch = epoch
+        return new_bucket
+
+    def snapshot(self) -> "HashMap":
+        """
+        This method returns a copy of the hash map that shares its table
+        with the map instead of copying it. Whichever of the two is written
+        to copies only the bucket it changes, the first time it changes it
+        (copy-on-write), so the snapshot keeps the contents the map had when
+        it was taken while writers carry on. Iterating over a snapshot is
+        never affected by writes to the map.
+
+        Takes no parameters.
+
+        Returns a HashMap.
+        """
+
+        # From now on neither map owns any bucket, each marks the buckets it
+        # copies with a new epoch of its own.
+        snapshot = copy.copy(self)
+        self._shared = snapshot._shared = True
+        self._epoch, snapshot._epoch = object(), object()
+        return snapshot
+
+    def keys(self):
+        """
+        This method yields each key in the hash map, one at a time, without
+        building an array of them.
+
+        Takes no parameters.
+
+        Returns a generator of keys.
+        """
+        for node in self._nodes():
+            yield node.key
+
+    def values(self):
+        """
+        This method yields each value in the hash map, one at a time, without
+        building an array of them.
+
+        Takes no parameters.
 
+        Returns a generator of values.
+        """
+        for node in self._nodes():
+            yield node.value
+
+    def items(self):
+        """
+        This method yields a (key, value) tuple for each key in the hash map,
+        one at a time, without building an array of them.
+
+        Takes no parameters.
+
+        Returns a generator of tuples.
+        """
+        for node in self._nodes():
+            yield node.key, node.value
 
     def get_keys_and_values(self) -> DynamicArray:
         """
@@ -335,13 +920,8 @@ class HashMap:
             the_bucket = self._buckets.get_at_index(i) # Grab bucket
             if the_bucket.length() != 0: # If bucket is not empty.
 
-                # Define iterator for linked list to use on bucket, then
-                # define pointer for the current node using iterator.
-                linked_list_iterator = iter(the_bucket)
-                current_node = next(linked_list_iterator)
-
                 # Loop through each item in the bucket to gather key-value.
-                while current_node is not None:
+                for current_node in the_bucket:
 
                     # Grab the key, value since Node.
                     grab_key = current_node.key
@@ -353,11 +933,373 @@ class HashMap:
                     # Append the tuple to the dynamic array.
                     new_da.append(my_tuple)
 
-                    # Set next node.
-                    current_node = current_node.next
+        return new_da
 
+
+class IncrementalHashMap(HashMap):
+    """
+    Separate chaining HashMap that spreads each automatic resize over the
+    operations that follow it. When the load factor reaches 1, a new table is
+    allocated and the old one is kept; every later operation moves at most
+    'migrate_step' old buckets into the new table, and lookups consult both
+    tables until the migration is over.
+    """
+
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 migrate_step: int = 4) -> None:
+        """
+        Initialize new HashMap that resizes incrementally, moving at most
+        'migrate_step' old buckets per operation.
+        """
+        super().__init__(capacity, function)
+        self._migrate_step = max(1, migrate_step)
+        self._old_buckets = None
+        self._old_epoch = None
+        self._migrate_index = 0
+        self._iterating = 0
+
+    def is_resizing(self) -> bool:
+        """
+        This method returns True while an incremental resize is in progress.
+
+        Takes no parameters.
+
+        Returns bool.
+        """
+        return self._old_buckets is not None
+
+    def _start_resize(self, new_capacity: int) -> None:
+        """
+        Helper that allocates the new table and keeps the current one as the
+        old table to migrate from.
+        """
+
+        # Finish a migration that is still running, only two tables coexist.
+        self._migrate(None)
+
+        new_capacity = self._round_capacity(new_capacity)
+
+        # Migrated slots of the old table are cleared, so the map needs its
+        # own array of it. Its buckets may still be shared with a snapshot
+        # and keep their epoch, the new buckets are the map's own.
+        self._unshare()
+        self._old_buckets = self._buckets
+        self._old_epoch = self._epoch
+        self._epoch = None
+        self._migrate_index = 0
+        self._capacity = new_capacity
+        self._mod_count += 1
+        self._buckets = DynamicArray()
+        for _ in range(new_capacity):
+            self._buckets.append(LinkedList())
+
+    def _migrate(self, count) -> None:
+        """
+        Helper that moves up to 'count' old buckets (all of them if count is
+        None) into the new table, using the hash stored in each node. Steps
+        wait while an iteration is running, so it never sees a node twice.
+        """
+
+        old_buckets = self._old_buckets
+        if old_buckets is None or \
+                (count is not None and self._iterating > 0):
+            return
+
+        if count is None:
+            count = old_buckets.length()
+
+        self._mod_count += 1
+        while count > 0 and self._migrate_index < old_buckets.length():
+            for node in old_buckets[self._migrate_index]:
+                index_value = self._index(node.hash, self._capacity)
+                new_bucket = self._buckets[index_value]
+                self._insert_hashed(new_bucket, node.key, node.value,
+                                    node.hash)
+                if new_bucket.length() > TREEIFY_THRESHOLD and \
+                        type(new_bucket) is LinkedList:
+                    self._buckets[index_value] = SortedBucket(new_bucket)
+
+            # Release the migrated bucket right away.
+            old_buckets[self._migrate_index] = None
+            self._migrate_index += 1
+            count -= 1
+
+        # Drop the old table once every bucket has been moved.
+        if self._migrate_index == old_buckets.length():
+            self._old_buckets = None
+
+    def _old_bucket(self, hash_value: int) -> LinkedList:
+        """
+        Helper that returns the old bucket the hash value maps to, or None
+        when there is no old table or that bucket was already migrated.
+        """
+        if self._old_buckets is None:
+            return None
+        index_value = self._index(hash_value, self._old_buckets.length())
+        if index_value < self._migrate_index:
+            return None
+        return self._old_buckets[index_value]
+
+    def _own_bucket(self, hash_value: int) -> None:
+        """
+        Helper called before the buckets of the hash value are changed in
+        place. Besides the bucket of the new table, the old bucket is copied
+        too if it is still shared with a snapshot.
+        """
+        super()._own_bucket(hash_value)
+
+        the_bucket = self._old_bucket(hash_value)
+        if the_bucket is None or self._old_epoch is None or \
+                getattr(the_bucket, 'epoch', None) is self._old_epoch:
+            return
+        index_value = self._index(hash_value, self._old_buckets.length())
+        self._old_buckets[index_value] = self._copy_bucket(the_bucket,
+                                                           self._old_epoch)
+
+    def _make_room(self) -> None:
+        """
+        Helper called before anything is inserted. When the load factor
+        reaches 1, the table is doubled incrementally instead of being
+        rebuilt inside this call.
+        """
+        self._rehash_if_flooded()
+        self._migrate(self._migrate_step)
+        if self.table_load() >= 1:
+            self._start_resize(self._capacity * 2)
+
+    def _put_hashed(self, key: str, value: object, hash_value: int) -> None:
+        """
+        Helper that updates the key in the old table if it still lives
+        there, and otherwise places it in the new table.
+        """
+        self._own_bucket(hash_value)
+        old_bucket = self._old_bucket(hash_value)
+        if old_bucket is not None:
+            the_node = self._search(old_bucket, key, hash_value)
+            if the_node is not None:
+                the_node.value = value
+                return
+        super()._put_hashed(key, value, hash_value)
+
+    def get(self, key: str) -> object:
+        """
+        This method returns the value associated with the given key, or None
+        if the key is not in the hash map. Both tables are consulted while a
+        resize is in progress.
+
+        Takes 'key' (str) as a parameter.
+
+        Returns an object.
+        """
+        self._migrate(self._migrate_step)
+        return self._get_hashed(key, self._hash(key))
+
+    def _find_node(self, key: str, hash_value: int):
+        """
+        Helper that returns the node holding the key from either table, or
+        None if the key is not in the hash map.
+        """
+        the_node = super()._find_node(key, hash_value)
+        if the_node is None:
+            old_bucket = self._old_bucket(hash_value)
+            if old_bucket is not None:
+                the_node = self._search(old_bucket, key, hash_value)
+        return the_node
+
+    def contains_key(self, key: str) -> bool:
+        """
+        This method returns True if the given key is in the hash map, otherwise
+        returns False. Both tables are consulted while a resize is in progress.
+
+        Takes 'key' (str) as parameter.
+
+        Returns bool.
+        """
+        self._migrate(self._migrate_step)
+        return self._find_node(key, self._hash(key)) is not None
+
+    def remove(self, key: str) -> None:
+        """
+        This method removes the given key and its associated value from
+        whichever table holds it. If the key is not in the hash map, this
+        method does nothing.
+
+        Takes 'key' (str) as parameter.
+
+        Returns None.
+        """
+        self._migrate(self._migrate_step)
+        self._remove_hashed(key, self._hash(key))
+
+    def pop(self, key: str, default: object = None) -> object:
+        """
+        This method removes the given key from whichever table holds it and
+        returns its value. If the key is not in the hash map, 'default' is
+        returned.
+
+        Takes 'key' (str), 'default' (object) as parameters.
+
+        Returns the removed value, or 'default'.
+        """
+        self._migrate(self._migrate_step)
+        return super().pop(key, default)
+
+    def _pop_node(self, key: str, hash_value: int):
+        """
+        Helper that unlinks the node holding the key from the old table if it
+        still lives there, and otherwise from the new table.
+        """
+        self._own_bucket(hash_value)
+        old_bucket = self._old_bucket(hash_value)
+        if old_bucket is not None:
+            the_node = self._search(old_bucket, key, hash_value)
+            if the_node is not None:
+                if type(old_bucket) is SortedBucket:
+                    old_bucket.remove(key, hash_value)
+                else:
+                    old_bucket.remove(key)
+                self._size -= 1
+                self._mod_count += 1
+                return the_node
+        return super()._pop_node(key, hash_value)
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        This method changes the capacity of the internal hash table right
+        away. A resize that is in progress is finished first.
+
+        Takes 'new_capacity' as parameter (int).
+
+        Returns None.
+        """
+        self._migrate(None)
+        super().resize_table(new_capacity)
+
+    def clear(self) -> None:
+        """
+        This method clears the contents of the hash map, dropping an old
+        table that is still being migrated. Does not change the underlying
+        hash table capacity.
+
+        Takes no parameters.
+
+        Returns None.
+        """
+        self._old_buckets = None
+        self._migrate_index = 0
+        super().clear()
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        This method returns a dynamic array where each index contains a tuple
+        of a key/value pair stored in either table.
+
+        Takes no parameters.
+
+        Returns a dynamic array.
+        """
+
+        new_da = super().get_keys_and_values()
+        if self._old_buckets is not None:
+            for i in range(self._migrate_index, self._old_buckets.length()):
+                for node in self._old_buckets[i]:
+                    new_da.append((node.key, node.value))
         return new_da
 
+    def _nodes(self):
+        """
+        Helper that yields the nodes of the old buckets that are not migrated
+        yet, then every node of the new table, without finishing the resize.
+        Migration steps wait until the iteration is over (or the iterator is
+        dropped), so reads made meanwhile do not move nodes. Raises
+        RuntimeError if the map is structurally changed while the iteration
+        is running.
+        """
+        self._iterating += 1
+        try:
+            mod_count = self._mod_count
+            tables = ((self._old_buckets, self._migrate_index),
+                      (self._buckets, 0))
+            for buckets, first in tables:
+                if buckets is None:
+                    continue
+                for i in range(first, buckets.length()):
+                    for node in buckets[i]:
+                        yield node
+                        if self._mod_count != mod_count:
+                            raise RuntimeError(
+                                "hash map changed during iteration")
+        finally:
+            self._iterating -= 1
+
+    def reseed(self, seed: int = None, function=None) -> None:
+        """
+        This method re-seeds the hash map the same as HashMap.reseed(). A
+        resize that is in progress is finished first, the rebuilt table
+        replaces both tables.
+
+        Takes 'seed' (int, random by default), 'function' (siphash_24,
+        xxhash_64 or their name) as parameters.
+
+        Returns None.
+        """
+        self._migrate(None)
+        super().reseed(seed, function)
+
+    def snapshot(self) -> "IncrementalHashMap":
+        """
+        This method returns a copy-on-write copy of the hash map, the same as
+        HashMap.snapshot(). A resize that is in progress is finished first,
+        so the two maps only ever share one table.
+
+        Takes no parameters.
+
+        Returns an IncrementalHashMap.
+        """
+        self._migrate(None)
+        snapshot = super().snapshot()
+        snapshot._iterating = 0  # Iterations of this map are not its own.
+        return snapshot
+
+
+class PowerOfTwoHashMap(HashMap):
+    """
+    Separate chaining HashMap whose capacity is always a power of two, so the
+    bucket of a hash is its low bits, found with a mask instead of a
+    division, and no resize has to search for a prime. The low bits of
+    hash_function_1 and hash_function_2 alone spread keys poorly, so the
+    hash function is wrapped by mixed_hash_function(), which runs every hash
+    through mix_hash() (siphash_24 and xxhash_64 are used as they are).
+    """
+
+    def __init__(self,
+                 capacity: int = 16,
+                 function: callable = hash_function_1) -> None:
+        """
+        Initialize new HashMap with a power of two capacity, the smallest one
+        at least 'capacity'.
+        """
+        super().__init__(1, mixed_hash_function(function))
+        self._capacity = self._round_capacity(capacity)
+        self._buckets = DynamicArray()
+        for _ in range(self._capacity):
+            self._buckets.append(LinkedList())
+
+    def _round_capacity(self, capacity: int) -> int:
+        """
+        Helper that rounds a capacity up to the next power of two.
+        """
+        return 1 << max(capacity - 1, 0).bit_length()
+
+    def _index(self, hash_value: int, capacity: int) -> int:
+        """
+        Helper that chooses the bucket with a mask, taking the low bits of
+        the hash value.
+        """
+        return hash_value & (capacity - 1)
+
 
 def find_mode(da: DynamicArray) -> (DynamicArray, int):
     """
@@ -382,26 +1324,14 @@ def find_mode(da: DynamicArray) -> (DynamicArray, int):
     highest_freq_seen = 0
 
     # Looping over the length of the da to fill hash map with items (keys) and
-    # frequencies (values).
+    # frequencies (values). increment() hashes each item once and inserts it
+    # with a frequency of 1 the first time it is seen.
     for i in range(da.length()):
-        an_item = da.get_at_index(i)  # Grab item (key).
-
-        # If there is no key, initialize frequency to 1.
-        if not map.contains_key(an_item):
-            map.put(an_item, 1) # Initialize frequency to '1'.
+        current_freq = map.increment(da.get_at_index(i))
 
-            # Set highest frequency based on frequency seen in loop.
-            if 1 > highest_freq_seen:
-                highest_freq_seen = 1
-
-        # If the key already exists in the hash map.
-        else:
-            current_freq = map.get(an_item) # Returns a value (frequency, starts at 1).
-            map.put(an_item, current_freq + 1) # Increment frequency
-
-            # Set highest frequency based on frequency seen in loop.
-            if current_freq + 1 > highest_freq_seen:
-                highest_freq_seen = current_freq + 1
+        # Set highest frequency based on frequency seen in loop.
+        if current_freq > highest_freq_seen:
+            highest_freq_seen = current_freq
 
     # Grab keys and values from filled map, returns dynamic array.
     # Need to loop over this.
@@ -630,3 +1560,95 @@ if __name__ == "__main__":
         da = DynamicArray(case)
         mode, frequency = find_mode(da)
         print(f"Input: {da}\nMode : {mode}, Frequency: {frequency}\n")
+
+    print("\nput_many(), get_many(), remove_many() example 1")
+    print("-----------------------------------------------")
+    m = HashMap(11, hash_function_2)
+    m.put_many((str(i), i * 10) for i in range(100))
+    print(m.get_size(), m.get_capacity())
+    print(m.get_many(['1', '50', '99', '100']))
+    m.remove_many(str(i) for i in range(0, 100, 2))
+    print(m.get_size(), m.get_many(['1', '50', '99', '100']))
+
+    print("\nIncrementalHashMap example 1")
+    print("----------------------------")
+    m = IncrementalHashMap(11, hash_function_1, migrate_step=2)
+    for i in range(40):
+        m.put('key' + str(i), i)
+        if i % 10 == 9:
+            print(m.is_resizing(), m.get_size(), m.get_capacity(), m.get('key0'))
+
+    print("\nupsert(), increment(), get_or_insert(), pop() example 1")
+    print("-------------------------------------------------------")
+    m = HashMap(11, hash_function_1)
+    for word in "the cat and the dog and the bird".split():
+        m.increment(word)
+    print(m.get('the'), m.get('and'), m.get('cat'))
+    print(m.upsert('cat', lambda count: count * 10), m.upsert('fox', len, 'abc'))
+    print(m.get_or_insert('dog', 0), m.get_or_insert('owl', []))
+    print(m.pop('the'), m.pop('the', 'gone'), m.get_size())
+
+    print("\nkeys(), values(), items() example 1")
+    print("----------------------------------")
+    m = IncrementalHashMap(11, hash_function_1, migrate_step=1)
+    for i in range(14):
+        m.put(str(i), i * 10)
+    m.remove('3')
+    print(m.is_resizing(), sorted(m.keys()), sum(m.values()))
+    print(sorted(m.items())[:3])
+
+    print("\nsnapshot() example 1")
+    print("--------------------")
+    m = HashMap(11, hash_function_1)
+    for i in range(5):
+        m.put(str(i), i)
+    snapshot = m.snapshot()
+    for key in snapshot.keys():
+        m.remove(key)
+        m.put(key + '!', 0)
+    print(sorted(snapshot.items()), sorted(m.keys()))
+    try:
+        for key in m.keys():
+            m.remove(key)
+    except RuntimeError as error:
+        print(error)
+
+    print("\nset_chain_limit(), reseed() example 1")
+    print("-------------------------------------")
+    import itertools
+    # Every permutation of the same letters has the same hash_function_1
+    # value, so without the chain limit they would all share one chain.
+    m = HashMap(11, hash_function_1)
+    for i, word in enumerate(itertools.permutations('abcdefg')):
+        m.put(''.join(word), i)
+    print(m.get_size(), m.get('gfedcba'), m._hash_function.__name__[:10])
+    m.reseed(1)
+    print(m._hash_function.__name__, m.get('gfedcba'))
+
+    print("\nPowerOfTwoHashMap example 1")
+    print("---------------------------")
+    m = PowerOfTwoHashMap(20, hash_function_1)
+    print(m.get_capacity(), m._hash_function.__name__)
+    for i in range(100):
+        m.put('str' + str(i), i)
+    print(m.get_size(), m.get_capacity(), m.get('str42'), m.table_load())
+    m.resize_table(300)
+    print(m.get_capacity(), m.get('str42'), m.contains_key('str100'))
+
+    print("\nSortedBucket example 1")
+    print("----------------------")
+    # Anagrams collide under hash_function_1, so their chain is treeified
+    # once it is longer than TREEIFY_THRESHOLD, and turned back into a
+    # chain when removals shrink it to UNTREEIFY_THRESHOLD.
+    m = HashMap(101, hash_function_1)
+    m.set_chain_limit(None)  # Keep the anagrams colliding.
+    words = [''.join(word) for word in itertools.permutations('abcd')]
+    for i, word in enumerate(words):
+        m.put(word, i)
+    index = hash_function_1('abcd') % m.get_capacity()
+    print(type(m._buckets[index]).__name__, m._buckets[index].length(),
+          m.get('dcba'))
+    for word in words[:18]:
+        m.remove(word)
+    print(type(m._buckets[index]).__name__, m._buckets[index].length(),
+          m.get('dcba'))
@@ -0,0 +1,460 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 (Portfolio)
+# Description: A separate chaining HashMap with the same interface and the
+# same chains as hash_map_sc.HashMap, but with a compact storage layout.
+# Instead of one LinkedList object per bucket and one SLNode per entry, the
+# entries live in one shared set of parallel flat arrays (stored hash, key,
+# value and the index of the next entry of the chain), and the table itself
+# is a single array holding the index of the first entry of each chain. An
+# empty bucket is just -1 in that array, so buckets are only "allocated" by
+# the first key that lands in them, and resize_table() relinks the existing
+# entries instead of allocating a new bucket for every slot.
+
+from array import array
+
+from a6_include import DynamicArray, hash_function_1, hash_function_2
+from hash_engine import fast_path, hash_keys, next_prime
+
+
+# Marks the end of a chain, and an empty bucket.
+NONE = -1
+
+# Stored hashes are reduced to 64 bits so they fit the hash array.
+HASH_MASK = 0xFFFFFFFFFFFFFFFF
+
+
+class HashMap:
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1) -> None:
+        """
+        Initialize new HashMap that uses separate chaining for collision
+        resolution, stored in parallel flat arrays
+        """
+
+        # capacity must be a prime number
+        self._capacity = next_prime(capacity)
+        self._allocate(self._capacity)
+
+        self._hash_function = function
+        self._size = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide the same output as the
+        LinkedList based map
+        """
+        out = ''
+        for i in range(self._capacity):
+            nodes = [f"({self._keys[entry]}: {self._values[entry]})"
+                     for entry in self._chain(i)]
+            out += str(i) + ': SLL [' + ' -> '.join(nodes) + ']\n'
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Helper that creates an empty table with the given capacity and no
+        entries. Removed entries are chained through their next index into a
+        free list, which put() takes from first.
+        """
+        self._heads = array('q', [NONE]) * capacity
+        self._hashes = array('Q')
+        self._keys = []
+        self._values = []
+        self._next = array('q')
+        self._free = NONE
+        self._free_count = 0
+
+    def _hash(self, key: str) -> int:
+        """
+        Helper that hashes the key with the map's hash function, using the
+        per-key fast path from hash_engine when one exists.
+        """
+        return fast_path(self._hash_function)(key) & HASH_MASK
+
+    def _chain(self, index: int):
+        """
+        Helper that yields the entry indexes of the chain of a bucket, from
+        its head.
+        """
+        entry = self._heads[index]
+        while entry != NONE:
+            yield entry
+            entry = self._next[entry]
+
+    def _find(self, key: str, hash_value: int) -> int:
+        """
+        Helper that returns the index of the entry holding the key, or NONE
+        if the key is not in the hash map. Keys are only compared when the
+        stored hashes match.
+        """
+
+        hashes, keys, next_entry = self._hashes, self._keys, self._next
+        entry = self._heads[hash_value % self._capacity]
+        while entry != NONE:
+            if hashes[entry] == hash_value and keys[entry] == key:
+                return entry
+            entry = next_entry[entry]
+        return NONE
+
+    def _link(self, key: str, value: object, hash_value: int) -> None:
+        """
+        Helper that stores a key that is not in the hash map in a free entry
+        (a new one if there is none) and links it at the head of its chain.
+        """
+
+        index_value = hash_value % self._capacity
+        entry = self._free
+        if entry != NONE:
+            # Reuse the first entry of the free list.
+            self._free = self._next[entry]
+            self._free_count -= 1
+            self._hashes[entry] = hash_value
+            self._keys[entry] = key
+            self._values[entry] = value
+            self._next[entry] = self._heads[index_value]
+        else:
+            entry = len(self._keys)
+            self._hashes.append(hash_value)
+            self._keys.append(key)
+            self._values.append(value)
+            self._next.append(self._heads[index_value])
+        self._heads[index_value] = entry
+
+    def put(self, key: str, value: object) -> None:
+        """
+        This method updates the key/value pair in the hash map. If the given
+        key already exists in the hash map, its associated value is replaced
+        by the new value. If the given key is not in the hash map, a new
+        key/value pair is added.
+
+        Takes 'key' (str), 'value' (object) as parameters.
+
+        Returns None.
+        """
+
+        # Resize to double its current capacity when called and if current
+        # load factor is >= 1.
+        if self.table_load() >= 1:
+            self.resize_table(self._capacity * 2)
+
+        self._put_hashed(key, value, self._hash(key))
+
+    def _put_hashed(self, key: str, value: object, hash_value: int) -> None:
+        """
+        Helper that places the key/value pair using an already computed hash
+        value. Does not check the load factor.
+        """
+
+        # Update in place, do not increment size.
+        entry = self._find(key, hash_value)
+        if entry != NONE:
+            self._values[entry] = value
+            return
+
+        self._link(key, value, hash_value)
+        self._size += 1
+
+    def empty_buckets(self) -> int:
+        """
+        This method returns the number of empty buckets in the hash table.
+
+        Takes no parameters.
+
+        Returns an integer.
+        """
+        return self._heads.count(NONE)
+
+    def table_load(self) -> float:
+        """
+        This method returns the current hash table load factor.
+
+        Takes no parameters.
+
+        Returns the current hash table load factor.
+        """
+        return self._size / self._capacity
+
+    def clear(self) -> None:
+        """
+        This method clears the contents of the hash map. It does not change
+        the underlying table capacity.
+
+        Takes no parameters.
+
+        Returns None.
+        """
+        self._allocate(self._capacity)
+        self._size = 0
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        This method changes the capacity of the internal hash table. All
+        existing key/value pairs remain in the new hash map. The entries stay
+        where they are and are relinked into the new chains with their stored
+        hashes, so no key is rehashed and nothing is allocated per bucket.
+        Free entries left by remove() are dropped first.
+
+        Takes 'new_capacity' (int) as parameter.
+
+        Returns None.
+        """
+
+        # Return if the capacity is less than 1.
+        if new_capacity < 1:
+            return
+
+        # Round the new capacity up to the next prime, from the prime table.
+        new_capacity = next_prime(new_capacity)
+
+        # Keep doubling while the entries would reach a load factor of 1,
+        # the same capacity put() would have grown the table to.
+        while self._size > 0 and (self._size - 1) / new_capacity >= 1:
+            new_capacity = next_prime(new_capacity * 2)
+
+        if self._free_count:
+            self._pack()
+
+        # Relink every entry at the head of its new chain.
+        heads = array('q', [NONE]) * new_capacity
+        next_entry = self._next
+        for entry, hash_value in enumerate(self._hashes):
+            index_value = hash_value % new_capacity
+            next_entry[entry] = heads[index_value]
+            heads[index_value] = entry
+
+        self._heads = heads
+        self._capacity = new_capacity
+
+    def _pack(self) -> None:
+        """
+        Helper that drops the free entries, moving the live ones to the front
+        of the entry arrays. The chains must be relinked afterwards.
+        """
+
+        live = [entry for entry, key in enumerate(self._keys)
+                if key is not None]
+        self._hashes = array('Q', [self._hashes[entry] for entry in live])
+        self._keys = [self._keys[entry] for entry in live]
+        self._values = [self._values[entry] for entry in live]
+        self._next = array('q', [NONE]) * len(live)
+        self._free = NONE
+        self._free_count = 0
+
+    def get(self, key: str) -> object:
+        """
+        This method returns the value associated with the given key. If the key
+        is not in the hash map, the method returns None.
+
+        Takes 'key' (str) as a parameter.
+
+        Returns an object (value of given key).
+        """
+        return self._get_hashed(key, self._hash(key))
+
+    def _get_hashed(self, key: str, hash_value: int) -> object:
+        """
+        Helper that looks up the key using an already computed hash value.
+        """
+        entry = self._find(key, hash_value)
+        if entry == NONE:
+            return None
+        return self._values[entry]
+
+    def contains_key(self, key: str) -> bool:
+        """
+        This method returns True if the given key is in the hash map, otherwise
+        it returns False. An empty hash map does not contain any keys.
+
+        Takes 'key' (str) as parameter.
+
+        Returns bool.
+        """
+        return self._find(key, self._hash(key)) != NONE
+
+    def remove(self, key: str) -> None:
+        """
+        This method removes the given key and its associated value from the
+        hash map. If the key is not in the hash map, the method does nothing.
+
+        Takes 'key' (str) as parameter.
+
+        Returns None.
+        """
+        self._remove_hashed(key, self._hash(key))
+
+    def _remove_hashed(self, key: str, hash_value: int) -> None:
+        """
+        Helper that removes the key using an already computed hash value. The
+        entry is unlinked from its chain, its key and value are released and
+        it goes on the free list.
+        """
+
+        hashes, keys, next_entry = self._hashes, self._keys, self._next
+        index_value = hash_value % self._capacity
+        previous, entry = NONE, self._heads[index_value]
+        while entry != NONE:
+            if hashes[entry] == hash_value and keys[entry] == key:
+                break
+            previous, entry = entry, next_entry[entry]
+        else:
+            return
+
+        # Unlink the entry from its chain.
+        if previous == NONE:
+            self._heads[index_value] = next_entry[entry]
+        else:
+            next_entry[previous] = next_entry[entry]
+
+        keys[entry] = None
+        self._values[entry] = None
+        next_entry[entry] = self._free
+        self._free = entry
+        self._free_count += 1
+        self._size -= 1
+
+    def put_many(self, pairs) -> None:
+        """
+        This method updates the hash map with every key/value pair in the
+        given iterable, as if put() was called for each one in order. The
+        table is resized at most once, up front, and all keys are hashed in
+        one batch.
+
+        Takes 'pairs' (iterable of (key, value) tuples) as parameter.
+
+        Returns None.
+        """
+
+        pairs = list(pairs)
+        keys = [pair[0] for pair in pairs]
+
+        # Presize once so that no insert in the batch needs a resize.
+        needed = self._size + len(pairs)
+        if needed > self._capacity:
+            self.resize_table(needed)
+
+        hash_values = hash_keys(keys, self._hash_function)
+        for (key, value), hash_value in zip(pairs, hash_values):
+            self._put_hashed(key, value, hash_value & HASH_MASK)
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        This method returns the values associated with each of the given keys,
+        in the same order. Keys that are not in the hash map give None.
+
+        Takes 'keys' (iterable of str) as parameter.
+
+        Returns a dynamic array.
+        """
+
+        keys = list(keys)
+        hash_values = [hash_value & HASH_MASK for hash_value
+                       in hash_keys(keys, self._hash_function)]
+        return DynamicArray(list(map(self._get_hashed, keys, hash_values)))
+
+    def remove_many(self, keys) -> None:
+        """
+        This method removes each of the given keys and its associated value
+        from the hash map. Keys that are not in the hash map are ignored.
+
+        Takes 'keys' (iterable of str) as parameter.
+
+        Returns None.
+        """
+
+        keys = list(keys)
+        hash_values = hash_keys(keys, self._hash_function)
+        for key, hash_value in zip(keys, hash_values):
+            self._remove_hashed(key, hash_value & HASH_MASK)
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        This method returns a dynamic array where each index contains a tuple
+        of a key/value pair stored in the hash map. The order of the keys in
+        the dynamic array does not matter.
+
+        Takes no parameters.
+
+        Returns dynamic array.
+        """
+        return DynamicArray([(key, value)
+                             for key, value in zip(self._keys, self._values)
+                             if key is not None])
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nPDF - put example 1")
+    print("-------------------")
+    m = HashMap(53, hash_function_1)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+
+    print("\nPDF - put example 2")
+    print("-------------------")
+    m = HashMap(41, hash_function_2)
+    for i in range(50):
+        m.put('str' + str(i // 3), i * 100)
+        if i % 10 == 9:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+
+    print("\nPDF - contains_key example 2")
+    print("----------------------------")
+    m = HashMap(79, hash_function_2)
+    keys = [i for i in range(1, 1000, 20)]
+    for key in keys:
+        m.put(str(key), key * 42)
+    print(m.get_size(), m.get_capacity())
+    result = True
+    for key in keys:
+        # all inserted keys must be present
+        result &= m.contains_key(str(key))
+        # NOT inserted keys must be absent
+        result &= not m.contains_key(str(key + 1))
+    print(result)
+
+    print("\nPDF - get_keys_and_values example 1")
+    print("------------------------")
+    m = HashMap(11, hash_function_2)
+    for i in range(1, 6):
+        m.put(str(i), str(i * 10))
+    print(m.get_keys_and_values())
+
+    m.resize_table(2)
+    print(m.get_keys_and_values())
+
+    m.put('20', '200')
+    m.remove('1')
+    m.resize_table(12)
+    print(m.get_keys_and_values())
+
+    print("\nmemory example 1")
+    print("----------------")
+    import tracemalloc
+    import hash_map_sc
+    for cls in (hash_map_sc.HashMap, HashMap):
+        tracemalloc.start()
+        m = cls(100003, hash_function_2)
+        for i in range(1000):
+            m.put('str' + str(i), i)
+        print(cls.__module__, tracemalloc.get_traced_memory()[1] // 1024,
+              'KiB')
+        tracemalloc.stop()
@@ -0,0 +1,479 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 (Portfolio)
+# Description: A HashMap partitioned across worker processes. Each key
+# belongs to one shard, chosen from its hash, and each shard is a separate
+# chaining HashMap owned by its own process, so lookups run on as many cores
+# as there are shards instead of sharing one interpreter. The parent hashes
+# every key once and sends the hash along with it, so workers never rehash.
+#
+# Every request to a shard is one message over a pipe, which costs far more
+# than a lookup in a local map. The batch operations (put_many, get_many,
+# remove_many, increment_many) therefore send one message per shard for the
+# whole batch and let all shards work on their part at the same time; they
+# are the operations to use for throughput.
+#
+# A ShardedHashMap is not thread-safe, use one per thread or guard it with a
+# lock. Call close() (or use it in a 'with' block) to stop the workers.
+
+import multiprocessing
+from multiprocessing.reduction import ForkingPickler
+
+from a6_include import DynamicArray, hash_function_1, hash_function_2
+from hash_engine import hash_keys, mix_hash
+from hash_map_sc import HashMap
+
+
+# ------------------------------ WORKER SIDE ------------------------------- #
+# Every operation takes the shard's map and a list of requests, so single key
+# calls and batches are served the same way.
+
+def _put(the_map: HashMap, requests: list) -> None:
+    """
+    Helper that puts (key, value, hash) requests into the shard.
+    """
+    for key, value, hash_value in requests:
+        the_map._make_room()
+        the_map._put_hashed(key, value, hash_value)
+
+
+def _get(the_map: HashMap, requests: list) -> list:
+    """
+    Helper that returns the value of each (key, hash) request.
+    """
+    return [the_map._get_hashed(key, hash_value)
+            for key, hash_value in requests]
+
+
+def _contains(the_map: HashMap, requests: list) -> list:
+    """
+    Helper that returns whether each (key, hash) request is in the shard.
+    """
+    return [the_map._find_node(key, hash_value) is not None
+            for key, hash_value in requests]
+
+
+def _pop(the_map: HashMap, requests: list) -> list:
+    """
+    Helper that removes each (key, hash) request, returning (value,) for a
+    removed key and None for a missing one.
+    """
+    found = []
+    for key, hash_value in requests:
+        the_node = the_map._pop_node(key, hash_value)
+        found.append(None if the_node is None else (the_node.value,))
+    return found
+
+
+def _increment(the_map: HashMap, requests: list) -> list:
+    """
+    Helper that increments each (key, amount, hash) request and returns the
+    new values.
+    """
+    new_values = []
+    for key, amount, hash_value in requests:
+        the_map._make_room()
+        new_values.append(the_map._increment_hashed(key, amount, hash_value))
+    return new_values
+
+
+_OPERATIONS = {
+    'put': _put,
+    'get': _get,
+    'contains': _contains,
+    'pop': _pop,
+    'increment': _increment,
+    'size': lambda the_map: the_map.get_size(),
+    'capacity': lambda the_map: the_map.get_capacity(),
+    'clear': lambda the_map: the_map.clear(),
+    'items': lambda the_map: list(the_map.items()),
+}
+
+
+def _serve(connection, capacity: int, function: callable) -> None:
+    """
+    Helper run in each worker process. It owns one shard and answers
+    (operation, arguments) messages with (True, result), or (False, error)
+    when the operation raised, until it receives 'close'.
+    """
+
+    # The parent hashes the keys, so the shard must never re-seed itself.
+    the_map = HashMap(capacity, function)
+    the_map.set_chain_limit(None)
+    while True:
+        operation, arguments = connection.recv()
+        if operation == 'close':
+            connection.close()
+            return
+        try:
+            result = _OPERATIONS[operation](the_map, *arguments)
+        except Exception as error:
+            connection.send((False, error))
+        else:
+            connection.send((True, result))
+
+
+# ------------------------------ PARENT SIDE ------------------------------- #
+
+class ShardedHashMap:
+    """
+    HashMap split into 'shards' worker processes, with the same put, get,
+    contains_key and remove interface as hash_map_sc.HashMap plus batch
+    operations that are routed to every shard at once.
+    """
+
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 shards: int = None) -> None:
+        """
+        Initialize new ShardedHashMap with 'shards' worker processes
+        (one per CPU by default) that share the given capacity. The hash
+        function must be picklable, such as a module level function.
+        """
+
+        self._hash_function = function
+        self._shard_count = max(1, shards or multiprocessing.cpu_count())
+        shard_capacity = max(1, capacity // self._shard_count)
+
+        self._connections = []
+        self._processes = []
+        for _ in range(self._shard_count):
+            parent_end, child_end = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_serve, args=(child_end, shard_capacity, function),
+                daemon=True)
+            process.start()
+            child_end.close()
+            self._connections.append(parent_end)
+            self._processes.append(process)
+
+    def __enter__(self) -> "ShardedHashMap":
+        """
+        Lets the map be used in a 'with' block that closes it.
+        """
+        return self
+
+    def __exit__(self, *exception) -> None:
+        """
+        Stops the worker processes at the end of a 'with' block.
+        """
+        self.close()
+
+    def close(self) -> None:
+        """
+        This method stops the worker processes. The map cannot be used
+        afterwards. Calling it again does nothing.
+
+        Takes no parameters.
+
+        Returns None.
+        """
+
+        for connection in self._connections:
+            connection.send(('close', ()))
+            connection.close()
+        for process in self._processes:
+            process.join()
+        self._connections = []
+        self._processes = []
+
+    def _shard(self, hash_value: int) -> int:
+        """
+        Helper that returns the shard a hash value belongs to.
+        """
+        return mix_hash(hash_value) % self._shard_count
+
+    def _call(self, requests: dict) -> dict:
+        """
+        Helper that sends one (operation, arguments) message to each shard
+        in 'requests' (shard -> message), then collects the answers, so the
+        shards work at the same time. Re-raises an error raised in a shard.
+        Every message is pickled before any is sent, so a value that cannot
+        be pickled fails the call without leaving answers in the pipes.
+        """
+
+        messages = {shard: ForkingPickler.dumps(message)
+                    for shard, message in requests.items()}
+        for shard, message in messages.items():
+            self._connections[shard].send_bytes(message)
+
+        results, error = {}, None
+        for shard in requests:
+            succeeded, result = self._connections[shard].recv()
+            if succeeded:
+                results[shard] = result
+            elif error is None:
+                error = result
+        if error is not None:
+            raise error
+        return results
+
+    def _call_all(self, operation: str) -> list:
+        """
+        Helper that runs an operation without arguments on every shard.
+        """
+        requests = {shard: (operation, ()) for shard in
+                    range(self._shard_count)}
+        return list(self._call(requests).values())
+
+    def _batch(self, operation: str, keys: list, extras: list = None) -> list:
+        """
+        Helper that hashes the keys in one batch, sends each shard the
+        requests for its keys in one message, and returns the results in the
+        order of the keys. 'extras' holds, for each key, a tuple of values
+        sent between the key and its hash.
+        """
+
+        hash_values = hash_keys(keys, self._hash_function)
+        positions = {}
+        requests = {}
+        for i, (key, hash_value) in enumerate(zip(keys, hash_values)):
+            shard = self._shard(hash_value)
+            request = (key,) + (extras[i] if extras else ()) + (hash_value,)
+            requests.setdefault(shard, []).append(request)
+            positions.setdefault(shard, []).append(i)
+
+        results = self._call({shard: (operation, (shard_requests,))
+                              for shard, shard_requests in requests.items()})
+
+        ordered = [None] * len(keys)
+        for shard, shard_results in results.items():
+            if shard_results is None:
+                continue
+            for i, result in zip(positions[shard], shard_results):
+                ordered[i] = result
+        return ordered
+
+    def get_size(self) -> int:
+        """
+        This method returns the number of key/value pairs in the hash map.
+
+        Takes no parameters.
+
+        Returns an integer.
+        """
+        return sum(self._call_all('size'))
+
+    def get_capacity(self) -> int:
+        """
+        This method returns the total number of buckets of all shards.
+
+        Takes no parameters.
+
+        Returns an integer.
+        """
+        return sum(self._call_all('capacity'))
+
+    def table_load(self) -> float:
+        """
+        This method returns the current hash table load factor.
+
+        Takes no parameters.
+
+        Returns a float.
+        """
+        return self.get_size() / self.get_capacity()
+
+    def put(self, key: str, value: object) -> None:
+        """
+        This method updates the key/value pair in the shard of the key.
+
+        Takes 'key' (str), 'value' (object) as parameters.
+
+        Returns None.
+        """
+        self._batch('put', [key], [(value,)])
+
+    def get(self, key: str) -> object:
+        """
+        This method returns the value associated with the given key, or None
+        if the key is not in the hash map.
+
+        Takes 'key' (str) as a parameter.
+
+        Returns an object.
+        """
+        return self._batch('get', [key])[0]
+
+    def contains_key(self, key: str) -> bool:
+        """
+        This method returns True if the given key is in the hash map,
+        otherwise returns False.
+
+        Takes 'key' (str) as parameter.
+
+        Returns bool.
+        """
+        return self._batch('contains', [key])[0]
+
+    def remove(self, key: str) -> None:
+        """
+        This method removes the given key and its associated value from the
+        hash map. If the key is not in the hash map, this method does nothing.
+
+        Takes 'key' (str) as parameter.
+
+        Returns None.
+        """
+        self._batch('pop', [key])
+
+    def pop(self, key: str, default: object = None) -> object:
+        """
+        This method removes the given key from the hash map and returns its
+        value, or returns 'default' if the key is not in the hash map.
+
+        Takes 'key' (str), 'default' (object) as parameters.
+
+        Returns the removed value, or 'default'.
+        """
+        found = self._batch('pop', [key])[0]
+        return default if found is None else found[0]
+
+    def increment(self, key: str, amount: object = 1) -> object:
+        """
+        This method adds 'amount' to the value of the given key, inserting
+        the key with 'amount' as its value if it is not in the hash map.
+
+        Takes 'key' (str), 'amount' (number) as parameters.
+
+        Returns the new value of the key.
+        """
+        return self._batch('increment', [key], [(amount,)])[0]
+
+    def put_many(self, pairs) -> None:
+        """
+        This method updates the hash map with every key/value pair in the
+        given iterable, with one message per shard.
+
+        Takes 'pairs' (iterable of (key, value) tuples) as parameter.
+
+        Returns None.
+        """
+        pairs = list(pairs)
+        self._batch('put', [pair[0] for pair in pairs],
+                    [(pair[1],) for pair in pairs])
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        This method returns the values associated with each of the given keys,
+        in the same order, with one message per shard. Keys that are not in
+        the hash map give None.
+
+        Takes 'keys' (iterable of str) as parameter.
+
+        Returns a dynamic array.
+        """
+        return DynamicArray(self._batch('get', list(keys)))
+
+    def remove_many(self, keys) -> None:
+        """
+        This method removes each of the given keys and its associated value
+        from the hash map, with one message per shard. Keys that are not in
+        the hash map are ignored.
+
+        Takes 'keys' (iterable of str) as parameter.
+
+        Returns None.
+        """
+        self._batch('pop', list(keys))
+
+    def increment_many(self, keys, amount: object = 1) -> None:
+        """
+        This method adds 'amount' to the value of each of the given keys,
+        with one message per shard.
+
+        Takes 'keys' (iterable of str), 'amount' (number) as parameters.
+
+        Returns None.
+        """
+        keys = list(keys)
+        self._batch('increment', keys, [(amount,)] * len(keys))
+
+    def clear(self) -> None:
+        """
+        This method clears the contents of every shard.
+
+        Takes no parameters.
+
+        Returns None.
+        """
+        self._call_all('clear')
+
+    def items(self):
+        """
+        This method yields a (key, value) tuple for each key in the hash
+        map, one shard at a time.
+
+        Takes no parameters.
+
+        Returns a generator of tuples.
+        """
+        for shard in range(self._shard_count):
+            yield from self._call({shard: ('items', ())})[shard]
+
+    def keys(self):
+        """
+        This method yields each key in the hash map, one shard at a time.
+
+        Takes no parameters.
+
+        Returns a generator of keys.
+        """
+        for key, _ in self.items():
+            yield key
+
+    def values(self):
+        """
+        This method yields each value in the hash map, one shard at a time.
+
+        Takes no parameters.
+
+        Returns a generator of values.
+        """
+        for _, value in self.items():
+            yield value
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        This method returns a dynamic array where each index contains a tuple
+        of a key/value pair stored in the hash map.
+
+        Takes no parameters.
+
+        Returns a dynamic array.
+        """
+        return DynamicArray(list(self.items()))
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nShardedHashMap example 1")
+    print("------------------------")
+    with ShardedHashMap(53, hash_function_2, shards=4) as m:
+        for i in range(150):
+            m.put('str' + str(i), i * 100)
+        print(m.get_size(), m.get('str42'), m.contains_key('str42'))
+        m.remove('str42')
+        print(m.get_size(), m.get('str42'), m.pop('str43'), m.pop('str43', 0))
+
+    print("\nShardedHashMap example 2 - batches")
+    print("----------------------------------")
+    with ShardedHashMap(11, hash_function_1, shards=3) as m:
+        m.put_many(('key' + str(i), i) for i in range(1000))
+        print(m.get_size(), m.get_many(['key1', 'key500', 'nokey']))
+        m.remove_many('key' + str(i) for i in range(0, 1000, 2))
+        m.increment_many(['key1', 'key1', 'key2'])
+        print(m.get_size(), m.get('key1'), m.get('key2'), sum(m.values()))
+
+    print("\nShardedHashMap example 3 - unpicklable value")
+    print("---------------------------------------------")
+    with ShardedHashMap(11, hash_function_1, shards=3) as m:
+        m.put_many(('key' + str(i), i) for i in range(100))
+        try:
+            m.put_many([('key0', 'x'), ('key1', lambda: 1)])
+        except Exception as error:
+            print(type(error).__name__)
+        print(m.get_size(), m.get('key0'), m.get('key1'))
+        assert m.get_size() == 100 and m.get('key0') == 0
@@ -0,0 +1,489 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 (Portfolio)
+# Description: Binary snapshots of the separate chaining and open addressing
+# HashMaps, so a large table can be saved once and loaded again much faster
+# than by calling put() for every key. A snapshot records the capacity, the
+# hash function and the full hash of every key, so loading never hashes a key
+# or searches for a free bucket: separate chaining nodes go straight into the
+# bucket their stored hash selects, and open addressing entries go back into
+# the exact bucket they were saved from.
+#
+# File layout:
+#   header  HEADER.size bytes: magic, kind of map, capacity, size,
+#           tombstones and the name of the hash function.
+#   blocks  a sequence of blocks of at most 'block_size' entries, each a
+#           length followed by the number of entries, their bucket
+#           indexes, hashes and key sizes as arrays of little endian 64 bit
+#           integers, their keys in UTF-8, and a pickled list of their
+#           values. A block of length 0 ends the file. An open addressing
+#           tombstone is stored with a hash of 0, a key size of TOMBSTONE
+#           and a value of None.
+#
+# The entries are written and read one block at a time, so neither side ever
+# holds more than one block of them outside the map itself.
+#
+# Only the values are pickled, and they are loaded by an unpickler that
+# rebuilds built-in types and refuses every other class, so a snapshot
+# cannot make load() import or call anything. Values of other classes can
+# be saved but not loaded.
+
+import builtins
+import io
+import os
+import pickle
+import struct
+import sys
+from array import array
+
+import hash_map_oa as oa
+import hash_map_sc as sc
+from a6_include import HashEntry
+from hash_engine import (hash_function_by_name, hash_function_name,
+                         seeded_hash_function)
+
+
+MAGIC = b'A6SNAP03'
+
+# Magic, kind of map, capacity, size, tombstones and hash function name.
+HEADER = struct.Struct('<8sB7xQQQ64s')
+
+# Length in bytes of the block that follows it, and number of entries at
+# the start of a block.
+BLOCK_LENGTH = struct.Struct('<Q')
+ENTRY_COUNT = struct.Struct('<Q')
+
+# Key size recorded for an open addressing tombstone, which has no key.
+TOMBSTONE = 2 ** 64 - 1
+
+# Built-in types a pickled value may refer to by name.
+SAFE_BUILTINS = frozenset({'bytearray', 'complex', 'frozenset', 'range',
+                           'set', 'slice'})
+
+# Number of entries per block.
+BLOCK_SIZE = 65536
+
+# Map classes a snapshot can hold, by the kind recorded in its header.
+KINDS = {
+    1: sc.HashMap,
+    2: sc.IncrementalHashMap,
+    3: oa.HashMap,
+    4: oa.RobinHoodHashMap,
+    5: oa.IncrementalHashMap,
+    6: sc.PowerOfTwoHashMap,
+    7: oa.PowerOfTwoHashMap,
+}
+
+
+def _kind(the_map) -> int:
+    """
+    Helper that returns the kind recorded for the class of the map.
+    """
+
+    for kind, cls in KINDS.items():
+        if type(the_map) is cls:
+            return kind
+    raise TypeError(f"cannot snapshot a {type(the_map).__name__}")
+
+
+def _is_oa(kind: int) -> bool:
+    """
+    Helper that returns True if the kind is an open addressing map.
+    """
+    return issubclass(KINDS[kind], oa.HashMap)
+
+
+class _ValueUnpickler(pickle.Unpickler):
+    """
+    Unpickler for the values of a snapshot. It only rebuilds built-in types,
+    any other class named by the data is refused.
+    """
+
+    def find_class(self, module: str, name: str):
+        """
+        Return the built-in type of the given name, raising ValueError for
+        every other global.
+        """
+        if module == 'builtins' and name in SAFE_BUILTINS:
+            return getattr(builtins, name)
+        raise ValueError(f"snapshot value refers to {module}.{name}, only "
+                         f"built-in types can be loaded")
+
+
+def _pack_integers(integers: list) -> bytes:
+    """
+    Helper that returns the integers as little endian 64 bit integers.
+    """
+
+    packed = array('Q', integers)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _unpack_integers(data) -> list:
+    """
+    Helper that returns the list of integers packed by _pack_integers().
+    """
+
+    unpacked = array('Q')
+    unpacked.frombytes(data)
+    if sys.byteorder == 'big':
+        unpacked.byteswap()
+    return unpacked.tolist()
+
+
+def _write_block(file, indexes: list, hashes: list, keys: list,
+                 values: list) -> None:
+    """
+    Helper that writes one block of entries with its length in front. A
+    tombstone is passed with a hash and key of None.
+    """
+
+    encoded = [b'' if key is None else key.encode() for key in keys]
+    sizes = [TOMBSTONE if key is None else len(data)
+             for key, data in zip(keys, encoded)]
+    block = b''.join((ENTRY_COUNT.pack(len(indexes)),
+                      _pack_integers(indexes),
+                      _pack_integers([hash_value or 0
+                                      for hash_value in hashes]),
+                      _pack_integers(sizes),
+                      b''.join(encoded),
+                      pickle.dumps(values, pickle.HIGHEST_PROTOCOL)))
+    file.write(BLOCK_LENGTH.pack(len(block)))
+    file.write(block)
+
+
+def _read_exactly(file, length: int) -> bytes:
+    """
+    Helper that reads 'length' bytes, raising ValueError if the file ends
+    first.
+    """
+
+    data = file.read(length)
+    if len(data) != length:
+        raise ValueError("snapshot is truncated")
+    return data
+
+
+def _blocks(file):
+    """
+    Helper that yields the (indexes, hashes, keys, values) lists of every
+    block up to the end marker. A tombstone has a hash and key of None.
+    """
+
+    while True:
+        length, = BLOCK_LENGTH.unpack(_read_exactly(file, BLOCK_LENGTH.size))
+        if length == 0:
+            return
+        block = memoryview(_read_exactly(file, length))
+
+        # Three arrays of 'count' integers, then the keys, then the values.
+        count, = ENTRY_COUNT.unpack_from(block)
+        offset = ENTRY_COUNT.size
+        if offset + 24 * count > length:
+            raise ValueError("snapshot block is corrupt")
+        indexes, hashes, sizes = (
+            _unpack_integers(block[offset + 8 * count * i:
+                                   offset + 8 * count * (i + 1)])
+            for i in range(3))
+        offset += 24 * count
+
+        keys = []
+        for i, size in enumerate(sizes):
+            if size == TOMBSTONE:
+                keys.append(None)
+                hashes[i] = None
+                continue
+            if offset + size > length:
+                raise ValueError("snapshot block is corrupt")
+            keys.append(str(block[offset:offset + size], 'utf-8'))
+            offset += size
+
+        values = _ValueUnpickler(io.BytesIO(block[offset:])).load()
+        if not isinstance(values, list) or len(values) != count:
+            raise ValueError("snapshot block is corrupt")
+        yield indexes, hashes, keys, values
+
+
+def _sc_entries(the_map):
+    """
+    Helper that yields (bucket index, hash, key, value) for every node of a
+    separate chaining map. Each bucket is listed from its tail to its head,
+    so inserting at the front while loading rebuilds the same chain order.
+    """
+
+    buckets = the_map._buckets
+    for index in range(buckets.length()):
+        nodes = [(index, node.hash, node.key, node.value)
+                 for node in buckets[index]]
+        yield from reversed(nodes)
+
+
+def _oa_entries(the_map):
+    """
+    Helper that yields (bucket index, hash, key, value) for every used
+    bucket of an open addressing map. A tombstone is listed with a hash, key
+    and value of None and kept, because dropping it could cut the probe
+    sequence of a later key. The removed key and value are not written.
+    """
+
+    buckets = the_map._buckets
+    for index in range(buckets.length()):
+        the_bucket = buckets[index]
+        if the_bucket is None:
+            continue
+        if the_bucket.is_tombstone:
+            yield index, None, None, None
+        else:
+            yield index, the_bucket.hash, the_bucket.key, the_bucket.value
+
+
+def save(the_map, file, block_size: int = BLOCK_SIZE) -> None:
+    """
+    This function writes a snapshot of a separate chaining or open
+    addressing HashMap (or one of their subclasses) to a binary file. An
+    incremental resize that is in progress is finished first.
+
+    Takes 'the_map' (HashMap), 'file' (binary file object open for writing),
+    'block_size' (int) as parameters.
+
+    Returns None.
+    """
+
+    kind = _kind(the_map)
+    if hasattr(the_map, '_migrate'):
+        the_map._migrate(None)
+
+    function_name = hash_function_name(the_map._hash_function)
+    if len(function_name.encode()) > 64:
+        raise ValueError(f"hash function name {function_name!r} is too long")
+    file.write(HEADER.pack(MAGIC, kind, the_map._capacity, the_map._size,
+                           the_map._tombstones if _is_oa(kind) else 0,
+                           function_name.encode()))
+
+    entries = _oa_entries(the_map) if _is_oa(kind) else _sc_entries(the_map)
+    indexes, hashes, keys, values = [], [], [], []
+    for index, hash_value, key, value in entries:
+        indexes.append(index)
+        hashes.append(hash_value)
+        keys.append(key)
+        values.append(value)
+        if len(indexes) == block_size:
+            _write_block(file, indexes, hashes, keys, values)
+            indexes, hashes, keys, values = [], [], [], []
+    if indexes:
+        _write_block(file, indexes, hashes, keys, values)
+
+    file.write(BLOCK_LENGTH.pack(0))
+
+
+def load(file, function: callable = None, reseed: bool = False):
+    """
+    This function reads a snapshot written by save() and returns a map of
+    the same class, capacity and contents. The entries are put back directly
+    into their buckets using their stored hashes, without calling put().
+
+    The snapshot names its hash function but does not store the seed of a
+    seeded one, so such a snapshot needs the seeded function passed in.
+    With 'reseed' set, a snapshot written with a seeded function that is
+    not given is loaded under a new random seed instead, and every key is
+    hashed again with put_many().
+
+    Takes 'file' (binary file object open for reading) and optionally
+    'function' (callable or str), 'reseed' (bool) as parameters. The hash
+    function defaults to the one named in the snapshot; one given
+    explicitly must have that name.
+
+    Returns a HashMap.
+    """
+
+    magic, kind, capacity, size, tombstones, function_name = \
+        HEADER.unpack(_read_exactly(file, HEADER.size))
+    if magic != MAGIC:
+        raise ValueError("not a hash map snapshot")
+    if kind not in KINDS:
+        raise ValueError(f"unknown kind of map {kind} in snapshot")
+
+    function_name = function_name.rstrip(b'\0').decode()
+    base_name, _, key_id = function_name.partition('@')
+    if function is None and key_id and reseed:
+        the_map = KINDS[kind](capacity, seeded_hash_function(base_name))
+        count = 0
+        for _, hashes, keys, values in _blocks(file):
+            the_map.put_many((key, value) for hash_value, key, value in
+                             zip(hashes, keys, values)
+                             if hash_value is not None)
+            count += len(keys)
+        if count != size + tombstones:
+            raise ValueError(f"snapshot holds {count} entries, header says "
+                             f"{size + tombstones}")
+        return the_map
+    if function is None:
+        function = hash_function_by_name(function_name)
+
+    # The capacity is already prime (a power of two for the power of two
+    # maps), so the constructor keeps it. The hash function is compared
+    # after the constructor has wrapped it, as the maps that mix their
+    # hash function do.
+    the_map = KINDS[kind](capacity, function)
+    if hash_function_name(the_map._hash_function) != function_name:
+        raise ValueError(f"snapshot was written with {function_name}, "
+                         f"not {hash_function_name(function)}")
+    buckets = the_map._buckets
+    count = 0
+
+    if not _is_oa(kind):
+        insert_hashed, index = the_map._insert_hashed, the_map._index
+        for _, hashes, keys, values in _blocks(file):
+            for hash_value, key, value in zip(hashes, keys, values):
+                insert_hashed(buckets[index(hash_value, capacity)], key,
+                              value, hash_value)
+            count += len(keys)
+        the_map._treeify_buckets(buckets)
+    else:
+        for indexes, hashes, keys, values in _blocks(file):
+            for index, hash_value, key, value in zip(indexes, hashes, keys,
+                                                     values):
+                hash_entry = HashEntry(key, value)
+                hash_entry.hash = hash_value
+                if hash_value is None:
+                    hash_entry.is_tombstone = True
+                buckets.set_at_index(index, hash_entry)
+            count += len(keys)
+        the_map._tombstones = tombstones
+
+    if count != size + tombstones:
+        raise ValueError(f"snapshot holds {count} entries, header says "
+                         f"{size + tombstones}")
+    the_map._size = size
+    return the_map
+
+
+def save_file(the_map, path: str, block_size: int = BLOCK_SIZE) -> None:
+    """
+    This function writes a snapshot of the map to a file at 'path'. It is
+    written next to the path first and then renamed over it, so a crash
+    never leaves a half written snapshot in its place.
+
+    Takes 'the_map' (HashMap), 'path' (str), 'block_size' (int) as
+    parameters.
+
+    Returns None.
+    """
+
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'wb') as file:
+        save(the_map, file, block_size)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+
+
+def load_file(path: str, function: callable = None, reseed: bool = False):
+    """
+    This function reads the snapshot in the file at 'path', see load().
+
+    Takes 'path' (str) and optionally 'function' (callable), 'reseed' (bool)
+    as parameters.
+
+    Returns a HashMap.
+    """
+
+    with open(path, 'rb') as file:
+        return load(file, function, reseed)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    import io
+    import tempfile
+    import time
+
+    from a6_include import hash_function_1, hash_function_2
+
+    print("\nsave/load example 1")
+    print("-------------------")
+    m = sc.HashMap(11, hash_function_1)
+    for i in range(30):
+        m.put('key' + str(i), i * 10)
+    buffer = io.BytesIO()
+    save(m, buffer)
+    buffer.seek(0)
+    copy = load(buffer)
+    print(type(copy).__name__, copy.get_size(), copy.get_capacity(),
+          copy.get('key7'), str(copy) == str(m))
+
+    print("\nsave/load example 2")
+    print("-------------------")
+    for cls in (oa.HashMap, oa.RobinHoodHashMap, oa.IncrementalHashMap):
+        m = cls(11, hash_function_2)
+        for i in range(60):
+            m.put('key' + str(i), [i])
+        for i in range(0, 60, 3):
+            m.remove('key' + str(i))
+        buffer = io.BytesIO()
+        save(m, buffer, block_size=16)
+        buffer.seek(0)
+        copy = load(buffer, hash_function_2)
+        print(cls.__name__, copy.get_size(), copy.get_capacity(),
+              copy.get_tombstone_count(), copy.get('key4'),
+              copy.contains_key('key3'), str(copy) == str(m))
+
+    print("\nsave_file/load_file example 1")
+    print("-----------------------------")
+    m = sc.HashMap(11, hash_function_2)
+    m.set_chain_limit(None)
+    m.put_many((f"k{i}", i) for i in range(100000))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'table.a6snap')
+        save_file(m, path)
+        start = time.perf_counter()
+        copy = load_file(path)
+        loaded = time.perf_counter() - start
+        start = time.perf_counter()
+        rebuilt = sc.HashMap(11, hash_function_2)
+        rebuilt.set_chain_limit(None)
+        for key, value in m.items():
+            rebuilt.put(key, value)
+        print(copy.get_size(), copy.get('k99999'),
+              f"load faster than put(): {loaded < time.perf_counter() - start}")
+
+    print("\nsave/load example 3 - seeded hash function")
+    print("------------------------------------------")
+    m = sc.HashMap(11, hash_function_1)
+    for i in range(30):
+        m.put('key' + str(i), i * 10)
+    m.reseed()
+    buffer = io.BytesIO()
+    save(m, buffer)
+    for function, reseed in ((None, False), (m._hash_function, False),
+                             (None, True)):
+        buffer.seek(0)
+        try:
+            copy = load(buffer, function, reseed)
+        except ValueError as error:
+            print(error)
+            continue
+        print(copy.get_size(), copy.get('key7'),
+              copy._hash_function is m._hash_function)
+
+    print("\nsave/load example 4 - values of other classes")
+    print("---------------------------------------------")
+    from fractions import Fraction
+    m = sc.HashMap(11, hash_function_1)
+    m.put('tuple', (1, 2.5, 'x'))
+    m.put('set', {3, 4})
+    buffer = io.BytesIO()
+    save(m, buffer)
+    buffer.seek(0)
+    print(sorted(load(buffer).items()))
+    m.put('fraction', Fraction(1, 3))
+    buffer = io.BytesIO()
+    save(m, buffer)
+    buffer.seek(0)
+    try:
+        load(buffer)
+    except ValueError as error:
+        print(error)
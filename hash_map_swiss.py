@@ -0,0 +1,460 @@
+# Course: CS261 - Data Structures
+# Assignment: 6 (Portfolio)
+# Description: An open addressing HashMap in the style of SwissTable. Next to
+# the flat key, value and stored hash arrays, the table keeps one control
+# byte per slot: either EMPTY, DELETED, or a 7-bit fingerprint of the hash of
+# the key stored there. Slots are probed a group at a time, and each group's
+# control bytes are scanned with bytearray.find(), which runs in C, so a key
+# is only compared when its fingerprint matches. Groups are probed with
+# triangular steps over a power of two number of groups. Hashes are mixed
+# first, so the group index and the fingerprint come from different bits.
+
+from array import array
+
+from a6_include import DynamicArray, hash_function_1, hash_function_2
+from hash_engine import fast_path, hash_keys, mix_hash
+
+
+# Control byte values. Fingerprints are the 7 low bits of the mixed hash, so
+# they never collide with EMPTY or DELETED.
+EMPTY = 0x80
+DELETED = 0xFE
+
+# Number of slots scanned together, and the smallest capacity of the table.
+GROUP_WIDTH = 16
+
+# Largest fraction of slots that may be live or DELETED before a resize.
+MAX_LOAD = 0.875
+
+
+class HashMap:
+    def __init__(self, capacity: int, function) -> None:
+        """
+        Initialize new HashMap that uses grouped control byte probing for
+        collision resolution
+        """
+
+        # capacity must be a power of two number of slots, at least one group
+        self._capacity = self._next_power_of_two(capacity)
+        self._allocate(self._capacity)
+
+        self._hash_function = function
+        self._size = 0
+        self._tombstones = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            control = self._control[i]
+            if control == EMPTY:
+                entry = 'None'
+            else:
+                entry = (f"K: {self._keys[i]} V: {self._values[i]} "
+                         f"TS: {control == DELETED}")
+            out += str(i) + ': ' + entry + '\n'
+        return out
+
+    @staticmethod
+    def _next_power_of_two(capacity: int) -> int:
+        """
+        Return the smallest power of two that is at least the given number
+        and at least one group wide
+        """
+        power = GROUP_WIDTH
+        while power < capacity:
+            power *= 2
+        return power
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Helper that creates an empty table with the given number of slots.
+        """
+        self._control = bytearray([EMPTY]) * capacity
+        self._hashes = array('Q', bytes(8 * capacity))
+        self._keys = [None] * capacity
+        self._values = [None] * capacity
+        self._group_mask = capacity // GROUP_WIDTH - 1
+
+    def _hash(self, key: str) -> int:
+        """
+        Helper that hashes the key with the map's hash function, using the
+        per-key fast path from hash_engine when one exists, and mixes it.
+        """
+        return mix_hash(fast_path(self._hash_function)(key))
+
+    def _groups(self, mixed: int):
+        """
+        Helper that yields the start index of each group in the probe
+        sequence of a mixed hash. Triangular steps visit every group once.
+        """
+        group_mask = self._group_mask
+        group = (mixed >> 7) & group_mask
+        for step in range(1, group_mask + 2):
+            yield group * GROUP_WIDTH
+            group = (group + step) & group_mask
+
+    def _find_index(self, key: str, mixed: int) -> int:
+        """
+        Helper that returns the slot holding the key, or None if the key is
+        not in the hash map. Keys are only compared in slots whose
+        fingerprint matches.
+        """
+
+        control, hashes, keys = self._control, self._hashes, self._keys
+        fingerprint = mixed & 0x7F
+
+        for start in self._groups(mixed):
+            end = start + GROUP_WIDTH
+
+            i = control.find(fingerprint, start, end)
+            while i != -1:
+                if hashes[i] == mixed and keys[i] == key:
+                    return i
+                i = control.find(fingerprint, i + 1, end)
+
+            # A group with an empty slot ends the probe.
+            if control.find(EMPTY, start, end) != -1:
+                return None
+
+        return None
+
+    def _free_index(self, mixed: int) -> int:
+        """
+        Helper that returns the first EMPTY or DELETED slot in the probe
+        sequence of a mixed hash.
+        """
+
+        control = self._control
+        for start in self._groups(mixed):
+            end = start + GROUP_WIDTH
+            empty = control.find(EMPTY, start, end)
+            deleted = control.find(DELETED, start, end)
+            if empty != -1 or deleted != -1:
+                if empty == -1 or (deleted != -1 and deleted < empty):
+                    return deleted
+                return empty
+        return None
+
+    def _place(self, index: int, key: str, value: object, mixed: int) -> None:
+        """
+        Helper that writes a live slot at the given index.
+        """
+        if self._control[index] == DELETED:
+            self._tombstones -= 1
+        self._control[index] = mixed & 0x7F
+        self._hashes[index] = mixed
+        self._keys[index] = key
+        self._values[index] = value
+
+    def put(self, key: str, value: object) -> None:
+        """
+        This method updates the key/value pair in the hash map. If the given
+        key already exists in the hash map, its associated value is replaced
+        by the new value. If the given key is not in the hash map, a new
+        key/value pair is added.
+
+        Takes 'key' (str), 'value' (object) as parameters.
+
+        Returns None.
+        """
+
+        # Grow (or just drop DELETED slots) once live and DELETED slots reach
+        # the maximum load.
+        if self._size + self._tombstones + 1 > self._capacity * MAX_LOAD:
+            if (self._size + 1) * 2 > self._capacity * MAX_LOAD:
+                self.resize_table(self._capacity * 2)
+            else:
+                self.compact()
+
+        self._put_hashed(key, value, self._hash(key))
+
+    def _put_hashed(self, key: str, value: object, mixed: int) -> None:
+        """
+        Helper that places the key/value pair using an already mixed hash
+        value. Does not check the load factor.
+        """
+
+        index_value = self._find_index(key, mixed)
+
+        # Update in place, do not increment size.
+        if index_value is not None:
+            self._values[index_value] = value
+            return
+
+        self._place(self._free_index(mixed), key, value, mixed)
+        self._size += 1
+
+    def table_load(self) -> float:
+        """
+        This method returns the current hash table load factor.
+
+        Takes no parameters.
+
+        Returns the current hash table load factor.
+        """
+        return self._size / self._capacity
+
+    def empty_buckets(self) -> int:
+        """
+        This method returns the number of empty slots in the hash table.
+
+        Takes no parameters.
+
+        Returns an integer.
+        """
+        return self._control.count(EMPTY)
+
+    def get_tombstone_count(self) -> int:
+        """
+        This method returns the number of DELETED slots in the hash table.
+
+        Takes no parameters.
+
+        Returns an integer.
+        """
+        return self._tombstones
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        This method changes the capacity of the internal hash table, rounded
+        up to a power of two that keeps the live entries under the maximum
+        load. Entries are redistributed with their stored hashes, so no key
+        is rehashed, and DELETED slots are dropped.
+
+        Takes 'new_capacity' (int) as parameter.
+
+        Returns None.
+        """
+
+        # Return if the capacity is less than the size.
+        if new_capacity < self._size:
+            return
+
+        new_capacity = self._next_power_of_two(new_capacity)
+        while self._size > new_capacity * MAX_LOAD:
+            new_capacity *= 2
+
+        old_control, old_hashes = self._control, self._hashes
+        old_keys, old_values = self._keys, self._values
+
+        self._capacity = new_capacity
+        self._tombstones = 0
+        self._allocate(new_capacity)
+
+        # Keys are unique, so each one goes to the first free slot.
+        for i in range(len(old_control)):
+            if old_control[i] < EMPTY:
+                mixed = old_hashes[i]
+                self._place(self._free_index(mixed), old_keys[i],
+                            old_values[i], mixed)
+
+    def compact(self) -> None:
+        """
+        This method rebuilds the hash table at its current capacity, dropping
+        every DELETED slot.
+
+        Takes no parameters.
+
+        Returns None.
+        """
+        self.resize_table(self._capacity)
+
+    def get(self, key: str) -> object:
+        """
+        This method returns the value associated with the given key. If the key
+        is not in the hash map, the method returns None.
+
+        Takes 'key' (str) as a parameter.
+
+        Returns an object (value of given key).
+        """
+        return self._get_hashed(key, self._hash(key))
+
+    def _get_hashed(self, key: str, mixed: int) -> object:
+        """
+        Helper that looks up the key using an already mixed hash value.
+        """
+        index_value = self._find_index(key, mixed)
+        if index_value is None:
+            return None
+        return self._values[index_value]
+
+    def contains_key(self, key: str) -> bool:
+        """
+        This method returns True if the given key is in the hash map, otherwise
+        it returns False. An empty hash map does not contain any keys.
+
+        Takes 'key' (str) as parameter.
+
+        Returns bool.
+        """
+        return self._find_index(key, self._hash(key)) is not None
+
+    def remove(self, key: str) -> None:
+        """
+        This method removes the given key and its associated value from the
+        hash map. If the key is not in the hash map, the method does nothing.
+
+        Takes 'key' (str) as parameter.
+
+        Returns None.
+        """
+        self._remove_hashed(key, self._hash(key))
+
+    def _remove_hashed(self, key: str, mixed: int) -> None:
+        """
+        Helper that removes the key using an already mixed hash value. If its
+        group still has an EMPTY slot, no probe ever passes that group, so the
+        slot can become EMPTY again; otherwise it is marked DELETED.
+        """
+
+        index_value = self._find_index(key, mixed)
+        if index_value is None:
+            return
+
+        start = index_value - index_value % GROUP_WIDTH
+        if self._control.find(EMPTY, start, start + GROUP_WIDTH) != -1:
+            self._control[index_value] = EMPTY
+        else:
+            self._control[index_value] = DELETED
+            self._tombstones += 1
+        self._keys[index_value] = None
+        self._values[index_value] = None
+        self._size -= 1
+
+    def clear(self) -> None:
+        """
+        This method clears the contents of the hash map. It does not change
+        the underlying table capacity.
+
+        Takes no parameters.
+
+        Returns None.
+        """
+        self._allocate(self._capacity)
+        self._size = 0
+        self._tombstones = 0
+
+    def put_many(self, pairs) -> None:
+        """
+        This method updates the hash map with every key/value pair in the
+        given iterable, as if put() was called for each one in order. The
+        table is resized at most once, up front, and all keys are hashed in
+        one batch.
+
+        Takes 'pairs' (iterable of (key, value) tuples) as parameter.
+
+        Returns None.
+        """
+
+        pairs = list(pairs)
+        keys = [pair[0] for pair in pairs]
+
+        # Presize once so live and DELETED slots stay under the maximum load.
+        needed = self._size + self._tombstones + len(pairs)
+        if needed > self._capacity * MAX_LOAD:
+            self.resize_table(int((self._size + len(pairs)) / MAX_LOAD) + 1)
+
+        hash_values = hash_keys(keys, self._hash_function)
+        for (key, value), hash_value in zip(pairs, hash_values):
+            self._put_hashed(key, value, mix_hash(hash_value))
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        This method returns the values associated with each of the given keys,
+        in the same order. Keys that are not in the hash map give None.
+
+        Takes 'keys' (iterable of str) as parameter.
+
+        Returns a dynamic array.
+        """
+
+        keys = list(keys)
+        mixed = map(mix_hash, hash_keys(keys, self._hash_function))
+        return DynamicArray(list(map(self._get_hashed, keys, mixed)))
+
+    def remove_many(self, keys) -> None:
+        """
+        This method removes each of the given keys and its associated value
+        from the hash map. Keys that are not in the hash map are ignored.
+
+        Takes 'keys' (iterable of str) as parameter.
+
+        Returns None.
+        """
+
+        keys = list(keys)
+        hash_values = hash_keys(keys, self._hash_function)
+        for key, hash_value in zip(keys, hash_values):
+            self._remove_hashed(key, mix_hash(hash_value))
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        This method returns a dynamic array where each index contains a tuple
+        of a key/value pair stored in the hash map. The order of the keys in
+        the dynamic array does not matter.
+
+        Takes no parameters.
+
+        Returns dynamic array.
+        """
+
+        control, keys, values = self._control, self._keys, self._values
+        return DynamicArray([(keys[i], values[i])
+                             for i in range(self._capacity)
+                             if control[i] < EMPTY])
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nput example 1")
+    print("-------------")
+    m = HashMap(53, hash_function_1)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+
+    print("\ncontains_key example 2")
+    print("----------------------")
+    m = HashMap(79, hash_function_2)
+    keys = [i for i in range(1, 1000, 20)]
+    for key in keys:
+        m.put(str(key), key * 42)
+    print(m.get_size(), m.get_capacity())
+    result = True
+    for key in keys:
+        # all inserted keys must be present
+        result &= m.contains_key(str(key))
+        # NOT inserted keys must be absent
+        result &= not m.contains_key(str(key + 1))
+    print(result)
+
+    print("\nremove example 1")
+    print("----------------")
+    m = HashMap(16, hash_function_1)
+    for i in range(14):
+        m.put('key' + str(i), i)
+    for i in range(0, 14, 2):
+        m.remove('key' + str(i))
+    print(m.get_size(), m.get_capacity(), m.get_tombstone_count())
+    print(m.get_keys_and_values())